@@ -0,0 +1,604 @@
+import dataclasses
+import math
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
+
+from database import get_db_connection
+from consultas import PERIODOS_VENTAS, cargar_resumen
+from metricas import medir
+import consultas
+from horizonte import ANOS_PROYECCION, validar_granularidad, validar_horizonte
+import exportacion
+import partidas
+
+# calculos, finanzas, montecarlo y sensibilidad (NumPy) se importan en las
+# vistas que calculan: registrar la API no carga NumPy
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+class ErrorAPI(Exception):
+    """Error de validación que se devuelve como JSON con su código HTTP."""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.estado = estado
+
+
+@api.errorhandler(ErrorAPI)
+def manejar_error_api(error):
+    return jsonify({'error': error.mensaje}), error.estado
+
+
+@api.errorhandler(404)
+def no_encontrado(error):
+    return jsonify({'error': 'No encontrado'}), 404
+
+
+def _numero(valor):
+    """Convierte NaN/inf en None para que la respuesta sea JSON válido."""
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+def _id_proyecto(datos):
+    """proyecto_id de la URL o, en las rutas antiguas sin él, del campo "proyecto_id" (entero)."""
+    if g.get('proyecto_id') is not None:
+        return g.proyecto_id
+    proyecto_id = datos.get('proyecto_id')
+    # En la query string llega como texto
+    if isinstance(proyecto_id, str) and proyecto_id.strip().isdigit():
+        proyecto_id = int(proyecto_id)
+    if not isinstance(proyecto_id, int) or isinstance(proyecto_id, bool):
+        raise ErrorAPI('proyecto_id debe ser un entero; usa /api/proyectos/<id>/...')
+    return proyecto_id
+
+
+def _proyecto_de_la_peticion(conn, datos):
+    resumen = cargar_resumen(conn, _id_proyecto(datos))
+    if not resumen:
+        raise ErrorAPI('Proyecto no encontrado', 404)
+    # Como en las rutas /proyectos/<id>/..., para los hooks (perfilado)
+    g.proyecto_id = resumen.id
+    return resumen
+
+
+def _a_json(valor):
+    """Convierte dataclasses, tipos de NumPy y NaN/inf en valores JSON."""
+    if dataclasses.is_dataclass(valor):
+        valor = dataclasses.asdict(valor)
+    if isinstance(valor, dict):
+        return {clave: _a_json(v) for clave, v in valor.items()}
+    if hasattr(valor, 'tolist'):  # arreglos y escalares de NumPy
+        valor = valor.tolist()
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(v) for v in valor]
+    if isinstance(valor, float):
+        return _numero(valor)
+    return valor
+
+
+def _cuerpo_json():
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        raise ErrorAPI('Se espera un objeto JSON en el cuerpo')
+    return datos
+
+
+# ==================== PROYECTOS ====================
+
+# Campos editables de un proyecto: nombre -> (conversión, valor por defecto)
+CAMPOS_PROYECTO = {
+    'nombre': (str, None),
+    'tipo_actividad': (str, None),
+    'tiene_inversion': (lambda v: 1 if v in (True, 1, '1', 'si') else 0, 0),
+    'valor_inversion': (float, 0.0),
+    'tasa_descuento': (float, 0.001),
+    'nombre_producto': (str, None),
+    'precio_producto': (float, 0.0),
+    'horizonte': (validar_horizonte, ANOS_PROYECCION),
+    'granularidad_ventas': (validar_granularidad, 'anos'),
+}
+
+
+def _datos_proyecto(datos, actual=None):
+    """Valores de CAMPOS_PROYECTO tomados del JSON, o del proyecto actual/por defecto."""
+    valores = {}
+    for campo, (convertir, defecto) in CAMPOS_PROYECTO.items():
+        if campo in datos and datos[campo] is not None:
+            try:
+                valores[campo] = convertir(datos[campo])
+            except (TypeError, ValueError):
+                raise ErrorAPI(f'{campo}: valor no válido')
+        else:
+            valores[campo] = actual[campo] if actual is not None else defecto
+    if not valores['nombre'] or not str(valores['nombre']).strip():
+        raise ErrorAPI('nombre es obligatorio')
+    return valores
+
+
+def _proyecto_json(conn, proyecto_id):
+    proyecto = conn.execute('SELECT * FROM proyectos WHERE id = ?', (proyecto_id,)).fetchone()
+    return {'proyecto': dict(proyecto), 'totales': consultas.leer_totales(conn, proyecto_id)}
+
+
+@api.route('/proyectos', methods=['GET'])
+def listar_proyectos():
+    """Proyectos con sus totales, paginados por id (?antes=<id>&limite=<n>)."""
+    try:
+        antes = request.args.get('antes')
+        antes = int(antes) if antes is not None else None
+        limite = int(request.args.get('limite', 100))
+    except ValueError:
+        raise ErrorAPI('antes y limite deben ser enteros')
+    # LIMIT negativo en SQLite no tiene tope; los ids son enteros de 64 bits
+    if limite < 1:
+        raise ErrorAPI('limite debe ser al menos 1')
+    if antes is not None and not -2 ** 63 <= antes < 2 ** 63:
+        raise ErrorAPI('antes fuera de rango')
+    limite = min(limite, 1000)
+    conn = get_db_connection()
+    filas, siguiente = consultas.listar_proyectos(conn, antes, limite)
+    conn.close()
+    return jsonify({'proyectos': [dict(f) for f in filas], 'siguiente': siguiente})
+
+
+@api.route('/proyectos', methods=['POST'])
+def crear_proyecto():
+    valores = _datos_proyecto(_cuerpo_json())
+    conn = get_db_connection()
+    cursor = conn.execute(f'INSERT INTO proyectos ({", ".join(valores)}) '
+                          f'VALUES ({", ".join("?" for _ in valores)})', list(valores.values()))
+    conn.commit()
+    respuesta = _proyecto_json(conn, cursor.lastrowid)
+    conn.close()
+    return jsonify(respuesta), 201
+
+
+@api.route('/proyectos/<int:proyecto_id>', methods=['GET'])
+def ver_proyecto():
+    conn = get_db_connection()
+    respuesta = _proyecto_json(conn, g.proyecto_id)
+    conn.close()
+    return jsonify(respuesta)
+
+
+@api.route('/proyectos/<int:proyecto_id>', methods=['PUT', 'PATCH'])
+def actualizar_proyecto():
+    """PUT y PATCH aceptan los campos a cambiar; los que faltan conservan su valor."""
+    datos = _cuerpo_json()
+    conn = get_db_connection()
+    actual = conn.execute('SELECT * FROM proyectos WHERE id = ?', (g.proyecto_id,)).fetchone()
+    valores = _datos_proyecto(datos, actual)
+    conn.execute(f'UPDATE proyectos SET {", ".join(f"{c} = ?" for c in valores)} WHERE id = ?',
+                 list(valores.values()) + [g.proyecto_id])
+    conn.commit()
+    respuesta = _proyecto_json(conn, g.proyecto_id)
+    conn.close()
+    return jsonify(respuesta)
+
+
+@api.route('/proyectos/<int:proyecto_id>', methods=['DELETE'])
+def eliminar_proyecto():
+    """Borra el proyecto con sus partidas, ventas y totales en una transacción."""
+    conn = get_db_connection()
+    for tabla in list(partidas.PARTIDAS) + ['ventas', 'proyecto_totales']:
+        conn.execute(f'DELETE FROM {tabla} WHERE proyecto_id = ?', (g.proyecto_id,))
+    conn.execute('DELETE FROM proyectos WHERE id = ?', (g.proyecto_id,))
+    conn.commit()
+    conn.close()
+    return '', 204
+
+
+@api.route('/proyectos/<int:proyecto_id>/resultados')
+def resultados_proyecto():
+    """VAN, TIR, B/C, PRI, flujos y sensibilidad (los mismos de la página de resultados)."""
+    from calculos import obtener_resultados
+
+    conn = get_db_connection()
+    resultados = obtener_resultados(conn, g.version_proyecto)
+    conn.close()
+    return jsonify(_a_json(resultados))
+
+
+# ==================== PARTIDAS ====================
+
+def _tipo_de_la_ruta(tipo):
+    if tipo not in partidas.PARTIDAS:
+        raise ErrorAPI(f'tipo debe ser uno de: {", ".join(partidas.PARTIDAS)}', 404)
+    return tipo
+
+
+def _partida_json(conn, tipo, partida_id):
+    """Partida y totales del proyecto ya actualizados por los triggers."""
+    partida = partidas.obtener(conn, g.proyecto_id, tipo, partida_id)
+    return {'partida': dict(partida), 'totales': consultas.leer_totales(conn, g.proyecto_id)}
+
+
+@api.route('/proyectos/<int:proyecto_id>/<tipo>', methods=['GET'])
+def listar_partidas(tipo):
+    conn = get_db_connection()
+    filas = partidas.listar(conn, g.proyecto_id, _tipo_de_la_ruta(tipo))
+    totales = consultas.leer_totales(conn, g.proyecto_id)
+    conn.close()
+    return jsonify({tipo: [dict(f) for f in filas], 'totales': totales})
+
+
+@api.route('/proyectos/<int:proyecto_id>/<tipo>', methods=['POST'])
+def crear_partida(tipo):
+    tipo = _tipo_de_la_ruta(tipo)
+    datos = _cuerpo_json()
+    conn = get_db_connection()
+    try:
+        partida_id = partidas.insertar(conn, g.proyecto_id, tipo, datos)
+    except ValueError as e:
+        conn.close()
+        raise ErrorAPI(str(e))
+    conn.commit()
+    respuesta = _partida_json(conn, tipo, partida_id)
+    conn.close()
+    return jsonify(respuesta), 201
+
+
+@api.route('/proyectos/<int:proyecto_id>/<tipo>/<int:partida_id>', methods=['GET'])
+def ver_partida(tipo, partida_id):
+    tipo = _tipo_de_la_ruta(tipo)
+    conn = get_db_connection()
+    partida = partidas.obtener(conn, g.proyecto_id, tipo, partida_id)
+    conn.close()
+    if partida is None:
+        raise ErrorAPI('Partida no encontrada', 404)
+    return jsonify({'partida': dict(partida)})
+
+
+@api.route('/proyectos/<int:proyecto_id>/<tipo>/<int:partida_id>', methods=['PUT', 'PATCH'])
+def actualizar_partida(tipo, partida_id):
+    """PUT y PATCH aceptan los campos a cambiar; los que faltan conservan su valor."""
+    tipo = _tipo_de_la_ruta(tipo)
+    datos = _cuerpo_json()
+    conn = get_db_connection()
+    actual = partidas.obtener(conn, g.proyecto_id, tipo, partida_id)
+    if actual is None:
+        conn.close()
+        raise ErrorAPI('Partida no encontrada', 404)
+    try:
+        partidas.actualizar(conn, g.proyecto_id, tipo, partida_id, {**dict(actual), **datos})
+    except ValueError as e:
+        conn.rollback()
+        conn.close()
+        raise ErrorAPI(str(e))
+    conn.commit()
+    respuesta = _partida_json(conn, tipo, partida_id)
+    conn.close()
+    return jsonify(respuesta)
+
+
+@api.route('/proyectos/<int:proyecto_id>/<tipo>/<int:partida_id>', methods=['DELETE'])
+def eliminar_partida(tipo, partida_id):
+    tipo = _tipo_de_la_ruta(tipo)
+    conn = get_db_connection()
+    if not partidas.eliminar(conn, g.proyecto_id, tipo, partida_id):
+        conn.close()
+        raise ErrorAPI('Partida no encontrada', 404)
+    conn.commit()
+    totales = consultas.leer_totales(conn, g.proyecto_id)
+    conn.close()
+    return jsonify({'eliminada': partida_id, 'totales': totales})
+
+
+@api.route('/proyectos/<int:proyecto_id>/partidas/lote', methods=['POST'])
+def lote_partidas():
+    """Altas, cambios y bajas de partidas en una sola transacción.
+
+    Cuerpo: {"operaciones": [{"op": "insertar", "tipo": "costos", "datos": {...}},
+    {"op": "actualizar", "tipo": "gastos", "id": 3, "datos": {...}},
+    {"op": "eliminar", "tipo": "personal", "id": 5}, ...]}
+    """
+    operaciones = _cuerpo_json().get('operaciones')
+    if not isinstance(operaciones, list) or not operaciones:
+        raise ErrorAPI('Se espera una lista no vacía en "operaciones"')
+    maximo = current_app.config.get('LOTE_MAX_OPERACIONES', 5000)
+    if len(operaciones) > maximo:
+        raise ErrorAPI(f'Como máximo {maximo} operaciones por lote')
+
+    conn = get_db_connection()
+    try:
+        aplicadas = partidas.aplicar_lote(conn, g.proyecto_id, operaciones)
+    except partidas.ErrorOperacion as e:
+        conn.close()
+        return jsonify({'error': str(e), 'indice': e.indice}), e.estado
+    totales = consultas.leer_totales(conn, g.proyecto_id)
+    conn.close()
+    return jsonify({'operaciones': aplicadas, 'totales': totales})
+
+
+# ==================== VENTAS ====================
+
+@api.route('/proyectos/<int:proyecto_id>/ventas/<granularidad>', methods=['GET', 'PUT'])
+def ventas_proyecto(granularidad):
+    """Ventas por dias, semanas, meses o anos.
+
+    PUT acepta {"unidades": [...]} con cualquier número de periodos (reemplaza
+    la serie) o {nombre del periodo: unidades} como el formulario (los nombres
+    ausentes = 0; los periodos siguientes no se tocan).
+    """
+    if granularidad not in PERIODOS_VENTAS:
+        raise ErrorAPI('granularidad debe ser dias, semanas, meses o anos', 404)
+
+    if request.method == 'PUT':
+        datos = _cuerpo_json()
+        reemplazar = 'unidades' in datos
+        if reemplazar:
+            valores = datos['unidades']
+            maximo = current_app.config['VENTAS_MAX_PERIODOS']
+            if not isinstance(valores, list) or len(valores) > maximo:
+                raise ErrorAPI(f'"unidades" debe ser una lista de como máximo {maximo} valores')
+        else:
+            valores = [datos.get(nombre, 0) for nombre in PERIODOS_VENTAS[granularidad]]
+        try:
+            valores = [int(v) for v in valores]
+        except (TypeError, ValueError):
+            raise ErrorAPI('Las ventas deben ser números enteros')
+        if any(v < 0 for v in valores):
+            raise ErrorAPI('Las ventas no pueden ser negativas')
+
+    conn = get_db_connection()
+    if request.method == 'PUT':
+        consultas.guardar_ventas(conn, g.proyecto_id, granularidad, valores, reemplazar=reemplazar)
+        conn.commit()
+
+    resumen = cargar_resumen(conn, g.proyecto_id)
+    totales = consultas.leer_totales(conn, g.proyecto_id)
+    conn.close()
+    serie = resumen.ventas.get(granularidad)
+    return jsonify({'ventas': resumen.ventas_por_periodo(granularidad),
+                    'unidades': list(serie) if serie is not None else None,
+                    'totales': totales})
+
+
+# ==================== ESCENARIOS ====================
+
+# Parámetros que un escenario puede sobrescribir: clave JSON -> clave de construir_flujos()
+PARAMETROS_ESCENARIO = {
+    'valor_inversion': 'inversion',
+    'precio_producto': 'precio',
+    'costos': 'costos',
+    'gastos': 'gastos',
+    'salarios': 'salarios',
+}
+
+
+def matriz_escenarios(resumen, escenarios):
+    """Arma los parámetros de construir_flujos() como arreglos de m escenarios.
+
+    Cada escenario toma los valores guardados del proyecto y sobrescribe los
+    que indique; devuelve (parámetros, tasas de descuento).
+    """
+    import numpy as np
+
+    base = resumen.parametros_flujo()
+    m = len(escenarios)
+
+    parametros = {clave: np.full(m, float(base[clave])) for clave in PARAMETROS_ESCENARIO.values()}
+    tasas = np.full(m, float(resumen.proyecto['tasa_descuento']))
+    ventas = np.zeros((m, base['anos']))
+    con_ventas = np.zeros(m, dtype=bool)
+    if base['ventas_anos'] is not None:
+        ventas[:] = base['ventas_anos']
+        con_ventas[:] = True
+
+    for i, escenario in enumerate(escenarios):
+        if not isinstance(escenario, dict):
+            raise ErrorAPI(f'Escenario {i}: debe ser un objeto')
+        try:
+            for campo, clave in PARAMETROS_ESCENARIO.items():
+                if campo in escenario:
+                    parametros[clave][i] = float(escenario[campo])
+            if 'tasa_descuento' in escenario:
+                tasas[i] = float(escenario['tasa_descuento'])
+            if 'ventas_anos' in escenario:
+                fila = [float(v) for v in escenario['ventas_anos']]
+                if len(fila) != base['anos']:
+                    raise ErrorAPI(f'Escenario {i}: ventas_anos debe tener {base["anos"]} valores')
+                ventas[i] = fila
+                con_ventas[i] = True
+        except (TypeError, ValueError):
+            raise ErrorAPI(f'Escenario {i}: valores numéricos no válidos')
+
+    parametros['ventas_anos'] = ventas
+    parametros['con_ventas'] = con_ventas
+    return parametros, tasas
+
+
+def evaluar_escenarios(parametros, tasas):
+    """VAN, TIR (%), B/C y PRI de todos los escenarios como operaciones sobre la matriz de flujos."""
+    from finanzas import calcular_bc, calcular_pri, calcular_van, construir_flujos, tir_lote
+
+    with medir('calculo'):
+        flujos = construir_flujos(**parametros)
+        van = calcular_van(tasas, flujos)
+        tir = tir_lote(flujos) * 100
+        bc = calcular_bc(flujos, tasas)
+        pri = calcular_pri(flujos)
+    return flujos, van, tir, bc, pri
+
+
+@api.route('/proyectos/<int:proyecto_id>/escenarios', methods=['POST'])
+@api.route('/escenarios', methods=['POST'])  # anterior: proyecto_id en el cuerpo
+def escenarios():
+    """Evalúa un lote de escenarios "qué pasaría si" sobre el proyecto guardado."""
+    datos = request.get_json(silent=True) or {}
+    lista = datos.get('escenarios')
+    if not isinstance(lista, list) or not lista:
+        raise ErrorAPI('Se espera una lista no vacía en "escenarios"')
+    maximo = current_app.config.get('ESCENARIOS_MAX', 10000)
+    if len(lista) > maximo:
+        raise ErrorAPI(f'Como máximo {maximo} escenarios por petición')
+
+    conn = get_db_connection()
+    resumen = _proyecto_de_la_peticion(conn, datos)
+    conn.close()
+
+    inicio = time.perf_counter()
+    parametros, tasas = matriz_escenarios(resumen, lista)
+    flujos, van, tir, bc, pri = evaluar_escenarios(parametros, tasas)
+    segundos = time.perf_counter() - inicio
+
+    resultados = []
+    for i, escenario in enumerate(lista):
+        resultado = {
+            'van': _numero(van[i]),
+            'tir': _numero(tir[i]),
+            'bc': _numero(bc[i]),
+            'pri': _numero(pri[i]),
+        }
+        if 'nombre' in escenario:
+            resultado['nombre'] = escenario['nombre']
+        if datos.get('incluir_flujos'):
+            resultado['flujos'] = flujos[i].tolist()
+        resultados.append(resultado)
+
+    return jsonify({
+        'proyecto_id': resumen.id,
+        'escenarios': resultados,
+        'cantidad': len(resultados),
+        'segundos': segundos,
+        'escenarios_por_segundo': len(resultados) / segundos if segundos > 0 else None,
+    })
+
+
+# ==================== MONTE CARLO ====================
+
+@api.route('/proyectos/<int:proyecto_id>/montecarlo', methods=['POST'])
+@api.route('/montecarlo', methods=['POST'])  # anterior: proyecto_id en el cuerpo
+def simulacion_montecarlo():
+    """Simulación de Monte Carlo del VAN y la TIR del proyecto guardado."""
+    import montecarlo
+
+    datos = request.get_json(silent=True) or {}
+    config = current_app.config
+    try:
+        simulaciones = int(datos.get('simulaciones', config.get('MONTECARLO_SIMULACIONES', 100000)))
+        semilla = datos.get('semilla')
+        semilla = int(semilla) if semilla is not None else None
+        procesos = int(datos.get('procesos', config.get('MONTECARLO_PROCESOS', 1)))
+        bins = int(datos.get('bins', 30))
+    except (TypeError, ValueError):
+        raise ErrorAPI('simulaciones, semilla, procesos y bins deben ser enteros')
+
+    maximo = config.get('MONTECARLO_MAX_SIMULACIONES', 1000000)
+    if not 1 <= simulaciones <= maximo:
+        raise ErrorAPI(f'simulaciones debe estar entre 1 y {maximo}')
+    if not 1 <= bins <= 500:
+        raise ErrorAPI('bins debe estar entre 1 y 500')
+    if semilla is not None and semilla < 0:
+        raise ErrorAPI('semilla debe ser un entero no negativo')
+    procesos = max(1, min(procesos, config.get('MONTECARLO_MAX_PROCESOS', 4)))
+
+    conn = get_db_connection()
+    resumen = _proyecto_de_la_peticion(conn, datos)
+    conn.close()
+
+    try:
+        with medir('calculo'):
+            resultado = montecarlo.simular(resumen, datos.get('distribuciones'), simulaciones,
+                                           semilla=semilla, procesos=procesos, bins=bins)
+    except ValueError as e:
+        raise ErrorAPI(str(e))
+
+    resultado['proyecto_id'] = resumen.id
+    return jsonify(resultado)
+
+
+# ==================== SENSIBILIDAD ====================
+
+def _lista_numeros(texto, nombre):
+    try:
+        return [float(x) for x in texto.split(',') if x.strip()]
+    except ValueError:
+        raise ErrorAPI(f'{nombre} debe ser una lista de números separados por comas')
+
+
+@api.route('/proyectos/<int:proyecto_id>/sensibilidad')
+@api.route('/sensibilidad')  # anterior: ?proyecto_id=<id>
+def analisis_sensibilidad():
+    """Malla de VAN tasa × factor (precio o ventas) y tornado, para gráficos."""
+    import sensibilidad
+
+    variable = request.args.get('variable', 'precio')
+    if variable not in sensibilidad.VARIABLES:
+        raise ErrorAPI(f'variable debe ser una de: {", ".join(sensibilidad.VARIABLES)}')
+    tasas = _lista_numeros(request.args.get('tasas', ''), 'tasas') or sensibilidad.TASAS
+    factores = _lista_numeros(request.args.get('factores', ''), 'factores') or sensibilidad.FACTORES
+    if len(tasas) * len(factores) > 100000:
+        raise ErrorAPI('La malla no puede superar 100000 celdas')
+
+    conn = get_db_connection()
+    resumen = _proyecto_de_la_peticion(conn, request.args)
+    conn.close()
+
+    base = resumen.parametros_flujo()
+    with medir('calculo'):
+        malla = sensibilidad.malla(base, variable, tasas, factores)
+        tornado = sensibilidad.tornado(base, resumen.proyecto['tasa_descuento'])
+    return jsonify({'proyecto_id': resumen.id, 'malla': malla, 'tornado': tornado})
+
+
+# ==================== IMPORTACIÓN ====================
+
+@api.route('/proyectos/<int:proyecto_id>/importar/<tipo>', methods=['POST'])
+def importar_partidas(tipo):
+    """Importa costos, gastos, personal o materiales desde un CSV/XLSX (campo "archivo")."""
+    tipo = _tipo_de_la_ruta(tipo)
+    archivo = request.files.get('archivo')
+    if archivo is None or not archivo.filename:
+        raise ErrorAPI('Se espera un archivo CSV o XLSX en el campo "archivo"')
+
+    conn = get_db_connection()
+    try:
+        filas = partidas.leer_filas(archivo.stream, archivo.filename)
+        resultado = partidas.importar(conn, g.proyecto_id, tipo, filas)
+    except partidas.ErrorImportacion as e:
+        return jsonify({'error': str(e), 'errores': e.errores}), 400
+    finally:
+        conn.close()
+
+    return jsonify(resultado)
+
+
+# ==================== EXPORTACIÓN ====================
+
+def _respuesta_exportacion(generador, nombre, formato):
+    respuesta = Response(stream_with_context(generador), content_type=exportacion.FORMATOS[formato])
+    respuesta.headers['Content-Disposition'] = f'attachment; filename={nombre}.{formato}'
+    return respuesta
+
+
+def _parametros_exportacion(formato):
+    if formato not in exportacion.FORMATOS:
+        raise ErrorAPI(f'formato debe ser uno de: {", ".join(exportacion.FORMATOS)}')
+    proyecto_id = request.args.get('proyecto_id')
+    try:
+        return int(proyecto_id) if proyecto_id is not None else None
+    except ValueError:
+        raise ErrorAPI('proyecto_id debe ser un entero')
+
+
+@api.route('/exportar/<tabla>.<formato>')
+def exportar_tabla(tabla, formato):
+    """Exporta una tabla completa (o las filas de ?proyecto_id=) en CSV o JSON Lines."""
+    if tabla not in exportacion.TABLAS:
+        raise ErrorAPI(f'tabla debe ser una de: {", ".join(exportacion.TABLAS)}', 404)
+    proyecto_id = _parametros_exportacion(formato)
+    generador = exportacion.exportar_tabla(get_db_connection(), tabla, formato, proyecto_id)
+    return _respuesta_exportacion(generador, tabla, formato)
+
+
+@api.route('/exportar/indicadores.<formato>')
+def exportar_indicadores(formato):
+    """Flujos anuales, VAN, TIR, B/C y PRI de cada proyecto en CSV o JSON Lines."""
+    proyecto_id = _parametros_exportacion(formato)
+    generador = exportacion.exportar_indicadores(get_db_connection(), formato, proyecto_id)
+    return _respuesta_exportacion(generador, 'indicadores', formato)
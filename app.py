@@ -1,29 +1,44 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-import os
-import sqlite3
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, abort, current_app
+from flask.cli import AppGroup
+import click
+import time
 from config import Config
-
-# Inicializar la aplicación Flask
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Función para conectar a la base de datos
-def get_db_connection():
-    import os        #borrar si da errores, es por railway
-    import tempfile    #borrar si da errores, es por railway
-
-    db_path = os.path.join(tempfile.gettempdir(), 'proyectos.db')
-    conn = sqlite3.connect(db_path)
-    
-    #conn = sqlite3.connect(':memory:') # para arrancar en Railway
-    #conn = sqlite3.connect(app.config['DATABASE_PATH']) # para arrancar en local original esto y el de abajo
-    conn.row_factory = sqlite3.Row  # Para obtener diccionarios en lugar de tuplas
-    return conn
-
-# Crear tablas de la base de datos si no existen
+import database
+from database import get_db_connection
+from consultas import cargar_resumen
+import consultas
+import migraciones
+import partidas
+import semillas
+import metricas
+import cache
+from condicional import respuesta_condicional
+from horizonte import ANOS_PROYECCION, validar_granularidad, validar_horizonte
+
+# ==================== REGISTRO DIFERIDO ====================
+
+# Las vistas y comandos se declaran aquí y create_app() los registra en cada
+# aplicación: importar el módulo no crea la aplicación ni toca la base de
+# datos, y los endpoints siguen siendo el nombre de cada función.
+_RUTAS = []
+comandos = AppGroup('pep')
+
+def ruta(regla, **opciones):
+    """Como @app.route, pero se registra al llamar a create_app()."""
+    def decorador(vista):
+        _RUTAS.append((regla, opciones, vista))
+        return vista
+    return decorador
+
+# ==================== ESQUEMA ====================
+
+# Crear tablas de la base de datos si no existen (flask init-db al desplegar)
 def init_db():
     conn = get_db_connection()
     
+    # Modo de journal (WAL) y demás ajustes persistentes del archivo
+    database.configurar_almacenamiento(conn)
+    
     # Tabla de proyectos (como tu PRIMERA FASE en Excel)
     conn.execute('''
     CREATE TABLE IF NOT EXISTS proyectos (
@@ -35,7 +50,9 @@ def init_db():
         tasa_descuento REAL DEFAULT 0.001,
         nombre_producto TEXT,
         precio_producto REAL,
-        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        horizonte INTEGER DEFAULT 7,
+        granularidad_ventas TEXT DEFAULT 'anos'
     )
     ''')
     
@@ -84,185 +101,307 @@ def init_db():
     )
     ''')
     
-    # Tabla para ventas por día
+    # Ventas por periodo: una fila por (proyecto, granularidad, periodo), sin
+    # límite de periodos. La clave primaria agrupa las ventas de cada proyecto
+    # (WITHOUT ROWID), así que leerlas es un recorrido por rango
     conn.execute('''
-    CREATE TABLE IF NOT EXISTS ventas_dias (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        proyecto_id INTEGER,
-        lunes INTEGER DEFAULT 0,
-        martes INTEGER DEFAULT 0,
-        miercoles INTEGER DEFAULT 0,
-        jueves INTEGER DEFAULT 0,
-        viernes INTEGER DEFAULT 0,
-        sabado INTEGER DEFAULT 0,
-        domingo INTEGER DEFAULT 0,
+    CREATE TABLE IF NOT EXISTS ventas (
+        proyecto_id INTEGER NOT NULL,
+        granularidad TEXT NOT NULL CHECK (granularidad IN ('dias', 'semanas', 'meses', 'anos')),
+        periodo INTEGER NOT NULL CHECK (periodo >= 1),
+        unidades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (proyecto_id, granularidad, periodo),
         FOREIGN KEY (proyecto_id) REFERENCES proyectos (id)
-    )
+    ) WITHOUT ROWID
     ''')
     
-    # Tabla para ventas por semana
-    conn.execute('''
-    CREATE TABLE IF NOT EXISTS ventas_semanas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        proyecto_id INTEGER,
-        semana1 INTEGER DEFAULT 0,
-        semana2 INTEGER DEFAULT 0,
-        semana3 INTEGER DEFAULT 0,
-        semana4 INTEGER DEFAULT 0,
-        FOREIGN KEY (proyecto_id) REFERENCES proyectos (id)
-    )
-    ''')
+    # Totales y versión por proyecto mantenidos por triggers (lectura O(1) por clave primaria);
+    # los triggers los crea la migración 6
+    consultas.crear_totales_materializados(conn)
     
-    # Tabla para ventas por mes
-    conn.execute('''
-    CREATE TABLE IF NOT EXISTS ventas_meses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        proyecto_id INTEGER,
-        enero INTEGER DEFAULT 0,
-        febrero INTEGER DEFAULT 0,
-        marzo INTEGER DEFAULT 0,
-        abril INTEGER DEFAULT 0,
-        mayo INTEGER DEFAULT 0,
-        junio INTEGER DEFAULT 0,
-        julio INTEGER DEFAULT 0,
-        FOREIGN KEY (proyecto_id) REFERENCES proyectos (id)
-    )
-    ''')
+    conn.commit()
     
-    # Tabla para ventas por año
-    conn.execute('''
-    CREATE TABLE IF NOT EXISTS ventas_anos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        proyecto_id INTEGER,
-        año1 INTEGER DEFAULT 0,
-        año2 INTEGER DEFAULT 0,
-        año3 INTEGER DEFAULT 0,
-        año4 INTEGER DEFAULT 0,
-        año5 INTEGER DEFAULT 0,
-        año6 INTEGER DEFAULT 0,
-        año7 INTEGER DEFAULT 0,
-        FOREIGN KEY (proyecto_id) REFERENCES proyectos (id)
-    )
-    ''')
+    # Cambios de esquema pendientes (índices, triggers, etc.) también para bases existentes
+    migraciones.aplicar_migraciones(conn)
     
-    conn.commit()
     conn.close()
 
-# Llamar a init_db al iniciar la aplicación
-with app.app_context():
+def esquema_al_dia(conn):
+    """True si la base ya tiene las tablas y todas las migraciones (sin escribir nada)."""
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                          "AND name = 'proyecto_totales'").fetchone()
+    return existe is not None and migraciones.version_esquema(conn) >= len(migraciones.MIGRACIONES)
+
+@comandos.command('init-db')
+def init_db_command():
+    """Crea las tablas y aplica las migraciones pendientes."""
+    inicio = time.perf_counter()
     init_db()
+    click.echo(f'Esquema al día (versión {len(migraciones.MIGRACIONES)}) '
+               f'en {(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+@comandos.command('verificar-totales')
+@click.option('--reconstruir', is_flag=True, help='Recalcula los totales de todos los proyectos.')
+@click.option('--solo-verificar', is_flag=True, help='Informa de las diferencias sin repararlas.')
+def verificar_totales_command(reconstruir, solo_verificar):
+    """Comprueba que proyecto_totales coincide con los SUM de cada tabla y repara la deriva."""
+    conn = get_db_connection()
+    diferencias = consultas.verificar_totales(conn)
+    
+    for d in diferencias:
+        click.echo(f"Proyecto {d['proyecto_id']} - {d['categoria']}: "
+                   f"guardado {d['guardado']} / real {d['real']}")
+    
+    # La deriva de redondeo de los triggers (por debajo de la tolerancia) también se repara
+    deriva = sorted({d['proyecto_id'] for d in consultas.verificar_totales(conn, tolerancia=0)})
+    if reconstruir:
+        consultas.reconstruir_totales(conn)
+        conn.commit()
+        click.echo('Totales reconstruidos')
+    elif not deriva:
+        click.echo('Totales consistentes')
+    elif solo_verificar:
+        click.echo(f'{len(deriva)} proyectos con deriva (sin reparar)')
+    else:
+        consultas.reconstruir_totales(conn, deriva)
+        conn.commit()
+        click.echo(f'Totales reparados en {len(deriva)} proyectos')
+    
+    conn.close()
+
+@comandos.command('importar-partidas')
+@click.argument('proyecto_id', type=int)
+@click.argument('tipo', type=click.Choice(list(partidas.PARTIDAS)))
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+def importar_partidas_command(proyecto_id, tipo, archivo):
+    """Importa partidas de un CSV/XLSX en una sola transacción."""
+    conn = get_db_connection()
+    if consultas.version_proyecto(conn, proyecto_id) is None:
+        conn.close()
+        raise click.ClickException(f'No existe el proyecto {proyecto_id}')
+    
+    try:
+        with open(archivo, 'rb') as f:
+            resultado = partidas.importar(conn, proyecto_id, tipo, partidas.leer_filas(f, archivo))
+    except partidas.ErrorImportacion as e:
+        for error in e.errores:
+            click.echo(f"Fila {error['fila']}: {error['error']}", err=True)
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    
+    click.echo(f"{resultado['filas']} filas importadas en {resultado['segundos']:.2f} s "
+               f"({resultado['filas_por_segundo'] or 0:,.0f} filas/s)")
+
+@comandos.command('sembrar')
+@click.option('--proyectos', default=10, show_default=True, help='Proyectos a crear.')
+@click.option('--costos', default=semillas.PARTIDAS_POR_PROYECTO['costos'], show_default=True)
+@click.option('--gastos', default=semillas.PARTIDAS_POR_PROYECTO['gastos'], show_default=True)
+@click.option('--personal', default=semillas.PARTIDAS_POR_PROYECTO['personal'], show_default=True)
+@click.option('--materiales', default=semillas.PARTIDAS_POR_PROYECTO['materiales'], show_default=True)
+@click.option('--ventas-dias', default=semillas.PERIODOS_POR_PROYECTO['dias'], show_default=True)
+@click.option('--ventas-semanas', default=semillas.PERIODOS_POR_PROYECTO['semanas'], show_default=True)
+@click.option('--ventas-meses', default=semillas.PERIODOS_POR_PROYECTO['meses'], show_default=True)
+@click.option('--ventas-anos', default=semillas.PERIODOS_POR_PROYECTO['anos'], show_default=True)
+@click.option('--semilla', type=int, help='Semilla para generar siempre los mismos datos.')
+def sembrar_command(proyectos, costos, gastos, personal, materiales,
+                    ventas_dias, ventas_semanas, ventas_meses, ventas_anos, semilla):
+    """Genera proyectos sintéticos con partidas y ventas (por proyecto)."""
+    conn = get_db_connection()
+    try:
+        resultado = semillas.sembrar(
+            conn, proyectos,
+            partidas_por_tipo={'costos': costos, 'gastos': gastos,
+                               'personal': personal, 'materiales': materiales},
+            periodos_ventas={'dias': ventas_dias, 'semanas': ventas_semanas,
+                             'meses': ventas_meses, 'anos': ventas_anos},
+            semilla=semilla)
+    finally:
+        conn.close()
+
+    ids = resultado['proyectos']
+    if ids:
+        click.echo(f'Proyectos {ids[0]} a {ids[-1]} creados')
+    for tabla, filas in resultado['filas'].items():
+        click.echo(f'  {tabla}: {filas} filas')
+    click.echo(f"{resultado['segundos']:.2f} s ({resultado['filas_por_segundo'] or 0:,.0f} filas/s)")
+
+# ==================== PROYECTO DE LA URL ====================
+
+# Las rutas de un proyecto cuelgan de /proyectos/<proyecto_id>/...: el id se
+# guarda en g y url_for() lo completa solo, así que las vistas y plantillas
+# siguen usando url_for('viabilidad_tecnica') sin pasarlo.
+
+def extraer_proyecto_id(endpoint, values):
+    if values and 'proyecto_id' in values:
+        g.proyecto_id = values.pop('proyecto_id')
+
+def completar_proyecto_id(endpoint, values):
+    if 'proyecto_id' in values or g.get('proyecto_id') is None:
+        return
+    if current_app.url_map.is_endpoint_expecting(endpoint, 'proyecto_id'):
+        values['proyecto_id'] = g.proyecto_id
+
+def comprobar_proyecto():
+    """404 si el proyecto de la URL no existe (búsqueda por clave primaria)."""
+    if g.get('proyecto_id') is None:
+        return
+    conn = get_db_connection()
+    g.version_proyecto = consultas.version_proyecto(conn, g.proyecto_id)
+    conn.close()
+    if g.version_proyecto is None:
+        abort(404)
+
+# Direcciones anteriores (/proyecto/...): se redirigen al último proyecto creado
+@ruta('/proyecto/<path:resto>', methods=['GET', 'POST'])
+@ruta('/resultados/<path:resto>', endpoint='resultados_anteriores')
+def rutas_anteriores(resto):
+    conn = get_db_connection()
+    proyecto = conn.execute('SELECT id FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    conn.close()
+    
+    if not proyecto:
+        # El formulario de datos iniciales sin proyecto crea uno nuevo, como antes
+        if resto == 'datos-iniciales':
+            return redirect(url_for('nuevo_proyecto'), code=308)
+        flash('Primero debes crear un proyecto', 'warning')
+        return redirect(url_for('nuevo_proyecto'))
+    
+    prefijo = 'resultados/' if request.endpoint == 'resultados_anteriores' else ''
+    destino = f"/proyectos/{proyecto['id']}/{prefijo}{resto}"
+    if request.query_string:
+        destino += '?' + request.query_string.decode()
+    # 308 conserva el método y el cuerpo de los formularios
+    return redirect(destino, code=308)
+
+# ==================== PROYECTOS ====================
+
+@ruta('/')
+def lista_proyectos():
+    """Listado de proyectos con paginación por clave (?antes=<id>)."""
+    antes = request.args.get('antes', type=int)
+    por_pagina = current_app.config.get('PROYECTOS_POR_PAGINA', 20)
+    
+    conn = get_db_connection()
+    proyectos, siguiente = consultas.listar_proyectos(conn, antes, por_pagina)
+    conn.close()
+    
+    return render_template('proyectos.html', proyectos=proyectos, siguiente=siguiente,
+                           primera_pagina=antes is None)
+
+def _datos_proyecto(form):
+    """Valores del formulario de datos iniciales en el orden de las columnas."""
+    return (
+        form.get('nombre'),
+        form.get('tipo_actividad'),
+        1 if form.get('tiene_inversion') == 'si' else 0,
+        float(form.get('valor_inversion', 0)),
+        float(form.get('tasa_descuento', 0.001)),
+        form.get('nombre_producto'),
+        float(form.get('precio_producto', 0)),
+        validar_horizonte(form.get('horizonte') or ANOS_PROYECCION),
+        validar_granularidad(form.get('granularidad_ventas') or 'anos'),
+    )
+
+@ruta('/proyectos/nuevo', methods=['GET', 'POST'])
+def nuevo_proyecto():
+    if request.method == 'POST':
+        datos = _datos_proyecto(request.form)
+        
+        conn = get_db_connection()
+        cursor = conn.execute('''
+            INSERT INTO proyectos 
+            (nombre, tipo_actividad, tiene_inversion, valor_inversion, 
+             tasa_descuento, nombre_producto, precio_producto,
+             horizonte, granularidad_ventas)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', datos)
+        conn.commit()
+        conn.close()
+        
+        flash('Proyecto creado correctamente', 'success')
+        return redirect(url_for('datos_iniciales', proyecto_id=cursor.lastrowid))
+    
+    return render_template('proyecto/datos_iniciales.html', proyecto=None)
 
 # ==================== RUTAS PRINCIPALES ====================
 
-@app.route('/')
+@ruta('/proyectos/<int:proyecto_id>/')
+@respuesta_condicional
 def index():
     conn = get_db_connection()
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    proyecto = conn.execute('SELECT * FROM proyectos WHERE id = ?', (g.proyecto_id,)).fetchone()
     conn.close()
     
     return render_template('index.html', proyecto=proyecto)
 
-@app.route('/proyecto/datos-iniciales', methods=['GET', 'POST'])
+@ruta('/proyectos/<int:proyecto_id>/datos-iniciales', methods=['GET', 'POST'])
+@respuesta_condicional
 def datos_iniciales():
     conn = get_db_connection()
     
     if request.method == 'POST':
-        nombre = request.form.get('nombre')
-        tipo_actividad = request.form.get('tipo_actividad')
-        tiene_inversion = 1 if request.form.get('tiene_inversion') == 'si' else 0
-        valor_inversion = float(request.form.get('valor_inversion', 0))
-        tasa_descuento = float(request.form.get('tasa_descuento', 0.001))
-        nombre_producto = request.form.get('nombre_producto')
-        precio_producto = float(request.form.get('precio_producto', 0))
-        
-        proyecto_existente = conn.execute('SELECT * FROM proyectos').fetchone()
-        
-        if proyecto_existente:
-            conn.execute('''
-                UPDATE proyectos SET 
-                nombre = ?, tipo_actividad = ?, tiene_inversion = ?, 
-                valor_inversion = ?, tasa_descuento = ?, nombre_producto = ?, 
-                precio_producto = ?
-                WHERE id = ?
-            ''', (nombre, tipo_actividad, tiene_inversion, valor_inversion, 
-                  tasa_descuento, nombre_producto, precio_producto, proyecto_existente['id']))
-            flash('Proyecto actualizado correctamente', 'success')
-        else:
-            conn.execute('''
-                INSERT INTO proyectos 
-                (nombre, tipo_actividad, tiene_inversion, valor_inversion, 
-                 tasa_descuento, nombre_producto, precio_producto)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (nombre, tipo_actividad, tiene_inversion, valor_inversion, 
-                  tasa_descuento, nombre_producto, precio_producto))
-            flash('Proyecto creado correctamente', 'success')
-        
+        conn.execute('''
+            UPDATE proyectos SET 
+            nombre = ?, tipo_actividad = ?, tiene_inversion = ?, 
+            valor_inversion = ?, tasa_descuento = ?, nombre_producto = ?, 
+            precio_producto = ?, horizonte = ?, granularidad_ventas = ?
+            WHERE id = ?
+        ''', _datos_proyecto(request.form) + (g.proyecto_id,))
         conn.commit()
         conn.close()
+        
+        flash('Proyecto actualizado correctamente', 'success')
         return redirect(url_for('datos_iniciales'))
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    proyecto = conn.execute('SELECT * FROM proyectos WHERE id = ?', (g.proyecto_id,)).fetchone()
     conn.close()
     
     return render_template('proyecto/datos_iniciales.html', proyecto=proyecto)
 
 # ==================== VIABILIDAD TÉCNICA ====================
 
-@app.route('/proyecto/viabilidad-tecnica')
+@ruta('/proyectos/<int:proyecto_id>/viabilidad-tecnica')
+@respuesta_condicional
 def viabilidad_tecnica():
     conn = get_db_connection()
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    resumen = cargar_resumen(conn, g.proyecto_id)
     
     costos = []
-    total_costos = 0
-    if proyecto:
-        costos = conn.execute('SELECT * FROM costos WHERE proyecto_id = ? ORDER BY id', 
-                             (proyecto['id'],)).fetchall()
-        total_costos_result = conn.execute('SELECT SUM(valor) as total FROM costos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_costos = total_costos_result['total'] or 0 if total_costos_result else 0
-    
     gastos = []
-    total_gastos = 0
-    if proyecto:
+    if resumen:
+        costos = conn.execute('SELECT * FROM costos WHERE proyecto_id = ? ORDER BY id', 
+                             (resumen.id,)).fetchall()
         gastos = conn.execute('SELECT * FROM gastos WHERE proyecto_id = ? ORDER BY id', 
-                             (proyecto['id'],)).fetchall()
-        total_gastos_result = conn.execute('SELECT SUM(valor) as total FROM gastos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_gastos = total_gastos_result['total'] or 0 if total_gastos_result else 0
+                             (resumen.id,)).fetchall()
     
     conn.close()
     
     return render_template('proyecto/viabilidad_tecnica.html', 
-                         proyecto=proyecto, 
+                         proyecto=resumen.proyecto if resumen else None, 
                          costos=costos, 
                          gastos=gastos,
-                         total_costos=total_costos,
-                         total_gastos=total_gastos)
+                         total_costos=resumen.costos if resumen else 0,
+                         total_gastos=resumen.gastos if resumen else 0)
 
-@app.route('/proyecto/agregar-costo', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/agregar-costo', methods=['POST'])
 def agregar_costo():
     if request.method == 'POST':
         nombre = request.form.get('nombre_costo')
         valor = float(request.form.get('valor_costo', 0))
         
         conn = get_db_connection()
-        proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-        
-        if proyecto:
-            conn.execute('INSERT INTO costos (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
-                        (proyecto['id'], nombre, valor))
-            conn.commit()
-            flash(f'Costo "{nombre}" agregado correctamente', 'success')
-        else:
-            flash('Primero debes crear un proyecto', 'warning')
-        
+        conn.execute('INSERT INTO costos (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
+                    (g.proyecto_id, nombre, valor))
+        conn.commit()
         conn.close()
+        
+        flash(f'Costo "{nombre}" agregado correctamente', 'success')
     
     return redirect(url_for('viabilidad_tecnica'))
 
-@app.route('/proyecto/editar-costo/<int:id>', methods=['GET', 'POST'])
+@ruta('/proyectos/<int:proyecto_id>/editar-costo/<int:id>', methods=['GET', 'POST'])
 def editar_costo(id):
     conn = get_db_connection()
     
@@ -270,15 +409,16 @@ def editar_costo(id):
         nombre = request.form.get('nombre_costo')
         valor = float(request.form.get('valor_costo', 0))
         
-        conn.execute('UPDATE costos SET nombre = ?, valor = ? WHERE id = ?',
-                    (nombre, valor, id))
+        conn.execute('UPDATE costos SET nombre = ?, valor = ? WHERE id = ? AND proyecto_id = ?',
+                    (nombre, valor, id, g.proyecto_id))
         conn.commit()
         conn.close()
         
         flash(f'Costo actualizado correctamente', 'success')
         return redirect(url_for('viabilidad_tecnica'))
     
-    costo = conn.execute('SELECT * FROM costos WHERE id = ?', (id,)).fetchone()
+    costo = conn.execute('SELECT * FROM costos WHERE id = ? AND proyecto_id = ?',
+                         (id, g.proyecto_id)).fetchone()
     conn.close()
     
     if not costo:
@@ -287,41 +427,38 @@ def editar_costo(id):
     
     return render_template('componentes/modal_editar_costo.html', costo=costo)
 
-@app.route('/proyecto/eliminar-costo/<int:id>')
+@ruta('/proyectos/<int:proyecto_id>/eliminar-costo/<int:id>')
 def eliminar_costo(id):
     conn = get_db_connection()
     
-    costo = conn.execute('SELECT * FROM costos WHERE id = ?', (id,)).fetchone()
+    costo = conn.execute('SELECT * FROM costos WHERE id = ? AND proyecto_id = ?',
+                         (id, g.proyecto_id)).fetchone()
     if costo:
-        conn.execute('DELETE FROM costos WHERE id = ?', (id,))
+        conn.execute('DELETE FROM costos WHERE id = ? AND proyecto_id = ?',
+                     (id, g.proyecto_id))
         conn.commit()
         flash(f'Costo "{costo["nombre"]}" eliminado correctamente', 'success')
     
     conn.close()
     return redirect(url_for('viabilidad_tecnica'))
 
-@app.route('/proyecto/agregar-gasto', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/agregar-gasto', methods=['POST'])
 def agregar_gasto():
     if request.method == 'POST':
         nombre = request.form.get('nombre_gasto')
         valor = float(request.form.get('valor_gasto', 0))
         
         conn = get_db_connection()
-        proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-        
-        if proyecto:
-            conn.execute('INSERT INTO gastos (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
-                        (proyecto['id'], nombre, valor))
-            conn.commit()
-            flash(f'Gasto "{nombre}" agregado correctamente', 'success')
-        else:
-            flash('Primero debes crear un proyecto', 'warning')
-        
+        conn.execute('INSERT INTO gastos (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
+                    (g.proyecto_id, nombre, valor))
+        conn.commit()
         conn.close()
+        
+        flash(f'Gasto "{nombre}" agregado correctamente', 'success')
     
     return redirect(url_for('viabilidad_tecnica'))
 
-@app.route('/proyecto/editar-gasto/<int:id>', methods=['GET', 'POST'])
+@ruta('/proyectos/<int:proyecto_id>/editar-gasto/<int:id>', methods=['GET', 'POST'])
 def editar_gasto(id):
     conn = get_db_connection()
     
@@ -329,15 +466,16 @@ def editar_gasto(id):
         nombre = request.form.get('nombre_gasto')
         valor = float(request.form.get('valor_gasto', 0))
         
-        conn.execute('UPDATE gastos SET nombre = ?, valor = ? WHERE id = ?',
-                    (nombre, valor, id))
+        conn.execute('UPDATE gastos SET nombre = ?, valor = ? WHERE id = ? AND proyecto_id = ?',
+                    (nombre, valor, id, g.proyecto_id))
         conn.commit()
         conn.close()
         
         flash(f'Gasto actualizado correctamente', 'success')
         return redirect(url_for('viabilidad_tecnica'))
     
-    gasto = conn.execute('SELECT * FROM gastos WHERE id = ?', (id,)).fetchone()
+    gasto = conn.execute('SELECT * FROM gastos WHERE id = ? AND proyecto_id = ?',
+                         (id, g.proyecto_id)).fetchone()
     conn.close()
     
     if not gasto:
@@ -346,13 +484,15 @@ def editar_gasto(id):
     
     return render_template('componentes/modal_editar_gasto.html', gasto=gasto)
 
-@app.route('/proyecto/eliminar-gasto/<int:id>')
+@ruta('/proyectos/<int:proyecto_id>/eliminar-gasto/<int:id>')
 def eliminar_gasto(id):
     conn = get_db_connection()
     
-    gasto = conn.execute('SELECT * FROM gastos WHERE id = ?', (id,)).fetchone()
+    gasto = conn.execute('SELECT * FROM gastos WHERE id = ? AND proyecto_id = ?',
+                         (id, g.proyecto_id)).fetchone()
     if gasto:
-        conn.execute('DELETE FROM gastos WHERE id = ?', (id,))
+        conn.execute('DELETE FROM gastos WHERE id = ? AND proyecto_id = ?',
+                     (id, g.proyecto_id))
         conn.commit()
         flash(f'Gasto "{gasto["nombre"]}" eliminado correctamente', 'success')
     
@@ -361,42 +501,28 @@ def eliminar_gasto(id):
 
 # ==================== VIABILIDAD OPERATIVA ====================
 
-@app.route('/proyecto/viabilidad-operativa')
+@ruta('/proyectos/<int:proyecto_id>/viabilidad-operativa')
+@respuesta_condicional
 def viabilidad_operativa():
     conn = get_db_connection()
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    resumen = cargar_resumen(conn, g.proyecto_id)
     
     personal = []
-    total_salarios = 0
-    if proyecto:
+    if resumen:
         personal = conn.execute('SELECT * FROM personal WHERE proyecto_id = ? ORDER BY id', 
-                               (proyecto['id'],)).fetchall()
-        total_salarios_result = conn.execute('SELECT SUM(salario_mensual) as total FROM personal WHERE proyecto_id = ?', 
-                                           (proyecto['id'],)).fetchone()
-        total_salarios = total_salarios_result['total'] or 0 if total_salarios_result else 0
-    
-    total_costos = 0
-    total_gastos = 0
-    if proyecto:
-        total_costos_result = conn.execute('SELECT SUM(valor) as total FROM costos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_costos = total_costos_result['total'] or 0 if total_costos_result else 0
-        
-        total_gastos_result = conn.execute('SELECT SUM(valor) as total FROM gastos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_gastos = total_gastos_result['total'] or 0 if total_gastos_result else 0
+                               (resumen.id,)).fetchall()
     
     conn.close()
     
     return render_template('proyecto/viabilidad_operativa.html', 
-                         proyecto=proyecto, 
+                         proyecto=resumen.proyecto if resumen else None, 
                          personal=personal,
-                         total_salarios=total_salarios,
-                         total_costos=total_costos,
-                         total_gastos=total_gastos)
+                         total_salarios=resumen.salarios if resumen else 0,
+                         total_costos=resumen.costos if resumen else 0,
+                         total_gastos=resumen.gastos if resumen else 0)
 
-@app.route('/proyecto/agregar-personal', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/agregar-personal', methods=['POST'])
 def agregar_personal():
     if request.method == 'POST':
         nombre = request.form.get('nombre_personal')
@@ -404,21 +530,16 @@ def agregar_personal():
         salario_mensual = float(request.form.get('salario_mensual', 0))
         
         conn = get_db_connection()
-        proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-        
-        if proyecto:
-            conn.execute('INSERT INTO personal (proyecto_id, nombre, perfil, salario_mensual) VALUES (?, ?, ?, ?)',
-                        (proyecto['id'], nombre, perfil, salario_mensual))
-            conn.commit()
-            flash(f'Personal "{nombre}" agregado correctamente', 'success')
-        else:
-            flash('Primero debes crear un proyecto', 'warning')
-        
+        conn.execute('INSERT INTO personal (proyecto_id, nombre, perfil, salario_mensual) VALUES (?, ?, ?, ?)',
+                    (g.proyecto_id, nombre, perfil, salario_mensual))
+        conn.commit()
         conn.close()
+        
+        flash(f'Personal "{nombre}" agregado correctamente', 'success')
     
     return redirect(url_for('viabilidad_operativa'))
 
-@app.route('/proyecto/editar-personal/<int:id>', methods=['GET', 'POST'])
+@ruta('/proyectos/<int:proyecto_id>/editar-personal/<int:id>', methods=['GET', 'POST'])
 def editar_personal(id):
     conn = get_db_connection()
     
@@ -427,15 +548,17 @@ def editar_personal(id):
         perfil = request.form.get('perfil_personal')
         salario_mensual = float(request.form.get('salario_mensual', 0))
         
-        conn.execute('UPDATE personal SET nombre = ?, perfil = ?, salario_mensual = ? WHERE id = ?',
-                    (nombre, perfil, salario_mensual, id))
+        conn.execute('UPDATE personal SET nombre = ?, perfil = ?, salario_mensual = ? '
+                     'WHERE id = ? AND proyecto_id = ?',
+                    (nombre, perfil, salario_mensual, id, g.proyecto_id))
         conn.commit()
         conn.close()
         
         flash(f'Personal actualizado correctamente', 'success')
         return redirect(url_for('viabilidad_operativa'))
     
-    persona = conn.execute('SELECT * FROM personal WHERE id = ?', (id,)).fetchone()
+    persona = conn.execute('SELECT * FROM personal WHERE id = ? AND proyecto_id = ?',
+                           (id, g.proyecto_id)).fetchone()
     conn.close()
     
     if not persona:
@@ -444,13 +567,15 @@ def editar_personal(id):
     
     return render_template('componentes/modal_editar_personal.html', persona=persona)
 
-@app.route('/proyecto/eliminar-personal/<int:id>')
+@ruta('/proyectos/<int:proyecto_id>/eliminar-personal/<int:id>')
 def eliminar_personal(id):
     conn = get_db_connection()
     
-    persona = conn.execute('SELECT * FROM personal WHERE id = ?', (id,)).fetchone()
+    persona = conn.execute('SELECT * FROM personal WHERE id = ? AND proyecto_id = ?',
+                           (id, g.proyecto_id)).fetchone()
     if persona:
-        conn.execute('DELETE FROM personal WHERE id = ?', (id,))
+        conn.execute('DELETE FROM personal WHERE id = ? AND proyecto_id = ?',
+                     (id, g.proyecto_id))
         conn.commit()
         flash(f'Personal "{persona["nombre"]}" eliminado correctamente', 'success')
     
@@ -459,69 +584,45 @@ def eliminar_personal(id):
 
 # ==================== EQUIPO Y MAQUINARIA ====================
 
-@app.route('/proyecto/equipo-maquinaria')
+@ruta('/proyectos/<int:proyecto_id>/equipo-maquinaria')
+@respuesta_condicional
 def equipo_maquinaria():
     conn = get_db_connection()
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    resumen = cargar_resumen(conn, g.proyecto_id)
     
     materiales = []
-    total_materiales = 0
-    if proyecto:
+    if resumen:
         materiales = conn.execute('SELECT * FROM materiales WHERE proyecto_id = ? ORDER BY id', 
-                                 (proyecto['id'],)).fetchall()
-        total_materiales_result = conn.execute('SELECT SUM(valor) as total FROM materiales WHERE proyecto_id = ?', 
-                                             (proyecto['id'],)).fetchone()
-        total_materiales = total_materiales_result['total'] or 0 if total_materiales_result else 0
-    
-    total_costos = 0
-    total_gastos = 0
-    total_salarios = 0
-    if proyecto:
-        total_costos_result = conn.execute('SELECT SUM(valor) as total FROM costos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_costos = total_costos_result['total'] or 0 if total_costos_result else 0
-        
-        total_gastos_result = conn.execute('SELECT SUM(valor) as total FROM gastos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        total_gastos = total_gastos_result['total'] or 0 if total_gastos_result else 0
-        
-        total_salarios_result = conn.execute('SELECT SUM(salario_mensual) as total FROM personal WHERE proyecto_id = ?', 
-                                           (proyecto['id'],)).fetchone()
-        total_salarios = total_salarios_result['total'] or 0 if total_salarios_result else 0
+                                 (resumen.id,)).fetchall()
     
     conn.close()
     
     return render_template('proyecto/equipo_maquinaria.html', 
-                         proyecto=proyecto, 
+                         proyecto=resumen.proyecto if resumen else None, 
                          materiales=materiales,
-                         total_materiales=total_materiales,
-                         total_costos=total_costos,
-                         total_gastos=total_gastos,
-                         total_salarios=total_salarios)
+                         total_materiales=resumen.materiales if resumen else 0,
+                         total_costos=resumen.costos if resumen else 0,
+                         total_gastos=resumen.gastos if resumen else 0,
+                         total_salarios=resumen.salarios if resumen else 0)
 
-@app.route('/proyecto/agregar-material', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/agregar-material', methods=['POST'])
 def agregar_material():
     if request.method == 'POST':
         nombre = request.form.get('nombre_material')
         valor = float(request.form.get('valor_material', 0))
         
         conn = get_db_connection()
-        proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-        
-        if proyecto:
-            conn.execute('INSERT INTO materiales (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
-                        (proyecto['id'], nombre, valor))
-            conn.commit()
-            flash(f'Material "{nombre}" agregado correctamente', 'success')
-        else:
-            flash('Primero debes crear un proyecto', 'warning')
-        
+        conn.execute('INSERT INTO materiales (proyecto_id, nombre, valor) VALUES (?, ?, ?)',
+                    (g.proyecto_id, nombre, valor))
+        conn.commit()
         conn.close()
+        
+        flash(f'Material "{nombre}" agregado correctamente', 'success')
     
     return redirect(url_for('equipo_maquinaria'))
 
-@app.route('/proyecto/editar-material/<int:id>', methods=['GET', 'POST'])
+@ruta('/proyectos/<int:proyecto_id>/editar-material/<int:id>', methods=['GET', 'POST'])
 def editar_material(id):
     conn = get_db_connection()
     
@@ -529,15 +630,16 @@ def editar_material(id):
         nombre = request.form.get('nombre_material')
         valor = float(request.form.get('valor_material', 0))
         
-        conn.execute('UPDATE materiales SET nombre = ?, valor = ? WHERE id = ?',
-                    (nombre, valor, id))
+        conn.execute('UPDATE materiales SET nombre = ?, valor = ? WHERE id = ? AND proyecto_id = ?',
+                    (nombre, valor, id, g.proyecto_id))
         conn.commit()
         conn.close()
         
         flash(f'Material actualizado correctamente', 'success')
         return redirect(url_for('equipo_maquinaria'))
     
-    material = conn.execute('SELECT * FROM materiales WHERE id = ?', (id,)).fetchone()
+    material = conn.execute('SELECT * FROM materiales WHERE id = ? AND proyecto_id = ?',
+                            (id, g.proyecto_id)).fetchone()
     conn.close()
     
     if not material:
@@ -546,13 +648,15 @@ def editar_material(id):
     
     return render_template('componentes/modal_editar_material.html', material=material)
 
-@app.route('/proyecto/eliminar-material/<int:id>')
+@ruta('/proyectos/<int:proyecto_id>/eliminar-material/<int:id>')
 def eliminar_material(id):
     conn = get_db_connection()
     
-    material = conn.execute('SELECT * FROM materiales WHERE id = ?', (id,)).fetchone()
+    material = conn.execute('SELECT * FROM materiales WHERE id = ? AND proyecto_id = ?',
+                            (id, g.proyecto_id)).fetchone()
     if material:
-        conn.execute('DELETE FROM materiales WHERE id = ?', (id,))
+        conn.execute('DELETE FROM materiales WHERE id = ? AND proyecto_id = ?',
+                     (id, g.proyecto_id))
         conn.commit()
         flash(f'Material "{material["nombre"]}" eliminado correctamente', 'success')
     
@@ -561,469 +665,121 @@ def eliminar_material(id):
 
 # ==================== FLUJOS DE CAJA ====================
 
-@app.route('/proyecto/flujos-caja')
+@ruta('/proyectos/<int:proyecto_id>/flujos-caja')
+@respuesta_condicional
 def flujos_caja():
     conn = get_db_connection()
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-    
-    totales = {
-        'costos': 0,
-        'gastos': 0,
-        'salarios': 0,
-        'materiales': 0
-    }
-    
-    ventas_dias = None
-    ventas_semanas = None
-    ventas_meses = None
-    ventas_anos = None
-    
-    if proyecto:
-        # Costos
-        total_costos_result = conn.execute('SELECT SUM(valor) as total FROM costos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        totales['costos'] = total_costos_result['total'] or 0 if total_costos_result else 0
-        
-        # Gastos
-        total_gastos_result = conn.execute('SELECT SUM(valor) as total FROM gastos WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-        totales['gastos'] = total_gastos_result['total'] or 0 if total_gastos_result else 0
-        
-        # Personal
-        total_salarios_result = conn.execute('SELECT SUM(salario_mensual) as total FROM personal WHERE proyecto_id = ?', 
-                                           (proyecto['id'],)).fetchone()
-        totales['salarios'] = total_salarios_result['total'] or 0 if total_salarios_result else 0
-        
-        # Materiales
-        total_materiales_result = conn.execute('SELECT SUM(valor) as total FROM materiales WHERE proyecto_id = ?', 
-                                             (proyecto['id'],)).fetchone()
-        totales['materiales'] = total_materiales_result['total'] or 0 if total_materiales_result else 0
-        
-        # Obtener ventas
-        ventas_dias = conn.execute('SELECT * FROM ventas_dias WHERE proyecto_id = ?', 
-                                  (proyecto['id'],)).fetchone()
-        ventas_semanas = conn.execute('SELECT * FROM ventas_semanas WHERE proyecto_id = ?', 
-                                     (proyecto['id'],)).fetchone()
-        ventas_meses = conn.execute('SELECT * FROM ventas_meses WHERE proyecto_id = ?', 
-                                   (proyecto['id'],)).fetchone()
-        ventas_anos = conn.execute('SELECT * FROM ventas_anos WHERE proyecto_id = ?', 
-                                  (proyecto['id'],)).fetchone()
+    # Proyecto y totales en una consulta; ventas en un recorrido por rango
+    resumen = cargar_resumen(conn, g.proyecto_id)
     
     conn.close()
     
+    if not resumen:
+        return render_template('proyecto/flujos_caja.html', 
+                             proyecto=None,
+                             totales={'costos': 0, 'gastos': 0, 'salarios': 0, 'materiales': 0},
+                             ventas_dias=None,
+                             ventas_semanas=None,
+                             ventas_meses=None,
+                             ventas_anos=None)
+    
     return render_template('proyecto/flujos_caja.html', 
-                         proyecto=proyecto,
-                         totales=totales,
-                         ventas_dias=ventas_dias,
-                         ventas_semanas=ventas_semanas,
-                         ventas_meses=ventas_meses,
-                         ventas_anos=ventas_anos)
+                         proyecto=resumen.proyecto,
+                         totales=resumen.totales,
+                         ventas_dias=resumen.ventas_dias,
+                         ventas_semanas=resumen.ventas_semanas,
+                         ventas_meses=resumen.ventas_meses,
+                         ventas_anos=resumen.ventas_anos)
 
-@app.route('/proyecto/guardar-ventas-dias', methods=['POST'])
-def guardar_ventas_dias():
-    conn = get_db_connection()
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-    
-    if not proyecto:
-        flash('Primero debes crear un proyecto', 'warning')
-        conn.close()
-        return redirect(url_for('flujos_caja'))
-    
-    datos = {
-        'lunes': int(request.form.get('lunes', 0)),
-        'martes': int(request.form.get('martes', 0)),
-        'miercoles': int(request.form.get('miercoles', 0)),
-        'jueves': int(request.form.get('jueves', 0)),
-        'viernes': int(request.form.get('viernes', 0)),
-        'sabado': int(request.form.get('sabado', 0)),
-        'domingo': int(request.form.get('domingo', 0))
-    }
-    
-    existente = conn.execute('SELECT * FROM ventas_dias WHERE proyecto_id = ?', 
-                            (proyecto['id'],)).fetchone()
-    
-    if existente:
-        conn.execute('''
-            UPDATE ventas_dias SET 
-            lunes = ?, martes = ?, miercoles = ?, jueves = ?, 
-            viernes = ?, sabado = ?, domingo = ?
-            WHERE proyecto_id = ?
-        ''', (datos['lunes'], datos['martes'], datos['miercoles'], datos['jueves'],
-              datos['viernes'], datos['sabado'], datos['domingo'], proyecto['id']))
-    else:
-        conn.execute('''
-            INSERT INTO ventas_dias 
-            (proyecto_id, lunes, martes, miercoles, jueves, viernes, sabado, domingo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (proyecto['id'], datos['lunes'], datos['martes'], datos['miercoles'], 
-              datos['jueves'], datos['viernes'], datos['sabado'], datos['domingo']))
+def _guardar_ventas(granularidad, mensaje):
+    """Guarda los periodos del formulario (los demás periodos no se tocan)."""
+    unidades = [int(request.form.get(campo, 0)) for campo in consultas.PERIODOS_VENTAS[granularidad]]
     
+    conn = get_db_connection()
+    consultas.guardar_ventas(conn, g.proyecto_id, granularidad, unidades)
     conn.commit()
     conn.close()
     
-    flash('Ventas por día guardadas correctamente', 'success')
+    flash(mensaje, 'success')
     return redirect(url_for('flujos_caja'))
 
-@app.route('/proyecto/guardar-ventas-semanas', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/guardar-ventas-dias', methods=['POST'])
+def guardar_ventas_dias():
+    return _guardar_ventas('dias', 'Ventas por día guardadas correctamente')
+
+@ruta('/proyectos/<int:proyecto_id>/guardar-ventas-semanas', methods=['POST'])
 def guardar_ventas_semanas():
-    conn = get_db_connection()
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-    
-    if not proyecto:
-        flash('Primero debes crear un proyecto', 'warning')
-        conn.close()
-        return redirect(url_for('flujos_caja'))
-    
-    datos = {
-        'semana1': int(request.form.get('semana1', 0)),
-        'semana2': int(request.form.get('semana2', 0)),
-        'semana3': int(request.form.get('semana3', 0)),
-        'semana4': int(request.form.get('semana4', 0))
-    }
-    
-    existente = conn.execute('SELECT * FROM ventas_semanas WHERE proyecto_id = ?', 
-                            (proyecto['id'],)).fetchone()
-    
-    if existente:
-        conn.execute('''
-            UPDATE ventas_semanas SET 
-            semana1 = ?, semana2 = ?, semana3 = ?, semana4 = ?
-            WHERE proyecto_id = ?
-        ''', (datos['semana1'], datos['semana2'], datos['semana3'], 
-              datos['semana4'], proyecto['id']))
-    else:
-        conn.execute('''
-            INSERT INTO ventas_semanas 
-            (proyecto_id, semana1, semana2, semana3, semana4)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (proyecto['id'], datos['semana1'], datos['semana2'], 
-              datos['semana3'], datos['semana4']))
-    
-    conn.commit()
-    conn.close()
-    
-    flash('Ventas por semana guardadas correctamente', 'success')
-    return redirect(url_for('flujos_caja'))
+    return _guardar_ventas('semanas', 'Ventas por semana guardadas correctamente')
 
-@app.route('/proyecto/guardar-ventas-meses', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/guardar-ventas-meses', methods=['POST'])
 def guardar_ventas_meses():
-    conn = get_db_connection()
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-    
-    if not proyecto:
-        flash('Primero debes crear un proyecto', 'warning')
-        conn.close()
-        return redirect(url_for('flujos_caja'))
-    
-    datos = {
-        'enero': int(request.form.get('enero', 0)),
-        'febrero': int(request.form.get('febrero', 0)),
-        'marzo': int(request.form.get('marzo', 0)),
-        'abril': int(request.form.get('abril', 0)),
-        'mayo': int(request.form.get('mayo', 0)),
-        'junio': int(request.form.get('junio', 0)),
-        'julio': int(request.form.get('julio', 0))
-    }
-    
-    existente = conn.execute('SELECT * FROM ventas_meses WHERE proyecto_id = ?', 
-                            (proyecto['id'],)).fetchone()
-    
-    if existente:
-        conn.execute('''
-            UPDATE ventas_meses SET 
-            enero = ?, febrero = ?, marzo = ?, abril = ?, 
-            mayo = ?, junio = ?, julio = ?
-            WHERE proyecto_id = ?
-        ''', (datos['enero'], datos['febrero'], datos['marzo'], datos['abril'],
-              datos['mayo'], datos['junio'], datos['julio'], proyecto['id']))
-    else:
-        conn.execute('''
-            INSERT INTO ventas_meses 
-            (proyecto_id, enero, febrero, marzo, abril, mayo, junio, julio)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (proyecto['id'], datos['enero'], datos['febrero'], datos['marzo'], 
-              datos['abril'], datos['mayo'], datos['junio'], datos['julio']))
-    
-    conn.commit()
-    conn.close()
-    
-    flash('Ventas por mes guardadas correctamente', 'success')
-    return redirect(url_for('flujos_caja'))
+    return _guardar_ventas('meses', 'Ventas por mes guardadas correctamente')
 
-@app.route('/proyecto/guardar-ventas-anos', methods=['POST'])
+@ruta('/proyectos/<int:proyecto_id>/guardar-ventas-anos', methods=['POST'])
 def guardar_ventas_anos():
-    conn = get_db_connection()
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
-    
-    if not proyecto:
-        flash('Primero debes crear un proyecto', 'warning')
-        conn.close()
-        return redirect(url_for('flujos_caja'))
-    
-    datos = {
-        'año1': int(request.form.get('año1', 0)),
-        'año2': int(request.form.get('año2', 0)),
-        'año3': int(request.form.get('año3', 0)),
-        'año4': int(request.form.get('año4', 0)),
-        'año5': int(request.form.get('año5', 0)),
-        'año6': int(request.form.get('año6', 0)),
-        'año7': int(request.form.get('año7', 0))
-    }
-    
-    existente = conn.execute('SELECT * FROM ventas_anos WHERE proyecto_id = ?', 
-                            (proyecto['id'],)).fetchone()
-    
-    if existente:
-        conn.execute('''
-            UPDATE ventas_anos SET 
-            año1 = ?, año2 = ?, año3 = ?, año4 = ?, 
-            año5 = ?, año6 = ?, año7 = ?
-            WHERE proyecto_id = ?
-        ''', (datos['año1'], datos['año2'], datos['año3'], datos['año4'],
-              datos['año5'], datos['año6'], datos['año7'], proyecto['id']))
-    else:
-        conn.execute('''
-            INSERT INTO ventas_anos 
-            (proyecto_id, año1, año2, año3, año4, año5, año6, año7)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (proyecto['id'], datos['año1'], datos['año2'], datos['año3'], 
-              datos['año4'], datos['año5'], datos['año6'], datos['año7']))
-    
-    conn.commit()
-    conn.close()
-    
-    flash('Ventas por año guardadas correctamente', 'success')
-    return redirect(url_for('flujos_caja'))
+    return _guardar_ventas('anos', 'Ventas por año guardadas correctamente')
 
 # ==================== FUNCIONES DE CÁLCULO ====================
 
-def calcular_van(tasa_descuento, flujos):
-    """Calcula el VAN dado una tasa de descuento y una lista de flujos."""
-    van = 0
-    for i, flujo in enumerate(flujos):
-        van += flujo / ((1 + tasa_descuento) ** i)
-    return van
-
-def calcular_tir(flujos, iteraciones=1000, precision=0.0001):
-    """Calcula la TIR usando el método de bisección."""
-    def van_con_tasa(tasa):
-        total = 0
-        for i, flujo in enumerate(flujos):
-            total += flujo / ((1 + tasa) ** i)
-        return total
-    
-    tasa_min = -0.99
-    tasa_max = 10.0
-    
-    van_min = van_con_tasa(tasa_min)
-    van_max = van_con_tasa(tasa_max)
-    
-    if van_min * van_max > 0:
-        return None
-    
-    for _ in range(iteraciones):
-        tasa_media = (tasa_min + tasa_max) / 2
-        van_media = van_con_tasa(tasa_media)
-        
-        if abs(van_media) < precision:
-            return tasa_media
-        
-        if van_min * van_media < 0:
-            tasa_max = tasa_media
-            van_max = van_media
-        else:
-            tasa_min = tasa_media
-            van_min = van_media
-    
-    return (tasa_min + tasa_max) / 2
-
-def calcular_bc(flujos, tasa_descuento):
-    """Calcula la relación Beneficio/Costo."""
-    beneficios_pv = 0
-    costos_pv = 0
-    
-    for i, flujo in enumerate(flujos):
-        if flujo > 0:
-            beneficios_pv += flujo / ((1 + tasa_descuento) ** i)
-        else:
-            costos_pv += abs(flujo) / ((1 + tasa_descuento) ** i)
-    
-    if costos_pv == 0:
-        return float('inf')
-    
-    return beneficios_pv / costos_pv
-
-def calcular_pri(flujos):
-    """Calcula el Periodo de Recuperación de la Inversión."""
-    inversion_inicial = abs(flujos[0]) if flujos and flujos[0] < 0 else 0
-    if inversion_inicial == 0:
-        return 0
-    
-    acumulado = 0
-    
-    for i, flujo in enumerate(flujos):
-        if i == 0:
-            continue
-        
-        acumulado += flujo
-        
-        if acumulado >= inversion_inicial:
-            flujo_anterior = flujos[i-1] if i > 1 else 0
-            faltante_antes = inversion_inicial - (acumulado - flujo)
-            proporcion = faltante_antes / flujo if flujo != 0 else 0
-            
-            return (i - 1) + proporcion
-    
-    return None
-
-# Función helper para plantillas
-def calcular_van_template(tasa, flujos):
-    """Versión para usar en plantillas Jinja2"""
-    return calcular_van(tasa, flujos)
-
-@app.context_processor
-def utility_processor():
-    """Inyecta funciones en todas las plantillas"""
-    return dict(calcular_van=calcular_van_template)
+# calcular_van, calcular_tir, calcular_bc y calcular_pri: versiones
+# vectorizadas con NumPy en finanzas.py; los indicadores de la página
+# de resultados se arman en calculos.py, que se importa en la primera
+# petición que calcula para que el arranque no cargue NumPy
 
 # ==================== CÁLCULOS FINANCIEROS ====================
 
-@app.route('/resultados/calculos-financieros')
+@ruta('/proyectos/<int:proyecto_id>/resultados/calculos-financieros')
+@respuesta_condicional
 def calculos_financieros():
-    conn = get_db_connection()
+    from calculos import obtener_resultados
     
-    proyecto = conn.execute('SELECT * FROM proyectos ORDER BY id DESC LIMIT 1').fetchone()
+    conn = get_db_connection()
     
-    if not proyecto:
-        flash('Primero debes crear un proyecto', 'warning')
-        conn.close()
-        return redirect(url_for('index'))
-    
-    resultados = {
-        'proyecto': proyecto,
-        'totales': {},
-        'calculos': {}
-    }
-    
-    # Obtener totales
-    # Costos
-    total_costos_result = conn.execute('SELECT SUM(valor) as total FROM costos WHERE proyecto_id = ?', 
-                                     (proyecto['id'],)).fetchone()
-    resultados['totales']['costos'] = total_costos_result['total'] or 0 if total_costos_result else 0
-    
-    # Gastos
-    total_gastos_result = conn.execute('SELECT SUM(valor) as total FROM gastos WHERE proyecto_id = ?', 
-                                     (proyecto['id'],)).fetchone()
-    resultados['totales']['gastos'] = total_gastos_result['total'] or 0 if total_gastos_result else 0
-    
-    # Personal
-    total_salarios_result = conn.execute('SELECT SUM(salario_mensual) as total FROM personal WHERE proyecto_id = ?', 
-                                       (proyecto['id'],)).fetchone()
-    resultados['totales']['salarios'] = total_salarios_result['total'] or 0 if total_salarios_result else 0
-    
-    # Materiales
-    total_materiales_result = conn.execute('SELECT SUM(valor) as total FROM materiales WHERE proyecto_id = ?', 
-                                         (proyecto['id'],)).fetchone()
-    resultados['totales']['materiales'] = total_materiales_result['total'] or 0 if total_materiales_result else 0
-    
-    # Inversión inicial
-    inversion_inicial = proyecto['valor_inversion'] if proyecto['tiene_inversion'] == 1 else 0
-    
-    # Obtener ventas por año para flujos
-    ventas_anos = conn.execute('SELECT * FROM ventas_anos WHERE proyecto_id = ?', 
-                              (proyecto['id'],)).fetchone()
+    # Versión de los datos (leída al validar el proyecto de la URL):
+    # si no cambió desde el último cálculo se reutiliza
+    resultados = obtener_resultados(conn, g.version_proyecto)
     
     conn.close()
     
-    # Construir flujos de caja para 7 años
-    flujos_anuales = []
-    
-    # Año 0: Inversión inicial (negativa)
-    flujos_anuales.append(-inversion_inicial)
-    
-    # Años 1-7: Flujos netos
-    if ventas_anos:
-        # Calcular ingresos anuales usando get()
-        for i in range(1, 8):
-            ventas_key = f'año{i}'
-            # Usar get() en lugar de getattr para mayor seguridad
-            ventas = ventas_anos[ventas_key] if ventas_key in ventas_anos.keys() else 0
-            ingresos_anuales = ventas * proyecto['precio_producto']
-            
-            # Calcular flujo neto
-            costo_anual = resultados['totales']['costos'] / 7 if resultados['totales']['costos'] > 0 else 0
-            gasto_anual = resultados['totales']['gastos'] / 7 if resultados['totales']['gastos'] > 0 else 0
-            salario_anual = resultados['totales']['salarios'] * 12 if resultados['totales']['salarios'] > 0 else 0
-            
-            flujo_neto = ingresos_anuales - costo_anual - gasto_anual - salario_anual
-            flujos_anuales.append(flujo_neto)
-    else:
-        # Valores por defecto si no hay ventas registradas
-        for i in range(7):
-            flujos_anuales.append(0)
-    
-    # Realizar cálculos financieros
-    tasa_descuento = proyecto['tasa_descuento']
-    
-    try:
-        # VAN
-        van = calcular_van(tasa_descuento, flujos_anuales)
-        resultados['calculos']['van'] = van
-        
-        # TIR
-        tir = calcular_tir(flujos_anuales)
-        resultados['calculos']['tir'] = tir * 100 if tir else 0
-        
-        # B/C
-        bc = calcular_bc(flujos_anuales, tasa_descuento)
-        resultados['calculos']['bc'] = bc
-        
-        # PRI
-        pri = calcular_pri(flujos_anuales)
-        resultados['calculos']['pri'] = pri
-        
-        # Otros indicadores
-        resultados['calculos']['flujos'] = flujos_anuales
-        resultados['calculos']['inversion_total'] = (
-            inversion_inicial + 
-            resultados['totales']['costos'] + 
-            resultados['totales']['gastos'] + 
-            (resultados['totales']['salarios'] * 12 * 7) +  # 7 años de salarios
-            resultados['totales']['materiales']
-        )
-        
-        # Rentabilidad
-        if inversion_inicial > 0:
-            resultados['calculos']['rentabilidad'] = (van / inversion_inicial) * 100
-        else:
-            resultados['calculos']['rentabilidad'] = 0
-            
-    except Exception as e:
-        resultados['calculos']['error'] = f"Error en cálculos: {str(e)}"
-        resultados['calculos']['van'] = 0
-        resultados['calculos']['tir'] = 0
-        resultados['calculos']['bc'] = 0
-        resultados['calculos']['pri'] = 0
-        resultados['calculos']['flujos'] = flujos_anuales
-        resultados['calculos']['inversion_total'] = 0
-        resultados['calculos']['rentabilidad'] = 0
-    
     return render_template('resultados/calculo_financiero.html', resultados=resultados)
 
-# Ruta para limpiar todos los datos
-@app.route('/limpiar-datos')
+# Ruta con el estado interno de la aplicación (para dimensionar el pool)
+@ruta('/estado')
+def estado():
+    return jsonify({
+        'pool': database.get_pool().estadisticas(),
+        'cache': cache.get_cache().estadisticas(),
+        'cache_flujos': cache.get_cache('flujos').estadisticas(),
+    })
+
+@ruta('/metrics')
+def metrics():
+    """Métricas del worker en formato de texto de Prometheus (solo con METRICAS=1)."""
+    if not metricas.activa():
+        abort(404)
+    pool = database.get_pool().estadisticas()
+    extras = [
+        ('pep_pool_conexiones', 'gauge', 'Conexiones del pool por estado',
+         [({'estado': 'libres'}, pool['libres']), ({'estado': 'en_uso'}, pool['en_uso'])]),
+        ('pep_pool_esperas_total', 'counter', 'Veces que hubo que esperar una conexión libre',
+         [({}, pool['esperas'])]),
+        ('pep_pool_espera_segundos_total', 'counter', 'Tiempo esperando una conexión libre',
+         [({}, pool['tiempo_espera'])]),
+    ]
+    for nombre in ('resultados', 'flujos'):
+        datos = cache.get_cache(nombre).estadisticas()
+        extras.append((f'pep_cache_{nombre}_total', 'counter', f'Aciertos y fallos de la caché de {nombre}',
+                       [({'resultado': 'acierto'}, datos['aciertos']), ({'resultado': 'fallo'}, datos['fallos'])]))
+    return metricas.registro().exportar(extras), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Ruta para limpiar todos los datos del proyecto
+@ruta('/proyectos/<int:proyecto_id>/limpiar-datos')
 def limpiar_datos():
     conn = get_db_connection()
     
-    conn.execute('DELETE FROM costos')
-    conn.execute('DELETE FROM gastos')
-    conn.execute('DELETE FROM personal')
-    conn.execute('DELETE FROM materiales')
-    conn.execute('DELETE FROM ventas_dias')
-    conn.execute('DELETE FROM ventas_semanas')
-    conn.execute('DELETE FROM ventas_meses')
-    conn.execute('DELETE FROM ventas_anos')
+    for tabla in consultas.TABLAS_PROYECTO:
+        conn.execute(f'DELETE FROM {tabla} WHERE proyecto_id = ?', (g.proyecto_id,))
     
     conn.commit()
     conn.close()
@@ -1031,5 +787,58 @@ def limpiar_datos():
     flash('Todos los datos han sido limpiados (excepto el proyecto)', 'warning')
     return redirect(url_for('index'))
 
+# ==================== APLICACIÓN ====================
+
+def create_app(config=None):
+    """Crea la aplicación: configuración, hooks, API, rutas y comandos.
+
+    No crea tablas: el esquema se prepara una vez con `flask init-db` (fase
+    de release). Si la base no lo tiene al día se inicializa aquí, para que
+    `flask run` siga funcionando con una base nueva.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    
+    # Conexiones a la base de datos: pool de conexiones por worker
+    database.init_app(app)
+    
+    # Cachés de resultados y de flujos de esta aplicación
+    cache.init_app(app)
+    
+    # Tiempos por petición (SQL, cálculo, plantillas) si METRICAS=1; antes de los demás hooks
+    metricas.init_app(app)
+    
+    # Perfilado bajo demanda (cabecera X-Perfilar o muestreo) si PERFILADO=1
+    if app.config.get('PERFILADO'):
+        import perfilado
+        perfilado.init_app(app)
+    
+    app.url_value_preprocessor(extraer_proyecto_id)
+    app.url_defaults(completar_proyecto_id)
+    app.before_request(comprobar_proyecto)
+    
+    # API JSON
+    from api import api
+    app.register_blueprint(api)
+    
+    for regla, opciones, vista in _RUTAS:
+        opciones = dict(opciones)
+        app.add_url_rule(regla, opciones.pop('endpoint', None), vista, **opciones)
+    for comando in comandos.commands.values():
+        app.cli.add_command(comando)
+    
+    with app.app_context():
+        conn = get_db_connection()
+        al_dia = esquema_al_dia(conn)
+        conn.close()
+        if not al_dia:
+            init_db()
+        # Con gunicorn --preload los workers no heredan conexiones abiertas
+        database.get_pool().cerrar()
+    
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    create_app().run(debug=True, port=5000)
@@ -0,0 +1,107 @@
+"""Latencia de las páginas según el número total de partidas, con y sin índices.
+
+Crea una base temporal, la llena con partidas repartidas entre muchos
+proyectos y mide las páginas del último proyecto (que tiene pocas filas).
+Con los índices sobre proyecto_id la latencia debe mantenerse plana.
+
+Uso:
+    python benchmarks/bench_indices.py [--filas 1000 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# {id} se reemplaza por el último proyecto (el medido)
+RUTAS = [
+    '/proyectos/{id}/viabilidad-tecnica',
+    '/proyectos/{id}/viabilidad-operativa',
+    '/proyectos/{id}/equipo-maquinaria',
+    '/proyectos/{id}/flujos-caja',
+    '/proyectos/{id}/resultados/calculos-financieros',
+]
+PROYECTOS = 1000
+FILAS_PROYECTO_MEDIDO = 20
+
+
+def _filas(ids, total):
+    """Filas para el resto de proyectos más un número fijo para el último (el medido)."""
+    for _ in range(total):
+        yield random.choice(ids[:-1]), 'x', random.random() * 100
+    for _ in range(FILAS_PROYECTO_MEDIDO):
+        yield ids[-1], 'x', random.random() * 100
+
+
+def sembrar(conn, filas):
+    """Reparte `filas` partidas por tabla entre PROYECTOS proyectos."""
+    conn.executemany('INSERT INTO proyectos (nombre, tasa_descuento, precio_producto) VALUES (?, 0.1, 5)',
+                     ((f'Proyecto {i}',) for i in range(PROYECTOS)))
+    ids = [fila[0] for fila in conn.execute('SELECT id FROM proyectos ORDER BY id')]
+    for tabla, columna in (('costos', 'valor'), ('gastos', 'valor'), ('materiales', 'valor'),
+                           ('personal', 'salario_mensual')):
+        conn.executemany(f'INSERT INTO {tabla} (proyecto_id, nombre, {columna}) VALUES (?, ?, ?)',
+                         _filas(ids, filas))
+    conn.executemany("INSERT INTO ventas (proyecto_id, granularidad, periodo, unidades) VALUES (?, 'anos', ?, ?)",
+                     ((i, periodo, 10 * periodo) for i in ids for periodo in (1, 2, 3)))
+    conn.commit()
+    return ids[-1]
+
+
+def medir(cliente, repeticiones, proyecto_id):
+    """Mediana en milisegundos de cada ruta."""
+    tiempos = {}
+    for ruta in RUTAS:
+        muestras = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cliente.get(ruta.format(id=proyecto_id))
+            muestras.append((time.perf_counter() - inicio) * 1000)
+        tiempos[ruta] = statistics.median(muestras)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='pep_bench_')
+    os.environ['DATABASE_PATH'] = os.path.join(directorio, 'bench.db')
+
+    from app import create_app
+    import database
+    import migraciones
+
+    cliente = create_app().test_client()
+    print(f"{'filas':>10} {'índices':>8} " + ' '.join(f'{r.split("/")[-1][:14]:>14}' for r in RUTAS))
+
+    # Conexión propia, fuera del contexto de Flask (no pasa por el pool)
+    conn = database.abrir_conexion()
+    for filas in args.filas:
+        for tabla in ('costos', 'gastos', 'materiales', 'personal', 'ventas',
+                      'proyecto_totales', 'proyectos'):
+            conn.execute(f'DELETE FROM {tabla}')
+        conn.commit()
+        proyecto_id = sembrar(conn, filas)
+
+        for con_indices in (False, True):
+            for nombre in migraciones.INDICES:
+                conn.execute(f'DROP INDEX IF EXISTS {nombre}')
+            if con_indices:
+                migraciones.crear_indices_proyecto(conn)
+            conn.commit()
+            tiempos = medir(cliente, args.repeticiones, proyecto_id)
+            print(f'{filas:>10} {"sí" if con_indices else "no":>8} '
+                  + ' '.join(f'{tiempos[r]:>11.2f} ms' for r in RUTAS))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import database
+from app import create_app
+
+# Partidas por tabla de cada proyecto sembrado (un proyecto por tamaño)
+TAMANOS = [int(t) for t in os.getenv('BENCH_PARTIDAS', '1,1000,100000').split(',')]
+
+
+def sembrar(conn, tamanos):
+    """Un proyecto por tamaño con `tamaño` partidas en cada tabla; devuelve {tamaño: id}."""
+    import partidas
+
+    proyectos = {}
+    for tamano in tamanos:
+        cursor = conn.execute('INSERT INTO proyectos (nombre, tiene_inversion, valor_inversion, '
+                              'tasa_descuento, nombre_producto, precio_producto) '
+                              "VALUES (?, 1, 50000, 0.1, 'producto', 25)", (f'Proyecto {tamano}',))
+        proyecto_id = cursor.lastrowid
+        for tipo in partidas.PARTIDAS.values():
+            conn.executemany(f'INSERT INTO {tipo.tabla} (proyecto_id, nombre, {tipo.numero}) VALUES (?, ?, ?)',
+                             ((proyecto_id, f'partida {i}', 1 + i % 100) for i in range(tamano)))
+        conn.executemany("INSERT INTO ventas (proyecto_id, granularidad, periodo, unidades) "
+                         "VALUES (?, 'anos', ?, ?)",
+                         ((proyecto_id, periodo, 5000 + 500 * periodo) for periodo in range(1, 8)))
+        proyectos[tamano] = proyecto_id
+    conn.commit()
+    return proyectos
+
+
+def pytest_generate_tests(metafunc):
+    """Las pruebas con argumento `tamano` se repiten para cada tamaño sembrado."""
+    if 'tamano' in metafunc.fixturenames:
+        metafunc.parametrize('tamano', TAMANOS)
+
+
+@pytest.fixture(scope='session')
+def ruta_base(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('bench') / 'bench.db')
+
+
+@pytest.fixture(scope='session')
+def aplicacion(ruta_base):
+    """Aplicación sobre una base temporal (una por sesión de benchmarks)."""
+    return create_app({'DATABASE_PATH': ruta_base})
+
+
+@pytest.fixture(scope='session')
+def proyectos(aplicacion):
+    """{tamaño: id} de los proyectos sembrados."""
+    # Conexión propia, fuera del contexto de Flask (no pasa por el pool)
+    with aplicacion.app_context():
+        conn = database.abrir_conexion()
+    proyectos = sembrar(conn, TAMANOS)
+    conn.close()
+    return proyectos
+
+
+@pytest.fixture(scope='session')
+def cliente(aplicacion, proyectos):
+    return aplicacion.test_client()
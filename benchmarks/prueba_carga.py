@@ -0,0 +1,173 @@
+"""Prueba de carga contra un servidor en marcha.
+
+Repite una mezcla ponderada de vistas de páginas, llamadas a la API y
+envíos de formularios sobre los proyectos existentes (por ejemplo los
+creados con `flask sembrar`) con N clientes concurrentes durante un tiempo
+fijo, y muestra la latencia p50/p95/p99 por acción y las peticiones por
+segundo. Solo usa la biblioteca estándar (asyncio y HTTP/1.1).
+
+Uso:
+    flask --app app sembrar --proyectos 50 --semilla 1
+    flask --app app run
+    python benchmarks/prueba_carga.py --concurrencia 20 --duracion 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+# (nombre, peso, método, ruta, formulario); {id} es un proyecto al azar
+MEZCLA = [
+    ('inicio', 5, 'GET', '/', None),
+    ('proyecto', 10, 'GET', '/proyectos/{id}/', None),
+    ('viabilidad-tecnica', 10, 'GET', '/proyectos/{id}/viabilidad-tecnica', None),
+    ('viabilidad-operativa', 8, 'GET', '/proyectos/{id}/viabilidad-operativa', None),
+    ('equipo-maquinaria', 8, 'GET', '/proyectos/{id}/equipo-maquinaria', None),
+    ('flujos-caja', 10, 'GET', '/proyectos/{id}/flujos-caja', None),
+    ('calculos-financieros', 15, 'GET', '/proyectos/{id}/resultados/calculos-financieros', None),
+    ('api-resultados', 15, 'GET', '/api/proyectos/{id}/resultados', None),
+    ('agregar-costo', 4, 'POST', '/proyectos/{id}/agregar-costo',
+     lambda rng: {'nombre_costo': 'Costo de carga', 'valor_costo': rng.randint(10, 5000)}),
+    ('guardar-ventas-anos', 3, 'POST', '/proyectos/{id}/guardar-ventas-anos',
+     lambda rng: {f'año{i}': rng.randint(1000, 10000) for i in range(1, 8)}),
+]
+
+TIMEOUT = 30.0
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+async def peticion(servidor, metodo, ruta, formulario=None):
+    """Envía una petición HTTP/1.1 (Connection: close) y devuelve (estado, cuerpo)."""
+    lector, escritor = await asyncio.open_connection(servidor.hostname, servidor.port or 80)
+    try:
+        cuerpo = urlencode(formulario).encode() if formulario is not None else b''
+        cabeceras = [f'{metodo} {ruta} HTTP/1.1', f'Host: {servidor.netloc}', 'Connection: close']
+        if formulario is not None:
+            cabeceras += ['Content-Type: application/x-www-form-urlencoded',
+                          f'Content-Length: {len(cuerpo)}']
+        escritor.write(('\r\n'.join(cabeceras) + '\r\n\r\n').encode() + cuerpo)
+        await escritor.drain()
+        respuesta = await lector.read()
+    finally:
+        escritor.close()
+    estado = int(respuesta.split(b' ', 2)[1])
+    return estado, respuesta.partition(b'\r\n\r\n')[2]
+
+
+async def obtener_proyectos(servidor):
+    estado, cuerpo = await peticion(servidor, 'GET', '/api/proyectos?limite=1000')
+    if estado != 200:
+        raise RuntimeError(f'GET /api/proyectos: {estado}')
+    return [p['id'] for p in json.loads(cuerpo)['proyectos']]
+
+
+async def cliente(servidor, proyectos, fin, rng, muestras, errores):
+    nombres, pesos = zip(*((accion[0], accion[1]) for accion in MEZCLA))
+    acciones = {accion[0]: accion for accion in MEZCLA}
+    while time.perf_counter() < fin:
+        nombre, _, metodo, ruta, formulario = acciones[rng.choices(nombres, pesos)[0]]
+        ruta = ruta.format(id=rng.choice(proyectos))
+        inicio = time.perf_counter()
+        try:
+            estado, _ = await asyncio.wait_for(
+                peticion(servidor, metodo, ruta, formulario(rng) if formulario else None), TIMEOUT)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            estado = None
+        duracion = (time.perf_counter() - inicio) * 1000
+        # Las redirecciones (POST → GET) no se siguen: cuentan como correctas
+        if estado is None or estado >= 400:
+            errores[nombre] = errores.get(nombre, 0) + 1
+        else:
+            muestras.setdefault(nombre, []).append(duracion)
+
+
+def resumen(muestras, errores, segundos):
+    filas = {}
+    for nombre in [accion[0] for accion in MEZCLA]:
+        valores = muestras.get(nombre, [])
+        if not valores and not errores.get(nombre):
+            continue
+        filas[nombre] = {
+            'peticiones': len(valores),
+            'errores': errores.get(nombre, 0),
+            'p50_ms': percentil(valores, 50),
+            'p95_ms': percentil(valores, 95),
+            'p99_ms': percentil(valores, 99),
+        }
+    todas = [v for valores in muestras.values() for v in valores]
+    total = len(todas) + sum(errores.values())
+    return {
+        'segundos': segundos,
+        'peticiones': total,
+        'errores': sum(errores.values()),
+        'peticiones_por_segundo': total / segundos if segundos > 0 else None,
+        'p50_ms': percentil(todas, 50),
+        'p95_ms': percentil(todas, 95),
+        'p99_ms': percentil(todas, 99),
+        'acciones': filas,
+    }
+
+
+def imprimir(datos):
+    def ms(valor):
+        return f'{valor:>9.1f}' if valor is not None else f'{"-":>9}'
+
+    ancho = max([len('total')] + [len(nombre) for nombre in datos['acciones']])
+    print(f"{'acción':<{ancho}} {'n':>7} {'errores':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nombre, fila in datos['acciones'].items():
+        print(f"{nombre:<{ancho}} {fila['peticiones']:>7} {fila['errores']:>7} "
+              f"{ms(fila['p50_ms'])} {ms(fila['p95_ms'])} {ms(fila['p99_ms'])}")
+    print(f"{'total':<{ancho}} {datos['peticiones']:>7} {datos['errores']:>7} "
+          f"{ms(datos['p50_ms'])} {ms(datos['p95_ms'])} {ms(datos['p99_ms'])}")
+    print(f"{datos['peticiones_por_segundo'] or 0:.1f} peticiones/s en {datos['segundos']:.1f} s")
+
+
+async def ejecutar(args):
+    servidor = urlsplit(args.url)
+    proyectos = await obtener_proyectos(servidor)
+    if not proyectos:
+        raise RuntimeError('No hay proyectos; créalos antes con `flask sembrar`')
+
+    rng = random.Random(args.semilla)
+    muestras, errores = {}, {}
+    inicio = time.perf_counter()
+    fin = inicio + args.duracion
+    await asyncio.gather(*(cliente(servidor, proyectos, fin, random.Random(rng.random()), muestras, errores)
+                           for _ in range(args.concurrencia)))
+    return resumen(muestras, errores, time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrencia', type=int, default=10, help='clientes simultáneos')
+    parser.add_argument('--duracion', type=float, default=30.0, help='segundos de prueba')
+    parser.add_argument('--semilla', type=int)
+    parser.add_argument('--json', action='store_true', help='resultado en JSON')
+    args = parser.parse_args()
+
+    try:
+        datos = asyncio.run(ejecutar(args))
+    except (OSError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(datos, ensure_ascii=False, indent=2))
+    else:
+        imprimir(datos)
+    return 1 if datos['errores'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Rendimiento de las rutas de lectura, las consultas y las funciones financieras.
+
+Usa pytest-benchmark (requirements-dev.txt) y no entra en `pytest` a secas
+(testpaths = tests). La línea base está en benchmarks/linea_base; su
+machine_info dice en qué máquina se midió, y al comparar en otra conviene
+regenerarla antes sobre el mismo commit:
+
+    pytest benchmarks/ --benchmark-storage=benchmarks/linea_base --benchmark-save=linea_base
+    pytest benchmarks/ --benchmark-storage=benchmarks/linea_base --benchmark-compare \\
+        --benchmark-compare-fail=median:25%
+
+BENCH_PARTIDAS cambia los tamaños sembrados (por defecto 1,1000,100000); las
+pruebas con argumento `tamano` se repiten para cada uno (conftest.py).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import numpy as np  # noqa: E402
+
+import cache  # noqa: E402
+import consultas  # noqa: E402
+import database  # noqa: E402
+import finanzas  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Objetivo de arranque de un worker sin --preload: import app + create_app()
+OBJETIVO_ARRANQUE_MS = float(os.getenv('BENCH_OBJETIVO_ARRANQUE_MS', 500))
+ARRANQUES = 5
+
+# Se ejecuta en un proceso nuevo por muestra (sin módulos ya importados)
+CODIGO_ARRANQUE = '''
+import json, time
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+app.create_app()
+fin = time.perf_counter()
+print(json.dumps({'import': (importado - inicio) * 1000, 'create_app': (fin - importado) * 1000}))
+'''
+
+# Rutas de lectura de un proyecto ({id} se reemplaza por el proyecto de cada tamaño)
+RUTAS_PROYECTO = [
+    '/proyectos/{id}/',
+    '/proyectos/{id}/datos-iniciales',
+    '/proyectos/{id}/viabilidad-tecnica',
+    '/proyectos/{id}/viabilidad-operativa',
+    '/proyectos/{id}/equipo-maquinaria',
+    '/proyectos/{id}/flujos-caja',
+    '/proyectos/{id}/resultados/calculos-financieros',
+    '/api/proyectos/{id}',
+    '/api/proyectos/{id}/costos',
+    '/api/proyectos/{id}/ventas/anos',
+    '/api/proyectos/{id}/resultados',
+    '/api/proyectos/{id}/sensibilidad',
+]
+# Rutas que usan la caché de resultados: se miden también con la caché vacía
+RUTAS_CON_CACHE = [
+    '/proyectos/{id}/resultados/calculos-financieros',
+    '/api/proyectos/{id}/resultados',
+]
+RUTAS_GLOBALES = ['/', '/api/proyectos', '/estado']
+
+# Rondas de las mediciones con preparación (caché vacía, arranque)
+RONDAS = 20
+
+
+# ==================== ARRANQUE ====================
+
+@pytest.mark.benchmark(group='arranque')
+def test_arranque(benchmark, aplicacion, ruta_base):
+    """import app + create_app() en procesos nuevos, con la base ya creada."""
+    muestras = []
+
+    def arrancar():
+        salida = subprocess.run([sys.executable, '-c', CODIGO_ARRANQUE], cwd=RAIZ,
+                                env=dict(os.environ, DATABASE_PATH=ruta_base),
+                                check=True, capture_output=True, text=True).stdout
+        muestras.append(json.loads(salida.splitlines()[-1]))
+
+    benchmark.pedantic(arrancar, rounds=ARRANQUES, iterations=1)
+    for clave in ('import', 'create_app'):
+        benchmark.extra_info[f'{clave}_ms'] = statistics.median(m[clave] for m in muestras)
+    total = statistics.median(m['import'] + m['create_app'] for m in muestras)
+    benchmark.extra_info['total_ms'] = total
+    assert total <= OBJETIVO_ARRANQUE_MS, \
+        f'Arranque de {total:.0f} ms: supera el objetivo de {OBJETIVO_ARRANQUE_MS:.0f} ms'
+
+
+# ==================== FINANZAS ====================
+
+FUNCIONES_FLUJOS = {
+    'calcular_van': lambda flujos: finanzas.calcular_van(0.1, flujos),
+    'calcular_tir': finanzas.calcular_tir,
+    'resolver_tir': finanzas.resolver_tir,
+    'calcular_bc': lambda flujos: finanzas.calcular_bc(flujos, 0.1),
+    'calcular_pri': finanzas.calcular_pri,
+}
+
+
+@pytest.fixture(params=[7, 30], ids=lambda anos: f'{anos}_anos')
+def parametros(request):
+    ventas = 5000 + 500 * np.arange(request.param)
+    return dict(inversion=50000, precio=25, ventas_anos=ventas, costos=20000, gastos=5000, salarios=3000)
+
+
+@pytest.mark.benchmark(group='finanzas')
+def test_construir_flujos(benchmark, parametros):
+    benchmark(finanzas.construir_flujos, **parametros)
+
+
+@pytest.mark.benchmark(group='finanzas')
+@pytest.mark.parametrize('nombre', FUNCIONES_FLUJOS)
+def test_funcion_de_flujos(benchmark, parametros, nombre):
+    flujos = finanzas.construir_flujos(**parametros)
+    benchmark(FUNCIONES_FLUJOS[nombre], flujos)
+
+
+@pytest.mark.benchmark(group='finanzas')
+def test_tir_lote_1000(benchmark, parametros):
+    # Lote de escenarios como los de /api/proyectos/<id>/escenarios y la exportación
+    rng = np.random.default_rng(0)
+    ventas = parametros['ventas_anos'] * rng.uniform(0.5, 1.5, (1000, len(parametros['ventas_anos'])))
+    lote = finanzas.construir_flujos(**dict(parametros, ventas_anos=ventas))
+    benchmark(finanzas.tir_lote, lote)
+
+
+# ==================== CONSULTAS ====================
+
+@pytest.mark.benchmark(group='consultas')
+def test_get_db_connection(benchmark, aplicacion):
+    with aplicacion.app_context():
+        benchmark(lambda: database.get_db_connection().close())
+
+
+@pytest.mark.benchmark(group='consultas')
+def test_cargar_resumen(benchmark, aplicacion, proyectos, tamano):
+    with aplicacion.app_context():
+        conn = database.get_db_connection()
+        benchmark(consultas.cargar_resumen, conn, proyectos[tamano])
+        conn.close()
+
+
+@pytest.mark.benchmark(group='consultas')
+def test_verificar_totales(benchmark, aplicacion, proyectos):
+    # SUM reales de cada tabla, la consulta cara que evitan los totales materializados
+    with aplicacion.app_context():
+        conn = database.get_db_connection()
+        benchmark(consultas.verificar_totales, conn)
+        conn.close()
+
+
+# ==================== RUTAS ====================
+
+def _get(cliente, ruta):
+    def peticion():
+        respuesta = cliente.get(ruta)
+        assert respuesta.status_code == 200, f'{ruta}: {respuesta.status_code}'
+    return peticion
+
+
+@pytest.mark.benchmark(group='rutas')
+@pytest.mark.parametrize('ruta', RUTAS_GLOBALES)
+def test_ruta_global(benchmark, cliente, ruta):
+    benchmark(_get(cliente, ruta))
+
+
+@pytest.mark.benchmark(group='rutas')
+@pytest.mark.parametrize('plantilla', RUTAS_PROYECTO)
+def test_ruta_de_proyecto(benchmark, cliente, proyectos, plantilla, tamano):
+    benchmark(_get(cliente, plantilla.format(id=proyectos[tamano])))
+
+
+@pytest.mark.benchmark(group='rutas sin caché')
+@pytest.mark.parametrize('plantilla', RUTAS_CON_CACHE)
+def test_ruta_sin_cache(benchmark, aplicacion, cliente, proyectos, plantilla, tamano):
+    def vaciar_caches():
+        with aplicacion.app_context():
+            cache.get_cache().limpiar()
+            cache.get_cache('flujos').limpiar()
+
+    benchmark.pedantic(_get(cliente, plantilla.format(id=proyectos[tamano])), setup=vaciar_caches,
+                       rounds=RONDAS, warmup_rounds=1)
@@ -0,0 +1,160 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+# ==================== BACKENDS ====================
+
+class BackendMemoria:
+    """LRU en memoria del proceso, acotado por número de entradas."""
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+
+    def obtener(self, clave):
+        with self._candado:
+            if clave not in self._datos:
+                return None
+            self._datos.move_to_end(clave)
+            return self._datos[clave]
+
+    def guardar(self, clave, valor):
+        with self._candado:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._candado:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class BackendSQLite:
+    """Caché compartida entre workers en un archivo SQLite aparte (valores con pickle)."""
+
+    def __init__(self, ruta, max_entradas=1024):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self._local = threading.local()
+        conn = self._conexion()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache (
+            clave TEXT PRIMARY KEY,
+            valor BLOB NOT NULL,
+            usado REAL NOT NULL
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_usado ON cache (usado)')
+        conn.commit()
+
+    def _conexion(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=5)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            self._local.conn = conn
+        return conn
+
+    def obtener(self, clave):
+        conn = self._conexion()
+        fila = conn.execute('SELECT valor FROM cache WHERE clave = ?', (repr(clave),)).fetchone()
+        if fila is None:
+            return None
+        return pickle.loads(fila[0])
+
+    def guardar(self, clave, valor):
+        conn = self._conexion()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO cache (clave, valor, usado) VALUES (?, ?, ?)',
+                         (repr(clave), pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), time.time()))
+            conn.execute('DELETE FROM cache WHERE clave IN (SELECT clave FROM cache '
+                         'ORDER BY usado DESC LIMIT -1 OFFSET ?)', (self.max_entradas,))
+
+    def limpiar(self):
+        conn = self._conexion()
+        with conn:
+            conn.execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._conexion().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+# ==================== CACHÉ DE RESULTADOS ====================
+
+class CacheResultados:
+    """Caché con contadores de aciertos y fallos sobre un backend intercambiable."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        valor = self.backend.obtener(clave)
+        with self._candado:
+            if valor is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor):
+        self.backend.guardar(clave, valor)
+
+    def limpiar(self):
+        self.backend.limpiar()
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {
+            'backend': type(self.backend).__name__,
+            'entradas': len(self.backend),
+            'max_entradas': self.backend.max_entradas,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / total if total else None,
+        }
+
+
+_caches_candado = threading.Lock()
+
+
+def crear_backend(config):
+    """Backend según Config.CACHE_RESULTADOS_BACKEND ('memoria' o 'sqlite')."""
+    tipo = config.get('CACHE_RESULTADOS_BACKEND', 'memoria')
+    max_entradas = config.get('CACHE_RESULTADOS_MAX', 256)
+    if tipo == 'memoria':
+        return BackendMemoria(max_entradas)
+    if tipo == 'sqlite':
+        ruta = config.get('CACHE_RESULTADOS_RUTA') or config['DATABASE_PATH'] + '.cache'
+        return BackendSQLite(ruta, max_entradas)
+    raise ValueError(f'Backend de caché desconocido: {tipo}')
+
+
+def get_cache(nombre='resultados'):
+    """Caché de la aplicación actual en este proceso (se recrea tras un fork de gunicorn)."""
+    caches = current_app.extensions['caches']
+    clave = (nombre, os.getpid())
+    if clave not in caches:
+        with _caches_candado:
+            if clave not in caches:
+                caches[clave] = CacheResultados(crear_backend(current_app.config))
+    return caches[clave]
+
+
+def init_app(app):
+    """Cachés propias de la aplicación (cada create_app() tiene las suyas)."""
+    app.extensions['caches'] = {}
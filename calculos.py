@@ -0,0 +1,196 @@
+"""Indicadores de la página de resultados a partir del resumen de un proyecto.
+
+El resultado es un diccionario de datos simples (sin filas de sqlite3) para
+poder guardarlo en la caché de resultados con la clave (proyecto, versión).
+
+Además se guarda por proyecto el último EstadoFlujos (flujos, factores de
+descuento, VAN y TIR). Si la versión siguiente solo cambia costos, gastos o
+salarios, cada año de operación se desplaza en la misma cantidad: los flujos
+y el VAN se actualizan con ese delta y solo la TIR se vuelve a resolver,
+partiendo de la raíz anterior.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+import cache
+import metricas
+from consultas import cargar_resumen
+from finanzas import (ResultadoTIR, _cambios_signo, calcular_bc, calcular_pri, calcular_van,
+                      construir_flujos, divisores_descuento, resolver_tir)
+import sensibilidad
+
+# Se incrementa al cambiar la forma de los resultados, para no leer de la
+# caché (que puede ser persistente) entradas con la forma anterior
+FORMATO_RESULTADOS = 2
+
+# Cambios seguidos aplicados como delta antes de recalcular desde cero (acota
+# el error de redondeo acumulado)
+MAX_PASOS_INCREMENTALES = 50
+
+
+# ==================== RECÁLCULO INCREMENTAL ====================
+
+@dataclass(frozen=True)
+class EstadoFlujos:
+    """Flujos e indicadores de un proyecto, base para aplicar el próximo cambio como delta."""
+
+    parametros: dict            # argumentos de construir_flujos()
+    tasa: float
+    flujos: np.ndarray
+    anualidad: float            # suma de 1 / (1 + tasa) ** i para i = 1..n
+    van: float
+    tir: ResultadoTIR
+    pasos: int = 0              # deltas aplicados desde el último cálculo completo
+
+
+def _egreso_anual(parametros):
+    """Costos, gastos y salarios que construir_flujos() resta a cada año de operación."""
+    anos = parametros['anos']
+    costos, gastos, salarios = parametros['costos'], parametros['gastos'], parametros['salarios']
+    return ((costos / anos if costos > 0 else 0.0) + (gastos / anos if gastos > 0 else 0.0)
+            + (salarios * 12 if salarios > 0 else 0.0))
+
+
+def _solo_cambian_egresos(anterior, parametros):
+    """True si los parámetros difieren a lo sumo en costos, gastos y salarios."""
+    if any(anterior[clave] != parametros[clave] for clave in ('inversion', 'precio', 'anos')):
+        return False
+    ventas, ventas_antes = parametros['ventas_anos'], anterior['ventas_anos']
+    if ventas is None or ventas_antes is None:
+        return ventas is None and ventas_antes is None
+    return np.array_equal(ventas, ventas_antes)
+
+
+def calcular_estado(parametros, tasa, anterior=None):
+    """EstadoFlujos del proyecto, aplicando un delta sobre `anterior` cuando se puede.
+
+    Si solo cambiaron costos, gastos o salarios, los años 1..n se desplazan en
+    delta y el VAN en delta × anualidad; la TIR se resuelve con Newton desde
+    la raíz anterior. En otro caso (o cada MAX_PASOS_INCREMENTALES cambios)
+    todo se calcula desde cero.
+    """
+    if (anterior is not None and anterior.tasa == tasa and anterior.pasos < MAX_PASOS_INCREMENTALES
+            and _solo_cambian_egresos(anterior.parametros, parametros)):
+        # Sin ventas los años de operación valen cero aunque cambien los egresos
+        delta = 0.0
+        if parametros['ventas_anos'] is not None:
+            delta = _egreso_anual(anterior.parametros) - _egreso_anual(parametros)
+        if delta == 0:
+            return EstadoFlujos(parametros, tasa, anterior.flujos, anterior.anualidad,
+                                anterior.van, anterior.tir, anterior.pasos)
+        flujos = anterior.flujos.copy()
+        flujos[1:] += delta
+        # Con varias TIR se parte de la semilla por defecto, para dar la misma raíz
+        # que un cálculo desde cero (y que la exportación)
+        semilla = 0.1
+        if anterior.tir.tasa is not None and _cambios_signo(flujos) <= 1:
+            semilla = anterior.tir.tasa
+        return EstadoFlujos(parametros, tasa, flujos, anterior.anualidad,
+                            anterior.van + delta * anterior.anualidad,
+                            resolver_tir(flujos, semilla=semilla), anterior.pasos + 1)
+
+    flujos = construir_flujos(**parametros)
+    anualidad = float((1 / divisores_descuento(tasa, flujos.size))[1:].sum())
+    return EstadoFlujos(parametros, tasa, flujos, anualidad, calcular_van(tasa, flujos), resolver_tir(flujos))
+
+
+# ==================== RESULTADOS ====================
+
+def calcular_resultados(resumen, anterior=None):
+    """VAN, TIR, B/C, PRI, flujos y sensibilidad del proyecto.
+
+    Devuelve (resultados, EstadoFlujos); `anterior` es el estado guardado de
+    una versión previa del mismo proyecto, si lo hay.
+    """
+    proyecto = dict(resumen.proyecto)
+    resultados = {
+        'proyecto': proyecto,
+        'totales': resumen.totales,
+        'calculos': {}
+    }
+    
+    # Inversión inicial
+    inversion_inicial = resumen.inversion_inicial
+    
+    # Flujos de caja del horizonte del proyecto (año 0: inversión inicial negativa)
+    parametros = resumen.parametros_flujo()
+    horizonte = parametros['anos']
+    tasa_descuento = proyecto['tasa_descuento']
+    estado = calcular_estado(parametros, tasa_descuento, anterior)
+    flujos_anuales = estado.flujos.tolist()
+    resultados['calculos']['horizonte'] = horizonte
+    
+    # Ingresos y egresos de operación de cada año (años 1..horizonte)
+    ventas_anos = parametros['ventas_anos'] if parametros['ventas_anos'] is not None else [0] * horizonte
+    resultados['calculos']['ingresos'] = [float(v) * parametros['precio'] for v in ventas_anos]
+    resultados['calculos']['egresos_anuales'] = (
+        (resumen.costos + resumen.gastos) / horizonte + resumen.salarios * 12
+    )
+    
+    # Realizar cálculos financieros
+    try:
+        # VAN
+        van = estado.van
+        resultados['calculos']['van'] = van
+        
+        # TIR (Newton, con Brent y bisección como respaldo)
+        diagnostico_tir = estado.tir
+        tir = diagnostico_tir.tasa
+        resultados['calculos']['tir'] = tir * 100 if tir else 0
+        resultados['calculos']['tir_diagnostico'] = diagnostico_tir
+        
+        # B/C
+        bc = calcular_bc(flujos_anuales, tasa_descuento)
+        resultados['calculos']['bc'] = bc
+        
+        # PRI
+        pri = calcular_pri(flujos_anuales)
+        resultados['calculos']['pri'] = pri
+        
+        # Otros indicadores
+        resultados['calculos']['flujos'] = flujos_anuales
+        resultados['calculos']['inversion_total'] = (
+            inversion_inicial + 
+            resultados['totales']['costos'] + 
+            resultados['totales']['gastos'] + 
+            (resultados['totales']['salarios'] * 12 * horizonte) +  # salarios de todo el horizonte
+            resultados['totales']['materiales']
+        )
+        
+        # Rentabilidad
+        if inversion_inicial > 0:
+            resultados['calculos']['rentabilidad'] = (van / inversion_inicial) * 100
+        else:
+            resultados['calculos']['rentabilidad'] = 0
+        
+        # Sensibilidad (tabla de tasas, mallas y tornado) en una sola pasada vectorizada
+        resultados['sensibilidad'] = sensibilidad.analizar(resumen, flujos_anuales)
+            
+    except Exception as e:
+        resultados['calculos']['error'] = f"Error en cálculos: {str(e)}"
+        resultados['calculos']['van'] = 0
+        resultados['calculos']['tir'] = 0
+        resultados['calculos']['bc'] = 0
+        resultados['calculos']['pri'] = 0
+        resultados['calculos']['flujos'] = flujos_anuales
+        resultados['calculos']['inversion_total'] = 0
+        resultados['calculos']['rentabilidad'] = 0
+    
+    return resultados, estado
+
+
+def obtener_resultados(conn, clave):
+    """Resultados de la versión `clave` (VersionProyecto) desde la caché, o calculados y guardados."""
+    cache_resultados = cache.get_cache()
+    resultados = cache_resultados.obtener((clave.id, clave.version, FORMATO_RESULTADOS))
+    if resultados is None:
+        resumen = cargar_resumen(conn, clave.id)
+        # Estado de la última versión calculada de este proyecto (clave sin versión)
+        estados = cache.get_cache('flujos')
+        clave_estado = ('flujos', resumen.id, FORMATO_RESULTADOS)
+        with metricas.medir('calculo'):
+            resultados, estado = calcular_resultados(resumen, estados.obtener(clave_estado))
+        estados.guardar(clave_estado, estado)
+        cache_resultados.guardar((resumen.id, resumen.version, FORMATO_RESULTADOS), resultados)
+    return resultados
@@ -0,0 +1,67 @@
+"""Peticiones condicionales (ETag / Last-Modified) para las páginas del proyecto.
+
+El ETag se deriva de la versión de datos del proyecto que mantienen los
+triggers de proyecto_totales y que ya se leyó al validar el proyecto de la
+URL, así que comprobar si la copia del navegador sigue vigente no cuesta
+ninguna consulta más: si coincide se responde 304 sin cargar datos, sin
+cálculos y sin renderizar la plantilla.
+"""
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, g, make_response, request, session
+
+
+def etag_proyecto(clave):
+    """ETag de la página actual para la versión de datos `clave`."""
+    partes = (current_app.config.get('ETAG_VERSION', ''), request.endpoint,
+              request.full_path, clave.id, clave.version)
+    return hashlib.blake2b(repr(partes).encode(), digest_size=12).hexdigest()
+
+
+def _vigente(etag, modificado):
+    """¿La copia del cliente sigue vigente? If-None-Match manda sobre If-Modified-Since."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and modificado is not None:
+        return modificado <= request.if_modified_since
+    return False
+
+
+def respuesta_condicional(vista):
+    """Decorador para rutas GET de lectura: responde 304 si los datos no cambiaron.
+
+    Las respuestas con mensajes flash pendientes no se validan ni llevan
+    ETag, porque su cuerpo depende de la sesión y no solo de los datos.
+    """
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        if request.method != 'GET' or '_flashes' in session:
+            return vista(*args, **kwargs)
+
+        clave = g.get('version_proyecto')
+        if clave is None:
+            return vista(*args, **kwargs)
+
+        etag = etag_proyecto(clave)
+        modificado = None
+        if clave.modificado is not None:
+            modificado = datetime.fromtimestamp(clave.modificado, timezone.utc)
+
+        if _vigente(etag, modificado):
+            respuesta = make_response('', 304)
+        else:
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200:
+                return respuesta
+
+        respuesta.set_etag(etag, weak=True)
+        if modificado is not None:
+            respuesta.last_modified = modificado
+        # El navegador guarda la página pero la revalida en cada visita
+        respuesta.cache_control.private = True
+        respuesta.cache_control.no_cache = True
+        return respuesta
+
+    return envoltura
@@ -10,9 +10,64 @@ class Config:
     
     # Configuración de base de datos SQLite
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-    DATABASE_PATH = os.path.join(BASE_DIR, 'database', 'proyecto_pep.db')
+    # En Railway/Docker apuntar DATABASE_PATH a un volumen persistente
+    DATABASE_PATH = os.getenv('DATABASE_PATH', os.path.join(BASE_DIR, 'database', 'proyecto_pep.db'))
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool de conexiones (uno por worker de gunicorn)
+    DB_POOL_TAMANO = int(os.getenv('DB_POOL_TAMANO', 5))
+    DB_POOL_ESPERA = float(os.getenv('DB_POOL_ESPERA', 10))  # segundos
+    
+    # Ajustes de almacenamiento de SQLite
+    DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')     # WAL: los lectores no se bloquean al escribir
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')    # NORMAL es seguro con WAL
+    DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', -20000))   # negativo = KiB (unos 20 MB)
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 268435456))  # 256 MB
+    DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', 5000))  # milisegundos
+    # PRAGMA adicionales que se aplican al abrir cada conexión
+    DB_PRAGMAS = ('foreign_keys = ON',)
+    
+    # Proyectos por página en el listado de inicio
+    PROYECTOS_POR_PAGINA = int(os.getenv('PROYECTOS_POR_PAGINA', 20))
+    
+    # Tamaño máximo de las peticiones (archivos de importación incluidos)
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+    
+    # Máximo de operaciones por petición en /api/proyectos/<id>/partidas/lote
+    LOTE_MAX_OPERACIONES = int(os.getenv('LOTE_MAX_OPERACIONES', 5000))
+    
+    # Máximo de periodos de una serie de ventas en /api/proyectos/<id>/ventas/<granularidad>
+    VENTAS_MAX_PERIODOS = int(os.getenv('VENTAS_MAX_PERIODOS', 1000))
+    
+    # Máximo de escenarios por petición en /api/escenarios
+    ESCENARIOS_MAX = int(os.getenv('ESCENARIOS_MAX', 10000))
+    
+    # Simulación de Monte Carlo (/api/montecarlo)
+    MONTECARLO_SIMULACIONES = int(os.getenv('MONTECARLO_SIMULACIONES', 100000))
+    MONTECARLO_MAX_SIMULACIONES = int(os.getenv('MONTECARLO_MAX_SIMULACIONES', 1000000))
+    MONTECARLO_PROCESOS = int(os.getenv('MONTECARLO_PROCESOS', 1))
+    MONTECARLO_MAX_PROCESOS = int(os.getenv('MONTECARLO_MAX_PROCESOS', 4))
+    
+    # Caché de resultados de /resultados/calculos-financieros por (proyecto, versión)
+    CACHE_RESULTADOS_BACKEND = os.getenv('CACHE_RESULTADOS_BACKEND', 'memoria')  # 'memoria' o 'sqlite'
+    CACHE_RESULTADOS_MAX = int(os.getenv('CACHE_RESULTADOS_MAX', 256))
+    CACHE_RESULTADOS_RUTA = os.getenv('CACHE_RESULTADOS_RUTA')  # por defecto DATABASE_PATH + '.cache'
+    
+    # Se incluye en los ETag de las páginas: cambiarlo al desplegar plantillas nuevas
+    ETAG_VERSION = os.getenv('ETAG_VERSION', '1')
+    
+    # Instrumentación por petición: cabecera Server-Timing y /metrics (Prometheus)
+    METRICAS = os.getenv('METRICAS', '0') == '1'
+    
+    # Perfilado de peticiones (cProfile + pilas muestreadas) con la cabecera o por muestreo
+    PERFILADO = os.getenv('PERFILADO', '0') == '1'
+    PERFILADO_CABECERA = os.getenv('PERFILADO_CABECERA', 'X-Perfilar')
+    PERFILADO_CLAVE = os.getenv('PERFILADO_CLAVE')  # si se define, la cabecera debe traer este valor
+    PERFILADO_MUESTREO = float(os.getenv('PERFILADO_MUESTREO', 0))  # fracción de peticiones (0.01 = 1 %)
+    PERFILADO_INTERVALO = float(os.getenv('PERFILADO_INTERVALO', 0.005))  # segundos entre muestras de pila
+    PERFILADO_DIRECTORIO = os.getenv('PERFILADO_DIRECTORIO')  # por defecto <carpeta de la base>/perfiles
+    PERFILADO_MAX_PERFILES = int(os.getenv('PERFILADO_MAX_PERFILES', 200))
+    
     # Configuraciones de la aplicación
     DEBUG = os.getenv('FLASK_ENV') == 'development'
\ No newline at end of file
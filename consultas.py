@@ -0,0 +1,421 @@
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+from horizonte import ANOS_PROYECCION
+
+
+# Nombre de cada periodo por granularidad de ventas (periodo 1, 2, ...), en el
+# orden en que se muestran. Son también los campos de los formularios y de la API;
+# los periodos siguientes se guardan igual y se nombran periodoN.
+PERIODOS_VENTAS = {
+    'dias': ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo'),
+    'semanas': ('semana1', 'semana2', 'semana3', 'semana4'),
+    'meses': ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+              'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'),
+    'anos': ('año1', 'año2', 'año3', 'año4', 'año5', 'año6', 'año7'),
+}
+
+# Totales por categoría: (tabla, columna sumada)
+COLUMNAS_TOTALES = {
+    'costos': ('costos', 'valor'),
+    'gastos': ('gastos', 'valor'),
+    'salarios': ('personal', 'salario_mensual'),
+    'materiales': ('materiales', 'valor'),
+}
+
+
+@dataclass(frozen=True)
+class ResumenProyecto:
+    """Proyecto con sus totales por categoría y sus ventas registradas."""
+
+    proyecto: dict
+    version: int = 0
+    costos: float = 0
+    gastos: float = 0
+    salarios: float = 0
+    materiales: float = 0
+    # granularidad -> unidades de los periodos 1..n (solo las registradas)
+    ventas: dict = field(default_factory=dict)
+
+    @property
+    def id(self):
+        return self.proyecto['id']
+
+    @property
+    def inversion_inicial(self):
+        return self.proyecto['valor_inversion'] if self.proyecto['tiene_inversion'] == 1 else 0
+
+    def ventas_por_periodo(self, granularidad):
+        """Ventas como {nombre del periodo: unidades} o None si no hay registradas."""
+        serie = self.ventas.get(granularidad)
+        if serie is None:
+            return None
+        nombres = nombres_periodos(granularidad, max(len(serie), len(PERIODOS_VENTAS[granularidad])))
+        return dict(zip(nombres, list(serie) + [0] * (len(nombres) - len(serie))))
+
+    @property
+    def ventas_dias(self):
+        return self.ventas_por_periodo('dias')
+
+    @property
+    def ventas_semanas(self):
+        return self.ventas_por_periodo('semanas')
+
+    @property
+    def ventas_meses(self):
+        return self.ventas_por_periodo('meses')
+
+    @property
+    def ventas_anos(self):
+        return self.ventas_por_periodo('anos')
+
+    @property
+    def horizonte(self):
+        return self.proyecto.get('horizonte') or ANOS_PROYECCION
+
+    @property
+    def granularidad_ventas(self):
+        return self.proyecto.get('granularidad_ventas') or 'anos'
+
+    def parametros_flujo(self):
+        """Argumentos de finanzas.construir_flujos() para este proyecto.
+
+        Las ventas de la granularidad elegida en el proyecto se pasan a años
+        del horizonte con finanzas.ventas_anuales().
+        """
+        ventas = None
+        serie = self.ventas.get(self.granularidad_ventas)
+        if serie is not None:
+            from finanzas import ventas_anuales  # NumPy solo al calcular
+            ventas = ventas_anuales(serie, self.granularidad_ventas, self.horizonte)
+        return {
+            'inversion': self.inversion_inicial,
+            'precio': self.proyecto['precio_producto'] or 0,
+            'ventas_anos': ventas,
+            'costos': self.costos,
+            'gastos': self.gastos,
+            'salarios': self.salarios,
+            'anos': self.horizonte,
+        }
+
+    @property
+    def totales(self):
+        return {
+            'costos': self.costos,
+            'gastos': self.gastos,
+            'salarios': self.salarios,
+            'materiales': self.materiales,
+        }
+
+
+def nombres_periodos(granularidad, cantidad):
+    """Nombres de los periodos 1..cantidad de una granularidad."""
+    nombres = PERIODOS_VENTAS[granularidad]
+    return [nombres[i] if i < len(nombres) else f'periodo{i + 1}' for i in range(cantidad)]
+
+
+def _sql_resumen(filtro):
+    """Arma la consulta del proyecto con sus totales materializados (LEFT JOIN)."""
+    columnas = ['p.*', 'COALESCE(t.version, 0) AS version_datos']
+    for clave in COLUMNAS_TOTALES:
+        columnas.append(f'COALESCE(t.{clave}, 0) AS total_{clave}')
+
+    return (f'SELECT {", ".join(columnas)} '
+            f'FROM (SELECT * FROM proyectos {filtro}) AS p '
+            'LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id')
+
+
+_SQL_ULTIMO = _sql_resumen('ORDER BY id DESC LIMIT 1')
+_SQL_POR_ID = _sql_resumen('WHERE id = ?')
+_SQL_DESDE_ID = _sql_resumen('WHERE id > ? ORDER BY id LIMIT ?')
+
+# Recorrido por rango de la clave primaria (proyecto_id, granularidad, periodo)
+_SQL_VENTAS = ('SELECT proyecto_id, granularidad, periodo, unidades FROM ventas '
+               'WHERE proyecto_id BETWEEN ? AND ? ORDER BY proyecto_id, granularidad, periodo')
+
+
+def _leer_ventas(conn, desde, hasta):
+    """{proyecto_id: {granularidad: unidades por periodo}} de los proyectos desde..hasta.
+
+    Los periodos sin fila (huecos en la serie) valen 0.
+    """
+    ventas = {}
+    for proyecto_id, granularidad, periodo, unidades in conn.execute(_SQL_VENTAS, (desde, hasta)):
+        serie = ventas.setdefault(proyecto_id, {}).setdefault(granularidad, [])
+        serie.extend([0] * (periodo - len(serie)))
+        serie[periodo - 1] = unidades
+    return {proyecto_id: {granularidad: tuple(serie) for granularidad, serie in series.items()}
+            for proyecto_id, series in ventas.items()}
+
+
+def _resumen_de_fila(fila, ventas):
+    datos = dict(fila)
+    version = datos.pop('version_datos')
+    totales = {clave: datos.pop(f'total_{clave}') for clave in COLUMNAS_TOTALES}
+    return ResumenProyecto(proyecto=datos, version=version, ventas=ventas.get(datos['id'], {}),
+                           **totales)
+
+
+def cargar_resumen(conn, proyecto_id=None):
+    """Carga el proyecto con sus totales y, en un recorrido por rango, sus ventas.
+
+    Sin proyecto_id se usa el último proyecto creado. Devuelve None si no existe.
+    """
+    if proyecto_id is None:
+        fila = conn.execute(_SQL_ULTIMO).fetchone()
+    else:
+        fila = conn.execute(_SQL_POR_ID, (proyecto_id,)).fetchone()
+    if fila is None:
+        return None
+    return _resumen_de_fila(fila, _leer_ventas(conn, fila['id'], fila['id']))
+
+
+def iterar_resumenes(conn, tamano_lote=500):
+    """Resúmenes de todos los proyectos por lotes (listas), paginando por id."""
+    ultimo = 0
+    while True:
+        filas = conn.execute(_SQL_DESDE_ID, (ultimo, tamano_lote)).fetchall()
+        if not filas:
+            return
+        ids = [fila['id'] for fila in filas]
+        ventas = _leer_ventas(conn, min(ids), max(ids))
+        lote = sorted((_resumen_de_fila(fila, ventas) for fila in filas), key=lambda r: r.id)
+        yield lote
+        ultimo = lote[-1].id
+
+
+def guardar_ventas(conn, proyecto_id, granularidad, unidades, reemplazar=False):
+    """Guarda las unidades de los periodos 1..n con UPSERT (sin commit).
+
+    Con reemplazar=True se borran además los periodos posteriores a n, de modo
+    que la serie queda exactamente como `unidades`. Los periodos cuyo valor no
+    cambia no se reescriben (ni cambian la versión del proyecto).
+    """
+    conn.executemany('INSERT INTO ventas (proyecto_id, granularidad, periodo, unidades) '
+                     'VALUES (?, ?, ?, ?) '
+                     'ON CONFLICT (proyecto_id, granularidad, periodo) DO UPDATE '
+                     'SET unidades = excluded.unidades WHERE unidades IS NOT excluded.unidades',
+                     [(proyecto_id, granularidad, periodo, valor)
+                      for periodo, valor in enumerate(unidades, start=1)])
+    if reemplazar:
+        conn.execute('DELETE FROM ventas WHERE proyecto_id = ? AND granularidad = ? AND periodo > ?',
+                     (proyecto_id, granularidad, len(unidades)))
+
+
+def leer_totales(conn, proyecto_id):
+    """Totales materializados y versión de datos del proyecto (una búsqueda por clave primaria)."""
+    columnas = ', '.join(f'COALESCE(t.{clave}, 0) AS {clave}' for clave in COLUMNAS_TOTALES)
+    fila = conn.execute(f'SELECT {columnas}, COALESCE(t.version, 0) AS version FROM proyectos AS p '
+                        f'LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id WHERE p.id = ?',
+                        (proyecto_id,)).fetchone()
+    return dict(fila) if fila else None
+
+
+TABLAS_PROYECTO = ('costos', 'gastos', 'personal', 'materiales', 'ventas')
+
+
+def contar_filas(conn, proyecto_id):
+    """Filas de cada tabla del proyecto (COUNT por el índice de proyecto_id)."""
+    columnas = ', '.join(f'(SELECT COUNT(*) FROM {tabla} WHERE proyecto_id = :id) AS {tabla}'
+                         for tabla in TABLAS_PROYECTO)
+    return dict(conn.execute(f'SELECT {columnas}', {'id': proyecto_id}).fetchone())
+
+
+class VersionProyecto(NamedTuple):
+    """Identidad de los datos de un proyecto: id, versión y última modificación (epoch)."""
+
+    id: int
+    version: int
+    modificado: Optional[int]
+
+
+def version_proyecto(conn, proyecto_id=None):
+    """VersionProyecto del proyecto con una sola búsqueda por clave primaria, o None."""
+    sql = ('SELECT p.id, COALESCE(t.version, 0), t.modificado FROM proyectos AS p '
+           'LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id ')
+    if proyecto_id is None:
+        fila = conn.execute(sql + 'ORDER BY p.id DESC LIMIT 1').fetchone()
+    else:
+        fila = conn.execute(sql + 'WHERE p.id = ?', (proyecto_id,)).fetchone()
+    return VersionProyecto(*fila) if fila else None
+
+
+def listar_proyectos(conn, antes=None, limite=20):
+    """Página de proyectos del más nuevo al más viejo, paginada por clave.
+
+    Devuelve (filas, id para pedir la página siguiente o None). Cada página
+    cuesta un recorrido de `limite` filas por la clave primaria, sin OFFSET.
+    """
+    sql = ('SELECT p.id, p.nombre, p.tipo_actividad, p.nombre_producto, p.fecha_creacion, '
+           + ', '.join(f'COALESCE(t.{clave}, 0) AS total_{clave}' for clave in COLUMNAS_TOTALES)
+           + ' FROM proyectos AS p LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id ')
+    if antes is None:
+        filas = conn.execute(sql + 'ORDER BY p.id DESC LIMIT ?', (limite + 1,)).fetchall()
+    else:
+        filas = conn.execute(sql + 'WHERE p.id < ? ORDER BY p.id DESC LIMIT ?',
+                             (antes, limite + 1)).fetchall()
+    siguiente = filas[limite - 1]['id'] if len(filas) > limite else None
+    return filas[:limite], siguiente
+
+
+# ==================== TOTALES MATERIALIZADOS ====================
+
+# Hora actual en segundos desde epoch (resolución de Last-Modified)
+AHORA = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+def _triggers_totales():
+    """Triggers que mantienen proyecto_totales al día en cada INSERT/UPDATE/DELETE.
+
+    Cada escritura sobre el proyecto o sus tablas incrementa además la
+    columna version, que sirve de clave para la caché de resultados y de
+    ETag, y guarda en modificado la hora de la escritura (Last-Modified).
+    """
+    # ON CONFLICT DO NOTHING y no OR IGNORE: dentro de un UPSERT (ventas) la
+    # política OR del trigger se reemplaza por la de la sentencia externa
+    crear_fila = ('INSERT INTO proyecto_totales (proyecto_id, modificado) '
+                  f'SELECT {{ref}}.proyecto_id, {AHORA} WHERE {{ref}}.proyecto_id IS NOT NULL '
+                  'ON CONFLICT DO NOTHING;')
+    sumar = ('UPDATE proyecto_totales SET {clave} = {clave} {signo} {ref}.{columna}, '
+             f'version = version + 1, modificado = {AHORA} WHERE proyecto_id = {{ref}}.proyecto_id;')
+    nueva_version = (f'UPDATE proyecto_totales SET version = version + 1, modificado = {AHORA} '
+                     'WHERE proyecto_id = {ref}.proyecto_id;')
+
+    triggers = {
+        'trg_proyectos_totales_insert': f'''
+            CREATE TRIGGER trg_proyectos_totales_insert AFTER INSERT ON proyectos
+            BEGIN
+                INSERT OR IGNORE INTO proyecto_totales (proyecto_id, modificado) VALUES (NEW.id, {AHORA});
+            END
+        ''',
+        'trg_proyectos_version_update': f'''
+            CREATE TRIGGER trg_proyectos_version_update AFTER UPDATE ON proyectos
+            BEGIN
+                INSERT OR IGNORE INTO proyecto_totales (proyecto_id) VALUES (NEW.id);
+                UPDATE proyecto_totales SET version = version + 1, modificado = {AHORA}
+                WHERE proyecto_id = NEW.id;
+            END
+        ''',
+    }
+    for evento, refs in (('INSERT', ('NEW',)), ('UPDATE', ('OLD', 'NEW')), ('DELETE', ('OLD',))):
+        cuerpo = '\n'.join(crear_fila.format(ref=ref) + ' ' + nueva_version.format(ref=ref)
+                           for ref in refs)
+        triggers[f'trg_ventas_version_{evento.lower()}'] = f'''
+            CREATE TRIGGER trg_ventas_version_{evento.lower()} AFTER {evento} ON ventas
+            BEGIN
+                {cuerpo}
+            END
+        '''
+    for clave, (tabla, columna) in COLUMNAS_TOTALES.items():
+        nuevo = dict(clave=clave, columna=columna, ref='NEW', signo='+')
+        viejo = dict(clave=clave, columna=columna, ref='OLD', signo='-')
+        triggers[f'trg_{tabla}_totales_insert'] = f'''
+            CREATE TRIGGER trg_{tabla}_totales_insert AFTER INSERT ON {tabla}
+            BEGIN
+                {crear_fila.format(**nuevo)}
+                {sumar.format(**nuevo)}
+            END
+        '''
+        triggers[f'trg_{tabla}_totales_update'] = f'''
+            CREATE TRIGGER trg_{tabla}_totales_update AFTER UPDATE OF {columna}, proyecto_id ON {tabla}
+            BEGIN
+                {crear_fila.format(**nuevo)}
+                {sumar.format(**viejo)}
+                {sumar.format(**nuevo)}
+            END
+        '''
+        # Cualquier cambio (también de nombre o perfil) cambia la versión
+        triggers[f'trg_{tabla}_version_update'] = f'''
+            CREATE TRIGGER trg_{tabla}_version_update AFTER UPDATE ON {tabla}
+            BEGIN
+                {nueva_version.format(ref='OLD')}
+                {nueva_version.format(ref='NEW')}
+            END
+        '''
+        triggers[f'trg_{tabla}_totales_delete'] = f'''
+            CREATE TRIGGER trg_{tabla}_totales_delete AFTER DELETE ON {tabla}
+            BEGIN
+                {sumar.format(**viejo)}
+            END
+        '''
+    return triggers
+
+
+def crear_totales_materializados(conn):
+    """Crea la tabla proyecto_totales y la rellena si es nueva.
+
+    Los triggers que la mantienen los crea una migración (crear_triggers_totales).
+    """
+    existia = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                           "AND name = 'proyecto_totales'").fetchone()
+
+    columnas = ', '.join(f'{clave} REAL NOT NULL DEFAULT 0' for clave in COLUMNAS_TOTALES)
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS proyecto_totales (
+        proyecto_id INTEGER PRIMARY KEY,
+        {columnas},
+        version INTEGER NOT NULL DEFAULT 0,
+        modificado INTEGER,
+        FOREIGN KEY (proyecto_id) REFERENCES proyectos (id)
+    )
+    ''')
+
+    if not existia:
+        reconstruir_totales(conn)
+
+
+def crear_triggers_totales(conn):
+    """(Re)crea los triggers de proyecto_totales con su definición actual.
+
+    Solo se llama desde migraciones: un cambio en _triggers_totales() necesita
+    una migración nueva que vuelva a llamarla.
+    """
+    for nombre, sql in _triggers_totales().items():
+        conn.execute(f'DROP TRIGGER IF EXISTS {nombre}')
+        conn.execute(sql)
+
+
+# Ids por sentencia al reconstruir proyectos sueltos (SQLite limita los parámetros)
+LOTE_IDS = 500
+
+
+def reconstruir_totales(conn, proyecto_ids=None):
+    """Recalcula proyecto_totales con SUM sobre cada tabla (todos o solo `proyecto_ids`).
+
+    Con `proyecto_ids` se reconstruye por lotes de LOTE_IDS proyectos.
+    """
+    claves = ', '.join(COLUMNAS_TOTALES)
+    sumas = ', '.join(f'(SELECT COALESCE(SUM({columna}), 0) FROM {tabla} WHERE proyecto_id = p.id)'
+                      for tabla, columna in COLUMNAS_TOTALES.values())
+    # Se conserva la versión de cada proyecto (y se incrementa: los totales pueden cambiar)
+    sql = (f'INSERT OR REPLACE INTO proyecto_totales (proyecto_id, {claves}, version, modificado) '
+           f'SELECT p.id, {sumas}, COALESCE(t.version, 0) + 1, {AHORA} FROM proyectos AS p '
+           f'LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id')
+    if proyecto_ids is None:
+        conn.execute(sql)
+        return
+    proyecto_ids = list(proyecto_ids)
+    for inicio in range(0, len(proyecto_ids), LOTE_IDS):
+        lote = proyecto_ids[inicio:inicio + LOTE_IDS]
+        conn.execute(f'{sql} WHERE p.id IN ({", ".join("?" * len(lote))})', lote)
+
+
+def verificar_totales(conn, tolerancia=1e-6):
+    """Compara proyecto_totales con los SUM reales y devuelve las diferencias.
+
+    Los triggers suman y restan valores REAL, así que tras muchas escrituras
+    los totales pueden alejarse del SUM en el último decimal; con
+    tolerancia=0 se detecta también esa deriva.
+    """
+    diferencias = []
+    for clave, (tabla, columna) in COLUMNAS_TOTALES.items():
+        filas = conn.execute(f'''
+            SELECT p.id AS proyecto_id, COALESCE(t.{clave}, 0) AS guardado,
+                   (SELECT COALESCE(SUM({columna}), 0) FROM {tabla} WHERE proyecto_id = p.id) AS real
+            FROM proyectos AS p
+            LEFT JOIN proyecto_totales AS t ON t.proyecto_id = p.id
+        ''').fetchall()
+        for fila in filas:
+            if abs(fila['guardado'] - fila['real']) > tolerancia:
+                diferencias.append({'proyecto_id': fila['proyecto_id'], 'categoria': clave,
+                                    'guardado': fila['guardado'], 'real': fila['real']})
+    return diferencias
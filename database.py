@@ -0,0 +1,287 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g, has_app_context
+
+import metricas
+from config import Config
+
+
+# ==================== CONEXIONES AGRUPADAS ====================
+
+class ConexionAgrupada(sqlite3.Connection):
+    """Conexión SQLite que al cerrarse vuelve al pool en lugar de destruirse."""
+
+    pool = None
+    liberada = False
+
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        # Si la conexión está ligada a la petición actual, la desligamos
+        if has_app_context() and g.get('_db') is self:
+            g.pop('_db')
+        self.pool.liberar(self)
+
+    def cerrar_definitivamente(self):
+        """Cierra de verdad la conexión (se usa al descartarla del pool)."""
+        super().close()
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que suma a la petición el tiempo de ejecutar y leer cada consulta."""
+
+    def execute(self, *args):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            metricas.registrar('sql', time.perf_counter() - inicio, consultas=1)
+
+    def executemany(self, *args):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            metricas.registrar('sql', time.perf_counter() - inicio, consultas=1)
+
+    def _leer(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            metricas.registrar('sql', time.perf_counter() - inicio)
+
+    def fetchone(self):
+        return self._leer(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._leer(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._leer(super().fetchall)
+
+    def __next__(self):
+        return self._leer(super().__next__)
+
+
+class ConexionInstrumentada(ConexionAgrupada):
+    """Conexión del pool cuyos cursores miden las consultas (Config.METRICAS)."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    # Connection.execute crea su cursor sin pasar por cursor(): se redirige aquí
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+
+class PoolConexiones:
+    """Pool acotado de conexiones SQLite de larga vida, uno por worker."""
+
+    def __init__(self, ruta, tamano=5, espera=10.0, pragmas=None, timeout=5.0,
+                 factory=ConexionAgrupada):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.espera = espera
+        self.pragmas = list(pragmas or [])
+        self.timeout = timeout
+        self.factory = factory
+        self.pid = os.getpid()
+        self._libres = queue.LifoQueue()
+        self._candado = threading.Lock()
+        self._creadas = 0
+        self._metricas = {
+            'aciertos': 0,       # conexión reutilizada del pool
+            'fallos': 0,         # hubo que abrir una conexión nueva
+            'esperas': 0,        # el pool estaba lleno y hubo que esperar
+            'tiempo_espera': 0.0,
+            'agotado': 0,        # se superó el tiempo de espera
+        }
+
+    def _abrir(self):
+        conn = abrir_conexion(self.ruta, self.pragmas, timeout=self.timeout,
+                              factory=self.factory, check_same_thread=False)
+        conn.pool = self
+        return conn
+
+    def obtener(self):
+        """Devuelve una conexión libre, abriendo una nueva si el pool no está lleno."""
+        try:
+            conn = self._libres.get_nowait()
+            self._contar('aciertos')
+        except queue.Empty:
+            with self._candado:
+                puede_crear = self._creadas < self.tamano
+                if puede_crear:
+                    self._creadas += 1
+            if puede_crear:
+                self._contar('fallos')
+                try:
+                    conn = self._abrir()
+                except Exception:
+                    with self._candado:
+                        self._creadas -= 1
+                    raise
+            else:
+                inicio = time.perf_counter()
+                try:
+                    conn = self._libres.get(timeout=self.espera)
+                except queue.Empty:
+                    self._contar('agotado')
+                    raise RuntimeError('No hay conexiones libres en el pool de la base de datos')
+                finally:
+                    with self._candado:
+                        self._metricas['esperas'] += 1
+                        self._metricas['tiempo_espera'] += time.perf_counter() - inicio
+        conn.liberada = False
+        return conn
+
+    def liberar(self, conn):
+        """Devuelve la conexión al pool deshaciendo cualquier transacción abierta."""
+        if conn.liberada:
+            return
+        conn.liberada = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Conexión dañada: se descarta y se deja hueco para abrir otra
+            with self._candado:
+                self._creadas -= 1
+            conn.cerrar_definitivamente()
+            return
+        self._libres.put(conn)
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres del pool."""
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            with self._candado:
+                self._creadas -= 1
+            conn.cerrar_definitivamente()
+
+    def _contar(self, clave):
+        with self._candado:
+            self._metricas[clave] += 1
+
+    def estadisticas(self):
+        """Métricas del pool para poder dimensionarlo."""
+        with self._candado:
+            datos = dict(self._metricas)
+            datos['creadas'] = self._creadas
+        datos['libres'] = self._libres.qsize()
+        datos['en_uso'] = datos['creadas'] - datos['libres']
+        datos['tamano'] = self.tamano
+        datos['pid'] = self.pid
+        return datos
+
+
+# ==================== FÁBRICA DE CONEXIONES ====================
+
+def _config():
+    return current_app.config if has_app_context() else vars(Config)
+
+
+def ruta_db():
+    """Ruta del archivo de la base de datos (Config.DATABASE_PATH)."""
+    ruta = _config()['DATABASE_PATH']
+    if ruta != ':memory:':
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    return ruta
+
+
+def pragmas_conexion(config=None):
+    """PRAGMA por conexión derivados de la configuración de almacenamiento."""
+    config = config or _config()
+    pragmas = [
+        f"busy_timeout = {int(config.get('DB_BUSY_TIMEOUT', 5000))}",
+        f"synchronous = {config.get('DB_SYNCHRONOUS', 'NORMAL')}",
+        f"cache_size = {int(config.get('DB_CACHE_SIZE', -2000))}",
+        f"mmap_size = {int(config.get('DB_MMAP_SIZE', 0))}",
+    ]
+    pragmas.extend(config.get('DB_PRAGMAS', ()))
+    return pragmas
+
+
+def abrir_conexion(ruta=None, pragmas=None, timeout=None, **kwargs):
+    """Abre una conexión SQLite nueva con row_factory y los PRAGMA configurados."""
+    config = _config()
+    if timeout is None:
+        timeout = config.get('DB_BUSY_TIMEOUT', 5000) / 1000
+    conn = sqlite3.connect(ruta or ruta_db(), timeout=timeout, **kwargs)
+    conn.row_factory = sqlite3.Row  # Para obtener diccionarios en lugar de tuplas
+    # Los PRAGMA se aplican una sola vez, al abrir la conexión
+    for pragma in (pragmas_conexion(config) if pragmas is None else pragmas):
+        conn.execute(f'PRAGMA {pragma}')
+    return conn
+
+
+def configurar_almacenamiento(conn):
+    """Aplica los ajustes persistentes del archivo (modo de journal)."""
+    modo = _config().get('DB_JOURNAL_MODE', 'WAL')
+    return conn.execute(f'PRAGMA journal_mode = {modo}').fetchone()[0]
+
+
+# ==================== ACCESO DESDE LA APLICACIÓN ====================
+
+_pool_candado = threading.Lock()
+
+
+def _crear_pool(config):
+    return PoolConexiones(
+        ruta_db(),
+        tamano=config.get('DB_POOL_TAMANO', 5),
+        espera=config.get('DB_POOL_ESPERA', 10.0),
+        pragmas=pragmas_conexion(config),
+        timeout=config.get('DB_BUSY_TIMEOUT', 5000) / 1000,
+        factory=ConexionInstrumentada if config.get('METRICAS') else ConexionAgrupada,
+    )
+
+
+def get_pool():
+    """Pool de la aplicación actual en este worker (se recrea tras un fork de gunicorn)."""
+    extensiones = current_app.extensions
+    pool = extensiones.get('pool')
+    if pool is None or pool.pid != os.getpid():
+        with _pool_candado:
+            pool = extensiones.get('pool')
+            if pool is None or pool.pid != os.getpid():
+                pool = extensiones['pool'] = _crear_pool(current_app.config)
+    return pool
+
+
+def get_db_connection():
+    """Conexión de la petición actual, tomada del pool del worker."""
+    if not has_app_context():
+        return abrir_conexion()
+
+    conn = g.get('_db')
+    if conn is None or conn.liberada:
+        with metricas.medir('conexion'):
+            conn = get_pool().obtener()
+        g._db = conn
+    return conn
+
+
+def liberar_conexion(excepcion=None):
+    """Devuelve al pool la conexión de la petición al terminar el contexto."""
+    conn = g.pop('_db', None)
+    if conn is not None:
+        conn.close()
+
+
+def init_app(app):
+    """Crea el pool de la aplicación y registra la liberación de conexiones."""
+    with app.app_context():
+        app.extensions['pool'] = _crear_pool(app.config)
+    app.teardown_appcontext(liberar_conexion)
@@ -0,0 +1,185 @@
+"""Exportación en streaming (CSV o JSON Lines) de tablas e indicadores.
+
+Los generadores leen con fetchmany y entregan el texto por bloques, así que
+la memoria usada no depende del tamaño de la base. Toda la exportación se
+lee dentro de una misma transacción de lectura para que sea una foto
+consistente aunque haya escrituras mientras tanto.
+"""
+import csv
+import io
+import json
+import math
+
+from consultas import cargar_resumen, iterar_resumenes
+from horizonte import ANOS_PROYECCION
+
+# Tablas exportables: nombre -> columna por la que se filtra un proyecto
+TABLAS = {
+    'proyectos': 'id',
+    'costos': 'proyecto_id',
+    'gastos': 'proyecto_id',
+    'personal': 'proyecto_id',
+    'materiales': 'proyecto_id',
+    'ventas': 'proyecto_id',
+    'proyecto_totales': 'proyecto_id',
+}
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+FILAS_POR_LECTURA = 1000
+# Van seguidas de flujo_0..flujo_n, con n el mayor horizonte exportado
+COLUMNAS_INDICADORES = ['proyecto_id', 'nombre', 'tasa_descuento', 'van', 'tir', 'bc', 'pri']
+
+
+class _Escritor:
+    """Convierte filas en texto CSV o JSON Lines y entrega bloques."""
+
+    def __init__(self, formato, columnas):
+        self.formato = formato
+        self.columnas = list(columnas)
+        self.buffer = io.StringIO()
+        self.csv = csv.writer(self.buffer) if formato == 'csv' else None
+
+    def cabecera(self):
+        if self.csv:
+            self.csv.writerow(self.columnas)
+        return self.vaciar()
+
+    def escribir(self, valores):
+        if self.csv:
+            self.csv.writerow(valores)
+        else:
+            self.buffer.write(json.dumps(dict(zip(self.columnas, valores)), ensure_ascii=False))
+            self.buffer.write('\n')
+
+    def vaciar(self):
+        texto = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return texto
+
+
+def _en_transaccion(conn, generador):
+    """Recorre el generador dentro de una transacción de lectura y cierra la conexión."""
+    try:
+        conn.execute('BEGIN')
+        yield from generador
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def exportar_tabla(conn, tabla, formato, proyecto_id=None):
+    """Generador de bloques de texto con todas las filas de `tabla`."""
+    sql = f'SELECT * FROM {tabla}'
+    parametros = ()
+    if proyecto_id is not None:
+        sql += f' WHERE {TABLAS[tabla]} = ?'
+        parametros = (proyecto_id,)
+    sql += f' ORDER BY {TABLAS[tabla]}'
+
+    def filas():
+        cursor = conn.execute(sql, parametros)
+        escritor = _Escritor(formato, [d[0] for d in cursor.description])
+        yield escritor.cabecera()
+        while True:
+            bloque = cursor.fetchmany(FILAS_POR_LECTURA)
+            if not bloque:
+                break
+            for fila in bloque:
+                escritor.escribir(tuple(fila))
+            yield escritor.vaciar()
+
+    return _en_transaccion(conn, filas())
+
+
+def _flujos_grupo(parametros, anos):
+    """Matriz de flujos de proyectos con el mismo horizonte."""
+    import numpy as np
+    from finanzas import construir_flujos
+
+    con_ventas = np.array([p['ventas_anos'] is not None for p in parametros])
+    ventas = np.array([p['ventas_anos'] if p['ventas_anos'] is not None else np.zeros(anos)
+                       for p in parametros], dtype=float)
+    return construir_flujos(
+        inversion=[p['inversion'] for p in parametros],
+        precio=[p['precio'] for p in parametros],
+        ventas_anos=ventas,
+        costos=[p['costos'] for p in parametros],
+        gastos=[p['gastos'] for p in parametros],
+        salarios=[p['salarios'] for p in parametros],
+        con_ventas=con_ventas,
+    )
+
+
+def _indicadores_lote(resumenes):
+    """Flujos, VAN, TIR (%), B/C y PRI de un lote de proyectos como una matriz.
+
+    Los flujos se arman por grupos de igual horizonte y se completan con ceros
+    hasta el mayor del lote; los ceros al final no cambian ningún indicador.
+    La TIR sale de tir_lote(); las filas con flujos no convencionales o sin
+    una raíz en [TASA_MIN, TASA_MAX] se resuelven con resolver_tir(), como en
+    la página de resultados, para que ambas muestren la misma raíz.
+    """
+    # NumPy y finanzas solo al exportar indicadores, no al importar el módulo
+    import numpy as np
+    from finanzas import (TASA_MAX, TASA_MIN, _cambios_signo, calcular_bc, calcular_pri,
+                          calcular_van, resolver_tir, tir_lote)
+
+    parametros = [r.parametros_flujo() for r in resumenes]
+    anos = np.array([p['anos'] for p in parametros])
+    flujos = np.zeros((len(parametros), anos.max() + 1))
+    for horizonte in np.unique(anos):
+        filas = np.nonzero(anos == horizonte)[0]
+        flujos[filas, :horizonte + 1] = _flujos_grupo([parametros[i] for i in filas], horizonte)
+    tasas = np.array([r.proyecto['tasa_descuento'] for r in resumenes], dtype=float)
+    tir = tir_lote(flujos)
+    tir[~((tir >= TASA_MIN) & (tir <= TASA_MAX))] = np.nan
+    for i, horizonte in enumerate(anos):
+        fila = flujos[i, :horizonte + 1]
+        if np.isnan(tir[i]) or _cambios_signo(fila) > 1:
+            resultado = resolver_tir(fila)
+            tir[i] = resultado.tasa if resultado.tasa is not None else np.nan
+    return (anos, flujos, calcular_van(tasas, flujos), tir * 100,
+            calcular_bc(flujos, tasas), calcular_pri(flujos))
+
+
+def _numero(valor):
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+def _horizonte_max(conn, proyecto_id=None):
+    sql = 'SELECT MAX(COALESCE(horizonte, ?)) FROM proyectos'
+    if proyecto_id is not None:
+        return conn.execute(sql + ' WHERE id = ?', (ANOS_PROYECCION, proyecto_id)).fetchone()[0]
+    return conn.execute(sql, (ANOS_PROYECCION,)).fetchone()[0]
+
+
+def exportar_indicadores(conn, formato, proyecto_id=None, tamano_lote=500):
+    """Generador con los flujos anuales e indicadores calculados de cada proyecto.
+
+    Hay una columna flujo_i por año hasta el mayor horizonte; en los proyectos
+    con un horizonte menor las columnas sobrantes quedan vacías.
+    """
+
+    def filas():
+        horizonte_max = _horizonte_max(conn, proyecto_id) or ANOS_PROYECCION
+        escritor = _Escritor(formato, COLUMNAS_INDICADORES
+                             + [f'flujo_{ano}' for ano in range(horizonte_max + 1)])
+        yield escritor.cabecera()
+        if proyecto_id is not None:
+            resumen = cargar_resumen(conn, proyecto_id)
+            lotes = [[resumen]] if resumen else []
+        else:
+            lotes = iterar_resumenes(conn, tamano_lote)
+        for resumenes in lotes:
+            anos, flujos, van, tir, bc, pri = _indicadores_lote(resumenes)
+            for i, resumen in enumerate(resumenes):
+                escritor.escribir([resumen.id, resumen.proyecto['nombre'], resumen.proyecto['tasa_descuento'],
+                                   _numero(van[i]), _numero(tir[i]), _numero(bc[i]), _numero(pri[i])]
+                                  + flujos[i, :anos[i] + 1].tolist() + [None] * (horizonte_max - anos[i]))
+            yield escritor.vaciar()
+
+    return _en_transaccion(conn, filas())
@@ -0,0 +1,437 @@
+"""Indicadores financieros (VAN, TIR, B/C, PRI) vectorizados con NumPy.
+
+Todas las funciones aceptan un vector de flujos (un proyecto) o una matriz
+de flujos (una fila por escenario). Las tasas pueden ser un escalar o un
+arreglo que se combina por broadcasting con las filas de flujos; por
+ejemplo, tasas[:, None] frente a una matriz de p escenarios da una malla
+tasas × escenarios. Con un solo proyecto y una sola tasa se devuelven
+números de Python, igual que las funciones originales de app.py.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from horizonte import ANOS_PROYECCION, PERIODOS_POR_ANO
+
+
+def divisores_descuento(tasa, periodos):
+    """(1 + tasa) ** i para i = 0..periodos-1, calculado una sola vez."""
+    tasa = np.asarray(tasa, dtype=float)
+    return np.power(1 + tasa[..., None], np.arange(periodos, dtype=float))
+
+
+def _escalar(valor):
+    """Convierte un resultado de dimensión 0 en float de Python."""
+    valor = np.asarray(valor)
+    return float(valor) if valor.ndim == 0 else valor
+
+
+def _suma(valores):
+    # cumsum suma de izquierda a derecha, en el mismo orden que el bucle original
+    if valores.shape[-1] == 0:
+        return np.zeros(valores.shape[:-1])
+    return np.cumsum(valores, axis=-1)[..., -1]
+
+
+def calcular_van(tasa_descuento, flujos):
+    """Calcula el VAN dado una tasa de descuento y una lista de flujos."""
+    flujos = np.asarray(flujos, dtype=float)
+    divisores = divisores_descuento(tasa_descuento, flujos.shape[-1])
+    return _escalar(_suma(flujos / divisores))
+
+
+def calcular_tir(flujos, iteraciones=1000, precision=0.0001):
+    """Calcula la TIR usando el método de bisección.
+
+    Con una matriz de flujos todas las filas se bisecan a la vez; las filas
+    sin cambio de signo en el intervalo devuelven NaN (None para un solo flujo).
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    un_flujo = flujos.ndim == 1
+    flujos = np.atleast_2d(flujos)
+    exponentes = np.arange(flujos.shape[-1], dtype=float)
+
+    def van_con_tasa(tasas):
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            return _suma(flujos / np.power(1 + tasas[:, None], exponentes))
+
+    filas = flujos.shape[0]
+    tasa_min = np.full(filas, -0.99)
+    tasa_max = np.full(filas, 10.0)
+    van_min = van_con_tasa(tasa_min)
+    van_max = van_con_tasa(tasa_max)
+
+    resultado = np.full(filas, np.nan)
+    activas = ~(van_min * van_max > 0)
+
+    for _ in range(iteraciones):
+        if not activas.any():
+            break
+        tasa_media = (tasa_min + tasa_max) / 2
+        van_media = van_con_tasa(tasa_media)
+
+        convergidas = activas & (np.abs(van_media) < precision)
+        resultado[convergidas] = tasa_media[convergidas]
+        activas &= ~convergidas
+
+        bajar = activas & (van_min * van_media < 0)
+        subir = activas & ~bajar
+        tasa_max = np.where(bajar, tasa_media, tasa_max)
+        van_max = np.where(bajar, van_media, van_max)
+        tasa_min = np.where(subir, tasa_media, tasa_min)
+        van_min = np.where(subir, van_media, van_min)
+
+    # Sin converger dentro de las iteraciones: punto medio del último intervalo
+    resultado[activas] = ((tasa_min + tasa_max) / 2)[activas]
+
+    if un_flujo:
+        return None if np.isnan(resultado[0]) else float(resultado[0])
+    return resultado
+
+
+def calcular_bc(flujos, tasa_descuento):
+    """Calcula la relación Beneficio/Costo."""
+    flujos = np.asarray(flujos, dtype=float)
+    divisores = divisores_descuento(tasa_descuento, flujos.shape[-1])
+
+    positivos = flujos > 0
+    beneficios_pv = _suma(np.where(positivos, flujos, 0.0) / divisores)
+    costos_pv = _suma(np.where(positivos, 0.0, np.abs(flujos)) / divisores)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bc = np.where(costos_pv == 0, np.inf, beneficios_pv / costos_pv)
+    return _escalar(bc)
+
+
+def calcular_pri(flujos):
+    """Calcula el Periodo de Recuperación de la Inversión.
+
+    Con una matriz de flujos devuelve NaN en las filas que no se recuperan.
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    un_flujo = flujos.ndim == 1
+    if un_flujo and flujos.size == 0:
+        return 0
+    flujos = np.atleast_2d(flujos)
+
+    inversion = np.where(flujos[:, 0] < 0, np.abs(flujos[:, 0]), 0.0)
+    if flujos.shape[1] < 2:
+        flujos = np.pad(flujos, ((0, 0), (0, 1)))
+    acumulado = np.cumsum(flujos[:, 1:], axis=1)
+    recuperado = acumulado >= inversion[:, None]
+
+    hay_recuperacion = recuperado.any(axis=1)
+    indice = recuperado.argmax(axis=1)  # primer año (desde 1) en que se recupera
+    filas = np.arange(flujos.shape[0])
+    flujo = flujos[filas, indice + 1]
+    faltante_antes = inversion - (acumulado[filas, indice] - flujo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proporcion = np.where(flujo != 0, faltante_antes / flujo, 0.0)
+
+    pri = np.where(hay_recuperacion, indice + proporcion, np.nan)
+    pri = np.where(inversion == 0, 0.0, pri)
+
+    if un_flujo:
+        if inversion[0] == 0:
+            return 0
+        return None if np.isnan(pri[0]) else float(pri[0])
+    return pri
+
+
+# ==================== FLUJOS DE CAJA ====================
+
+# El horizonte por defecto y los periodos por año están en horizonte.py (sin NumPy)
+
+
+def anualizar(ventas, granularidad='anos'):
+    """Suma las ventas de cada año (bloques de PERIODOS_POR_ANO[granularidad] periodos).
+
+    Acepta un vector o una matriz (un escenario por fila); el último año
+    puede quedar incompleto.
+    """
+    ventas = np.asarray(ventas, dtype=float)
+    por_ano = PERIODOS_POR_ANO[granularidad]
+    if por_ano == 1:
+        return ventas
+    anos = -(-ventas.shape[-1] // por_ano)
+    relleno = [(0, 0)] * (ventas.ndim - 1) + [(0, anos * por_ano - ventas.shape[-1])]
+    ventas = np.pad(ventas, relleno)
+    return ventas.reshape(ventas.shape[:-1] + (anos, por_ano)).sum(axis=-1)
+
+
+def ajustar_horizonte(ventas_anos, anos):
+    """Recorta las ventas anuales a `anos` o las completa con ceros."""
+    ventas_anos = np.asarray(ventas_anos, dtype=float)
+    if ventas_anos.shape[-1] >= anos:
+        return ventas_anos[..., :anos]
+    relleno = [(0, 0)] * (ventas_anos.ndim - 1) + [(0, anos - ventas_anos.shape[-1])]
+    return np.pad(ventas_anos, relleno)
+
+
+def ventas_anuales(ventas, granularidad='anos', anos=None):
+    """Ventas de cada año del horizonte a partir de la serie registrada.
+
+    Una serie de días o semanas que no pasa de un año es un patrón (la semana
+    o las cuatro semanas del formulario): se repite hasta completar el año y
+    ese año se repite en todo el horizonte (`anos` o ANOS_PROYECCION). Con
+    meses, los que faltan hasta diciembre valen 0 y el año también se repite.
+    Las series de años, o de más de un año, son periodos consecutivos: se
+    suman por año y se recortan o completan con ceros hasta `anos`.
+    """
+    ventas = np.asarray(ventas, dtype=float)
+    por_ano = PERIODOS_POR_ANO[granularidad]
+    periodos = ventas.shape[-1]
+    if por_ano > 1 and 0 < periodos <= por_ano:
+        if granularidad != 'meses':
+            ventas = ventas[..., np.arange(por_ano) % periodos]
+        ano = ventas.sum(axis=-1, keepdims=True)
+        return np.repeat(ano, anos or ANOS_PROYECCION, axis=-1)
+    ventas_anos = anualizar(ventas, granularidad)
+    return ventas_anos if anos is None else ajustar_horizonte(ventas_anos, anos)
+
+
+def construir_flujos(inversion, precio, ventas_anos, costos, gastos, salarios, con_ventas=True,
+                     anos=None, granularidad='anos'):
+    """Flujos anuales: año 0 = -inversión; años 1..n = ingresos - costos/n - gastos/n - salarios*12.
+
+    El horizonte n es `anos` o, si no se indica, el número de años de ventas.
+    Las ventas pueden venir por meses, semanas o días (`granularidad`): se
+    pasan a años con ventas_anuales().
+
+    Acepta escalares (un proyecto) o arreglos de m escenarios, con ventas_anos
+    como vector o matriz m × periodos. Sin ventas registradas (ventas_anos None
+    o con_ventas False en esa fila) los flujos de operación son cero.
+    """
+    inversion, precio, costos, gastos, salarios, con_ventas = (
+        np.asarray(x, dtype=float) for x in (inversion, precio, costos, gastos, salarios, con_ventas))
+    if ventas_anos is None:
+        ventas_anos, con_ventas = np.zeros(anos or ANOS_PROYECCION), np.zeros(())
+    ventas_anos = ventas_anuales(ventas_anos, granularidad, anos)
+    horizonte = ventas_anos.shape[-1]
+
+    costo_anual = np.where(costos > 0, costos / horizonte, 0.0)
+    gasto_anual = np.where(gastos > 0, gastos / horizonte, 0.0)
+    salario_anual = np.where(salarios > 0, salarios * 12, 0.0)
+
+    ingresos = ventas_anos * precio[..., None]
+    operacion = ingresos - costo_anual[..., None] - gasto_anual[..., None] - salario_anual[..., None]
+    operacion = np.where(con_ventas[..., None] != 0, operacion, 0.0)
+
+    forma = np.broadcast_shapes(inversion.shape, operacion.shape[:-1])
+    inicial = np.broadcast_to(0 - inversion, forma)[..., None]
+    return np.concatenate([inicial, np.broadcast_to(operacion, forma + operacion.shape[-1:])], axis=-1)
+
+
+# ==================== RESOLUCIÓN DE LA TIR ====================
+
+# Intervalo de búsqueda de la TIR (el mismo que usa la bisección)
+TASA_MIN = -0.99
+TASA_MAX = 10.0
+
+
+@dataclass(frozen=True)
+class ResultadoTIR:
+    """TIR con información sobre cómo se obtuvo."""
+
+    tasa: Optional[float]
+    metodo: Optional[str]        # 'newton', 'brent', 'biseccion' o None
+    iteraciones: int
+    residuo: Optional[float]     # |VAN(tasa)|
+    cambios_signo: int
+    tasas: tuple = ()            # todas las TIR halladas en [TASA_MIN, TASA_MAX]
+
+    @property
+    def convergio(self):
+        return self.tasa is not None
+
+    @property
+    def multiple(self):
+        return len(self.tasas) > 1
+
+
+def _cambios_signo(flujos):
+    signos = np.sign(flujos[flujos != 0])
+    return int(np.count_nonzero(signos[1:] != signos[:-1]))
+
+
+def _newton(flujos, exponentes, semilla, tolerancia, max_iter):
+    """Newton con la derivada analítica dVAN/dtasa = -sum(i * F_i / (1 + tasa) ** (i + 1))."""
+    pesos = -exponentes * flujos
+    tasa = semilla
+    for i in range(1, max_iter + 1):
+        base = 1 / (1 + tasa)
+        with np.errstate(over='ignore', invalid='ignore'):
+            descuento = base ** exponentes
+            van = float(flujos @ descuento)
+            derivada = float(pesos @ descuento) * base
+        if derivada == 0 or not math.isfinite(derivada):
+            return None, i
+        paso = van / derivada
+        tasa -= paso
+        if not math.isfinite(tasa) or tasa <= -1:
+            return None, i
+        if abs(paso) < tolerancia * (1 + abs(tasa)):
+            return tasa, i
+    return None, max_iter
+
+
+def _brent(f, a, b, fa, fb, tolerancia, max_iter):
+    """Método de Brent (bisección + secante + interpolación cuadrática inversa)."""
+    if fa * fb > 0:
+        return None, 0
+    c, fc = a, fa
+    d = e = b - a
+    for i in range(1, max_iter + 1):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * np.finfo(float).eps * abs(b) + tolerancia / 2
+        m = (c - b) / 2
+        if abs(m) <= tol or fb == 0:
+            return b, i
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2 * m * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if m > 0 else -tol)
+        fb = f(b)
+    return None, max_iter
+
+
+def _biseccion(f, a, b, fa, tolerancia, max_iter):
+    for i in range(1, max_iter + 1):
+        medio = (a + b) / 2
+        fm = f(medio)
+        if fm == 0 or (b - a) / 2 < tolerancia:
+            return medio, i
+        if fa * fm < 0:
+            b = medio
+        else:
+            a, fa = medio, fm
+    return (a + b) / 2, max_iter
+
+
+def _malla_tasas():
+    # Más densa cerca de cero, donde suelen estar las TIR razonables
+    return np.unique(np.concatenate([
+        np.linspace(TASA_MIN, 1.0, 400),
+        np.geomspace(1.0, TASA_MAX, 100),
+    ]))
+
+
+def _intervalos_con_raiz(flujos, exponentes):
+    """Intervalos [a, b] de la malla donde el VAN cambia de signo (una sola evaluación vectorial)."""
+    malla = _malla_tasas()
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        vanes = (flujos / np.power(1 + malla[:, None], exponentes)).sum(axis=1)
+    cambios = np.nonzero(np.sign(vanes[:-1]) * np.sign(vanes[1:]) <= 0)[0]
+    return [(malla[i], malla[i + 1], vanes[i], vanes[i + 1]) for i in cambios]
+
+
+def resolver_tir(flujos, semilla=0.1, tolerancia=1e-12, max_iter=100):
+    """Calcula la TIR con Newton (derivada analítica), recurriendo a Brent y
+    luego a bisección si Newton no converge.
+
+    Para flujos no convencionales (más de un cambio de signo) busca además
+    todas las TIR del intervalo [TASA_MIN, TASA_MAX] y las devuelve en `tasas`.
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    exponentes = np.arange(flujos.size, dtype=float)
+    cambios = _cambios_signo(flujos)
+
+    def van(tasa):
+        with np.errstate(over='ignore', invalid='ignore'):
+            return float(flujos @ (1 + tasa) ** -exponentes)
+
+    if cambios == 0:
+        return ResultadoTIR(None, None, 0, None, cambios)
+
+    tasa, iteraciones = _newton(flujos, exponentes, semilla, tolerancia, max_iter)
+    metodo = 'newton' if tasa is not None else None
+    if tasa is not None and not TASA_MIN <= tasa <= TASA_MAX:
+        tasa, metodo = None, None
+
+    intervalos = None
+    if tasa is None:
+        intervalos = _intervalos_con_raiz(flujos, exponentes)
+        for a, b, fa, fb in intervalos:
+            tasa, pasos = _brent(van, a, b, fa, fb, tolerancia, max_iter)
+            iteraciones += pasos
+            metodo = 'brent'
+            if tasa is None:
+                tasa, pasos = _biseccion(van, a, b, fa, tolerancia, max_iter * 10)
+                iteraciones += pasos
+                metodo = 'biseccion'
+            tasa = float(tasa)
+            break
+
+    if tasa is None:
+        return ResultadoTIR(None, None, iteraciones, None, cambios)
+
+    tasas = (tasa,)
+    if cambios > 1:
+        intervalos = intervalos if intervalos is not None else _intervalos_con_raiz(flujos, exponentes)
+        encontradas = []
+        for a, b, fa, fb in intervalos:
+            raiz, _ = _brent(van, a, b, fa, fb, tolerancia, max_iter)
+            if raiz is not None and not any(abs(raiz - r) < 1e-9 for r in encontradas):
+                encontradas.append(float(raiz))
+        if not any(abs(tasa - r) < 1e-9 for r in encontradas):
+            encontradas.append(tasa)
+        tasas = tuple(sorted(encontradas))
+
+    return ResultadoTIR(tasa, metodo, iteraciones, abs(van(tasa)), cambios, tasas)
+
+
+def tir_lote(flujos, semilla=0.1, tolerancia=1e-10, max_iter=50):
+    """TIR de una matriz de flujos con Newton vectorizado (todas las filas a la vez).
+
+    `semilla` puede ser un escalar o un arreglo con una semilla por fila. Las
+    filas en las que Newton no converge se resuelven con calcular_tir(); las
+    que no tienen TIR quedan en NaN.
+    """
+    flujos = np.atleast_2d(np.asarray(flujos, dtype=float))
+    exponentes = np.arange(flujos.shape[-1], dtype=float)
+    pesos = -exponentes * flujos
+
+    tasa = np.broadcast_to(np.asarray(semilla, dtype=float), flujos.shape[:1]).copy()
+    convergida = np.zeros(flujos.shape[0], dtype=bool)
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        for _ in range(max_iter):
+            activas = ~convergida
+            if not activas.any():
+                break
+            base = 1 / (1 + tasa[activas])
+            descuento = base[:, None] ** exponentes
+            van = np.einsum('ij,ij->i', flujos[activas], descuento)
+            derivada = np.einsum('ij,ij->i', pesos[activas], descuento) * base
+            paso = van / derivada
+            nueva = tasa[activas] - paso
+            tasa[activas] = nueva
+            convergida[activas] = np.abs(paso) < tolerancia * (1 + np.abs(nueva))
+
+    valida = convergida & np.isfinite(tasa) & (tasa >= TASA_MIN) & (tasa <= TASA_MAX)
+    resultado = np.where(valida, tasa, np.nan)
+    pendientes = ~valida
+    if pendientes.any():
+        resultado[pendientes] = calcular_tir(flujos[pendientes])
+    return resultado
@@ -0,0 +1,26 @@
+"""Horizonte de la proyección y granularidades de ventas, sin NumPy.
+
+Lo usan los formularios y la API al validar un proyecto; están aparte de
+finanzas.py para que importar la aplicación no cargue NumPy hasta el
+primer cálculo.
+"""
+
+# Horizonte por defecto de la proyección en años, y máximo admitido
+ANOS_PROYECCION = 7
+HORIZONTE_MAX = 100
+
+# Periodos de cada granularidad de ventas que forman un año
+PERIODOS_POR_ANO = {'anos': 1, 'meses': 12, 'semanas': 52, 'dias': 365}
+
+
+def validar_horizonte(anos):
+    anos = int(anos)
+    if not 1 <= anos <= HORIZONTE_MAX:
+        raise ValueError(f'El horizonte debe estar entre 1 y {HORIZONTE_MAX} años')
+    return anos
+
+
+def validar_granularidad(granularidad):
+    if granularidad not in PERIODOS_POR_ANO:
+        raise ValueError(f'Granularidad no válida: {granularidad} (usa {", ".join(PERIODOS_POR_ANO)})')
+    return granularidad
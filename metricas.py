@@ -0,0 +1,221 @@
+"""Instrumentación opcional de las peticiones (Config.METRICAS).
+
+Por cada petición mide el tiempo de obtener la conexión del pool, el
+número y la duración de las consultas SQL, el tiempo de cálculo (flujos,
+VAN, TIR...) y el de renderizar plantillas. Los devuelve en la cabecera
+Server-Timing y los acumula por endpoint para /metrics, en el formato de
+texto de Prometheus. Los acumulados son del proceso: cada worker de
+gunicorn expone los suyos, y cada aplicación (create_app) tiene su Registro
+en app.extensions['metricas'].
+
+Desactivada no se registra ningún hook, el pool usa conexiones normales y
+medir() devuelve un contexto vacío.
+"""
+import threading
+import time
+from contextlib import nullcontext
+
+from flask import (before_render_template, current_app, g, has_app_context, has_request_context,
+                   request, template_rendered)
+
+FASES = ('conexion', 'sql', 'calculo', 'render')
+
+# Límites (segundos) del histograma de duración de las peticiones
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_nulo = nullcontext()
+
+
+def activa():
+    """True si la aplicación actual tiene las métricas activas."""
+    return has_app_context() and 'metricas' in current_app.extensions
+
+
+# ==================== MEDIDAS DE LA PETICIÓN ====================
+
+class MedidasPeticion:
+    """Tiempos por fase y consultas SQL de la petición en curso."""
+
+    __slots__ = ('inicio', 'tiempos', 'consultas', 'renders')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.tiempos = dict.fromkeys(FASES, 0.0)
+        self.consultas = 0
+        self.renders = []
+
+
+def _actuales():
+    # Solo hay medidas si el before_request de una aplicación con métricas las creó
+    if not has_request_context():
+        return None
+    return g.get('_metricas')
+
+
+def registrar(fase, segundos, consultas=0):
+    """Suma `segundos` a la fase de la petición actual (si se está midiendo)."""
+    medidas = _actuales()
+    if medidas is not None:
+        medidas.tiempos[fase] += segundos
+        medidas.consultas += consultas
+
+
+class _Medicion:
+    __slots__ = ('fase', 'inicio')
+
+    def __init__(self, fase):
+        self.fase = fase
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *excepcion):
+        registrar(self.fase, time.perf_counter() - self.inicio)
+
+
+def medir(fase):
+    """Contexto que suma su duración a `fase`; vacío si las métricas están desactivadas."""
+    return _Medicion(fase) if _actuales() is not None else _nulo
+
+
+# ==================== ACUMULADOS POR ENDPOINT ====================
+
+class Registro:
+    """Contadores y sumas por endpoint del proceso actual."""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._peticiones = {}  # (endpoint, método, estado) -> n
+        self._duracion = {}    # endpoint -> [cuentas por bucket..., suma, n]
+        self._fases = {}       # (endpoint, fase) -> segundos
+        self._consultas = {}   # endpoint -> consultas SQL
+
+    def anotar(self, endpoint, metodo, estado, duracion, medidas):
+        with self._candado:
+            clave = (endpoint, metodo, str(estado))
+            self._peticiones[clave] = self._peticiones.get(clave, 0) + 1
+
+            histograma = self._duracion.setdefault(endpoint, [0] * len(BUCKETS) + [0.0, 0])
+            for i, limite in enumerate(BUCKETS):
+                if duracion <= limite:
+                    histograma[i] += 1
+            histograma[-2] += duracion
+            histograma[-1] += 1
+
+            for fase, segundos in medidas.tiempos.items():
+                self._fases[(endpoint, fase)] = self._fases.get((endpoint, fase), 0.0) + segundos
+            self._consultas[endpoint] = self._consultas.get(endpoint, 0) + medidas.consultas
+
+    def limpiar(self):
+        with self._candado:
+            for datos in (self._peticiones, self._duracion, self._fases, self._consultas):
+                datos.clear()
+
+    def exportar(self, extras=()):
+        """Texto de Prometheus con los acumulados y los valores de `extras`.
+
+        extras: (nombre, tipo, ayuda, [(etiquetas, valor), ...]) adicionales.
+        """
+        with self._candado:
+            peticiones = dict(self._peticiones)
+            duracion = {endpoint: list(valores) for endpoint, valores in self._duracion.items()}
+            fases = dict(self._fases)
+            consultas = dict(self._consultas)
+
+        metricas = [
+            ('pep_peticiones_total', 'counter', 'Peticiones atendidas',
+             [({'endpoint': e, 'metodo': m, 'estado': s}, n) for (e, m, s), n in sorted(peticiones.items())]),
+            ('pep_fase_segundos_total', 'counter', 'Tiempo por fase (conexion, sql, calculo, render)',
+             [({'endpoint': e, 'fase': f}, s) for (e, f), s in sorted(fases.items())]),
+            ('pep_consultas_sql_total', 'counter', 'Consultas SQL ejecutadas',
+             [({'endpoint': e}, n) for e, n in sorted(consultas.items())]),
+        ]
+        lineas = []
+        for nombre, tipo, ayuda, valores in metricas:
+            _bloque(lineas, nombre, tipo, ayuda, valores)
+
+        lineas += ['# HELP pep_peticion_segundos Duración de las peticiones',
+                   '# TYPE pep_peticion_segundos histogram']
+        for endpoint, valores in sorted(duracion.items()):
+            for limite, n in zip(BUCKETS, valores):
+                lineas.append(f'pep_peticion_segundos_bucket{_etiquetas({"endpoint": endpoint, "le": limite})} {n}')
+            lineas.append(f'pep_peticion_segundos_bucket{_etiquetas({"endpoint": endpoint, "le": "+Inf"})} {valores[-1]}')
+            lineas.append(f'pep_peticion_segundos_sum{_etiquetas({"endpoint": endpoint})} {valores[-2]}')
+            lineas.append(f'pep_peticion_segundos_count{_etiquetas({"endpoint": endpoint})} {valores[-1]}')
+
+        for nombre, tipo, ayuda, valores in extras:
+            _bloque(lineas, nombre, tipo, ayuda, valores)
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas.items()) + '}'
+
+
+def _bloque(lineas, nombre, tipo, ayuda, valores):
+    lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+    for etiquetas, valor in valores:
+        if valor is not None:
+            lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+
+
+def registro():
+    """Registro de la aplicación actual (solo con las métricas activas)."""
+    return current_app.extensions['metricas']
+
+
+# ==================== HOOKS DE FLASK ====================
+
+def _iniciar():
+    g._metricas = MedidasPeticion()
+
+
+def _inicio_render(sender, template, context, **extra):
+    medidas = _actuales()
+    if medidas is not None:
+        medidas.renders.append(time.perf_counter())
+
+
+def _fin_render(sender, template, context, **extra):
+    medidas = _actuales()
+    if medidas is not None and medidas.renders:
+        medidas.tiempos['render'] += time.perf_counter() - medidas.renders.pop()
+
+
+def server_timing(medidas, total):
+    """Valor de la cabecera Server-Timing (duraciones en milisegundos)."""
+    partes = [f'{fase};dur={segundos * 1000:.2f}' for fase, segundos in medidas.tiempos.items()]
+    partes[FASES.index('sql')] += f';desc="{medidas.consultas} consultas"'
+    partes.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(partes)
+
+
+def _finalizar(respuesta):
+    medidas = g.pop('_metricas', None)
+    if medidas is None:
+        return respuesta
+    total = time.perf_counter() - medidas.inicio
+    respuesta.headers['Server-Timing'] = server_timing(medidas, total)
+    registro().anotar(request.endpoint or 'sin_ruta', request.method, respuesta.status_code, total, medidas)
+    return respuesta
+
+
+def init_app(app):
+    """Activa la instrumentación si Config.METRICAS está activo.
+
+    Debe llamarse antes de registrar los demás before_request, para que su
+    tiempo (y sus consultas) cuenten en la petición.
+    """
+    if not app.config.get('METRICAS'):
+        return
+    app.extensions['metricas'] = Registro()
+    app.before_request(_iniciar)
+    app.after_request(_finalizar)
+    before_render_template.connect(_inicio_render, app)
+    template_rendered.connect(_fin_render, app)
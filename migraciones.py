@@ -0,0 +1,115 @@
+# Migraciones del esquema, aplicadas en orden según PRAGMA user_version.
+# Cada migración recibe la conexión y debe poder ejecutarse sobre una base
+# recién creada por init_db() o sobre una base existente de una versión anterior.
+# Las migraciones ya publicadas no se modifican: cualquier cambio va en una nueva.
+import consultas
+
+# Índices por proyecto_id: (tabla, columnas del índice)
+INDICES = {
+    'idx_costos_proyecto': ('costos', 'proyecto_id, id, valor'),
+    'idx_gastos_proyecto': ('gastos', 'proyecto_id, id, valor'),
+    'idx_personal_proyecto': ('personal', 'proyecto_id, id, salario_mensual'),
+    'idx_materiales_proyecto': ('materiales', 'proyecto_id, id, valor'),
+    'idx_ventas_dias_proyecto': ('ventas_dias', 'proyecto_id'),
+    'idx_ventas_semanas_proyecto': ('ventas_semanas', 'proyecto_id'),
+    'idx_ventas_meses_proyecto': ('ventas_meses', 'proyecto_id'),
+    'idx_ventas_anos_proyecto': ('ventas_anos', 'proyecto_id'),
+}
+
+
+def crear_indices_proyecto(conn):
+    """Índices sobre proyecto_id para que los WHERE proyecto_id = ? no recorran la tabla."""
+    # Las bases nuevas ya no tienen las tablas ventas_*: sus índices se omiten
+    existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for nombre, (tabla, columnas) in INDICES.items():
+        if tabla not in existentes:
+            continue
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})')
+    conn.execute('ANALYZE')
+
+
+def agregar_version_totales(conn):
+    """Columna version en proyecto_totales (la crea init_db en bases nuevas)."""
+    columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(proyecto_totales)')]
+    if columnas and 'version' not in columnas:
+        conn.execute('ALTER TABLE proyecto_totales ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+
+def agregar_modificado_totales(conn):
+    """Columna modificado (epoch de la última escritura) para Last-Modified."""
+    columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(proyecto_totales)')]
+    if columnas and 'modificado' not in columnas:
+        conn.execute('ALTER TABLE proyecto_totales ADD COLUMN modificado INTEGER')
+
+
+# Columnas de las antiguas tablas ventas_<granularidad>, una por periodo (1, 2, ...)
+COLUMNAS_VENTAS_ANTERIORES = {
+    'dias': ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo'),
+    'semanas': ('semana1', 'semana2', 'semana3', 'semana4'),
+    'meses': ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio'),
+    'anos': ('año1', 'año2', 'año3', 'año4', 'año5', 'año6', 'año7'),
+}
+
+
+def normalizar_ventas(conn):
+    """Pasa las tablas ventas_dias/semanas/meses/anos a la tabla ventas y las borra.
+
+    Cada columna se convierte en una fila (proyecto_id, granularidad, periodo).
+    Si un proyecto tenía varias filas se conserva la primera, que era la que
+    se leía. La tabla ventas la crea init_db(). Los índices idx_ventas_* de
+    la migración 1 se borran con ellas.
+    """
+    existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for granularidad, columnas in COLUMNAS_VENTAS_ANTERIORES.items():
+        tabla = f'ventas_{granularidad}'
+        if tabla not in existentes:
+            continue
+        for periodo, columna in enumerate(columnas, start=1):
+            conn.execute(f'INSERT OR IGNORE INTO ventas (proyecto_id, granularidad, periodo, unidades) '
+                         f'SELECT proyecto_id, ?, ?, COALESCE({columna}, 0) FROM {tabla} '
+                         f'WHERE proyecto_id IS NOT NULL ORDER BY id', (granularidad, periodo))
+        conn.execute(f'DROP INDEX IF EXISTS idx_{tabla}_proyecto')
+        conn.execute(f'DROP TABLE {tabla}')
+
+
+def agregar_horizonte_proyectos(conn):
+    """Columnas horizonte (años) y granularidad_ventas de la proyección del flujo."""
+    columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(proyectos)')]
+    if 'horizonte' not in columnas:
+        conn.execute('ALTER TABLE proyectos ADD COLUMN horizonte INTEGER DEFAULT 7')
+    if 'granularidad_ventas' not in columnas:
+        conn.execute("ALTER TABLE proyectos ADD COLUMN granularidad_ventas TEXT DEFAULT 'anos'")
+
+
+def crear_triggers_totales(conn):
+    """Triggers de proyecto_totales (antes init_db() los recreaba en cada arranque)."""
+    consultas.crear_triggers_totales(conn)
+
+
+# (versión, función) en orden creciente
+MIGRACIONES = [
+    (1, crear_indices_proyecto),
+    (2, agregar_version_totales),
+    (3, agregar_modificado_totales),
+    (4, normalizar_ventas),
+    (5, agregar_horizonte_proyectos),
+    (6, crear_triggers_totales),
+]
+
+
+def version_esquema(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migraciones(conn):
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas."""
+    aplicadas = []
+    actual = version_esquema(conn)
+    for version, migracion in MIGRACIONES:
+        if version <= actual:
+            continue
+        migracion(conn)
+        conn.execute(f'PRAGMA user_version = {version}')
+        conn.commit()
+        aplicadas.append(version)
+    return aplicadas
@@ -0,0 +1,145 @@
+"""Simulación de Monte Carlo del VAN y la TIR de un proyecto.
+
+Cada variable incierta se describe como un factor multiplicativo sobre el
+valor guardado del proyecto (media 1 por defecto), por ejemplo:
+
+    {"precio_producto": {"tipo": "normal", "desviacion": 0.1},
+     "ventas_anos": {"tipo": "triangular", "min": 0.7, "moda": 1, "max": 1.2}}
+
+Para ventas_anos se muestrea un factor independiente por año. Las
+simulaciones se hacen por bloques de tamaño fijo y cada bloque tiene su
+propia semilla derivada de la semilla global, así que con la misma semilla
+el resultado es el mismo con uno o varios procesos.
+"""
+import time
+
+import numpy as np
+
+from finanzas import calcular_van, construir_flujos, tir_lote
+
+# Variables que se pueden simular: clave JSON -> clave de construir_flujos()
+VARIABLES = {
+    'precio_producto': 'precio',
+    'ventas_anos': 'ventas_anos',
+    'salarios': 'salarios',
+    'costos': 'costos',
+    'gastos': 'gastos',
+}
+TIPOS = ('normal', 'uniforme', 'triangular', 'lognormal')
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+TAMANO_BLOQUE = 50000
+
+
+def validar_distribuciones(distribuciones):
+    """Comprueba la especificación y la normaliza; lanza ValueError si no es válida."""
+    if not isinstance(distribuciones, dict) or not distribuciones:
+        raise ValueError('Se espera un objeto "distribuciones" con al menos una variable')
+    normalizadas = {}
+    for variable, spec in distribuciones.items():
+        if variable not in VARIABLES:
+            raise ValueError(f'Variable no simulable: {variable}')
+        if not isinstance(spec, dict) or spec.get('tipo') not in TIPOS:
+            raise ValueError(f'{variable}: "tipo" debe ser uno de {", ".join(TIPOS)}')
+        try:
+            tipo = spec['tipo']
+            if tipo in ('normal', 'lognormal'):
+                params = {'media': float(spec.get('media', 1.0)),
+                          'desviacion': float(spec.get('desviacion', 0.1))}
+                if params['desviacion'] < 0:
+                    raise ValueError
+            elif tipo == 'uniforme':
+                params = {'min': float(spec.get('min', 0.9)), 'max': float(spec.get('max', 1.1))}
+                if params['min'] > params['max']:
+                    raise ValueError
+            else:
+                params = {'min': float(spec.get('min', 0.8)), 'moda': float(spec.get('moda', 1.0)),
+                          'max': float(spec.get('max', 1.2))}
+                if not params['min'] <= params['moda'] <= params['max'] or params['min'] == params['max']:
+                    raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f'{variable}: parámetros no válidos para la distribución {spec["tipo"]}')
+        # La lognormal solo toma valores positivos: su media también debe serlo
+        if tipo == 'lognormal' and not params['media'] > 0:
+            raise ValueError(f'{variable}: la media de una distribución lognormal debe ser mayor que 0')
+        normalizadas[variable] = dict(params, tipo=tipo)
+    return normalizadas
+
+
+def _muestrear(rng, spec, forma):
+    tipo = spec['tipo']
+    if tipo == 'normal':
+        return rng.normal(spec['media'], spec['desviacion'], forma)
+    if tipo == 'lognormal':
+        # Parámetros de la normal subyacente para que el factor tenga la media y desviación pedidas
+        varianza = np.log1p((spec['desviacion'] / spec['media']) ** 2)
+        return rng.lognormal(np.log(spec['media']) - varianza / 2, np.sqrt(varianza), forma)
+    if tipo == 'uniforme':
+        return rng.uniform(spec['min'], spec['max'], forma)
+    return rng.triangular(spec['min'], spec['moda'], spec['max'], forma)
+
+
+def _simular_bloque(base, tasa, distribuciones, n, semilla):
+    """Simula n ensayos y devuelve (VAN, TIR) como vectores."""
+    rng = np.random.default_rng(semilla)
+    parametros = dict(base)
+    for variable, spec in distribuciones.items():
+        clave = VARIABLES[variable]
+        forma = (n, base['anos']) if clave == 'ventas_anos' else n
+        parametros[clave] = np.asarray(base[clave]) * _muestrear(rng, spec, forma)
+
+    flujos = construir_flujos(**parametros)
+    flujos = np.broadcast_to(flujos, (n, flujos.shape[-1]))
+    return calcular_van(tasa, flujos), tir_lote(flujos)
+
+
+def _resumen(valores, bins):
+    valores = valores[np.isfinite(valores)]
+    if valores.size == 0:
+        return None
+    conteos, bordes = np.histogram(valores, bins=bins)
+    return {
+        'media': float(valores.mean()),
+        'desviacion': float(valores.std()),
+        'min': float(valores.min()),
+        'max': float(valores.max()),
+        'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(valores, PERCENTILES))},
+        'histograma': {'conteos': conteos.tolist(), 'bordes': bordes.tolist()},
+    }
+
+
+def simular(resumen, distribuciones, simulaciones=100000, semilla=None, procesos=1, bins=30):
+    """Simula el proyecto y devuelve percentiles, P(VAN < 0) e histogramas de VAN y TIR (%)."""
+    distribuciones = validar_distribuciones(distribuciones)
+    base = resumen.parametros_flujo()
+    if base['ventas_anos'] is None:
+        base['ventas_anos'] = np.zeros(base['anos'])
+        base['con_ventas'] = False
+    tasa = resumen.proyecto['tasa_descuento']
+
+    inicio = time.perf_counter()
+    bloques = [min(TAMANO_BLOQUE, simulaciones - i) for i in range(0, simulaciones, TAMANO_BLOQUE)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(bloques))
+    argumentos = [(base, tasa, distribuciones, n, s) for n, s in zip(bloques, semillas)]
+
+    if procesos > 1 and len(bloques) > 1:
+        # Importación diferida: multiprocessing no se carga al arrancar cada worker
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            partes = list(ejecutor.map(_simular_bloque, *zip(*argumentos)))
+    else:
+        partes = [_simular_bloque(*a) for a in argumentos]
+
+    van = np.concatenate([p[0] for p in partes])
+    tir = np.concatenate([p[1] for p in partes]) * 100
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'simulaciones': simulaciones,
+        'semilla': semilla,
+        'probabilidad_van_negativo': float(np.mean(van < 0)),
+        'tir_no_definida': int(np.count_nonzero(~np.isfinite(tir))),
+        'van': _resumen(van, bins),
+        'tir': _resumen(tir, bins),
+        'segundos': segundos,
+        'simulaciones_por_segundo': simulaciones / segundos if segundos > 0 else None,
+    }
@@ -0,0 +1,374 @@
+"""Partidas de un proyecto (costos, gastos, personal y materiales).
+
+Registro de cada tipo de partida con su tabla y columnas, validación de
+filas, altas/cambios/bajas de una partida e importación masiva desde CSV
+o XLSX. La importación lee el archivo
+fila a fila y las inserta con executemany por lotes dentro de una única
+transacción: o entran todas las filas o ninguna.
+"""
+import csv
+import io
+import os
+import re
+import time
+import zipfile
+from dataclasses import dataclass
+from xml.etree.ElementTree import ParseError
+
+
+@dataclass(frozen=True)
+class TipoPartida:
+    """Tabla de un tipo de partida: columnas de texto y columna numérica."""
+
+    tabla: str
+    textos: tuple
+    numero: str
+    opcionales: tuple = ()
+
+    @property
+    def columnas(self):
+        return self.textos + (self.numero,)
+
+
+PARTIDAS = {
+    'costos': TipoPartida('costos', ('nombre',), 'valor'),
+    'gastos': TipoPartida('gastos', ('nombre',), 'valor'),
+    'personal': TipoPartida('personal', ('nombre', 'perfil'), 'salario_mensual', opcionales=('perfil',)),
+    'materiales': TipoPartida('materiales', ('nombre',), 'valor'),
+}
+
+# Filas por cada executemany y máximo de errores que se informan
+TAMANO_LOTE = 5000
+MAX_ERRORES = 50
+
+
+class ErrorImportacion(ValueError):
+    """Archivo o filas no válidas; `errores` lista los problemas por fila."""
+
+    def __init__(self, mensaje, errores=()):
+        super().__init__(mensaje)
+        self.errores = list(errores)
+
+
+def tipo_partida(nombre):
+    if nombre not in PARTIDAS:
+        raise ErrorImportacion(f'Tipo de partida no válido: {nombre} '
+                               f'(usa {", ".join(PARTIDAS)})')
+    return PARTIDAS[nombre]
+
+
+# Solo puntos de miles ("1.000", "12.345.678"): ambiguo con coma decimal
+_MILES = re.compile(r'\d{1,3}(\.\d{3})+')
+
+
+def _texto_numerico(texto, columna, coma_decimal):
+    """Texto de un número con punto decimal; ValueError si el separador es ambiguo.
+
+    Sin coma_decimal una coma es un error ("1,000" podría ser mil o uno). Con
+    coma_decimal (CSV separado por ';') la coma es el separador decimal, y se
+    rechazan los valores que además llevan puntos o que solo tienen puntos de miles.
+    """
+    texto = texto.strip()
+    if coma_decimal:
+        if (',' in texto and '.' in texto) or _MILES.fullmatch(texto.lstrip('+-')):
+            raise ValueError(f'"{columna}" ambiguo ({texto}): escríbelo sin separador de miles')
+        return texto.replace(',', '.')
+    if ',' in texto:
+        raise ValueError(f'"{columna}" ambiguo ({texto}): usa punto decimal y sin separador de miles')
+    return texto
+
+
+def validar_fila(tipo, fila, coma_decimal=False):
+    """Valores de la fila en el orden de tipo.columnas; lanza ValueError si no es válida.
+
+    coma_decimal: los números de texto usan coma decimal (ver _texto_numerico).
+    """
+    valores = []
+    for columna in tipo.textos:
+        texto = fila.get(columna)
+        texto = str(texto).strip() if texto is not None else ''
+        if not texto and columna not in tipo.opcionales:
+            raise ValueError(f'"{columna}" vacío')
+        valores.append(texto or None)
+
+    numero = fila.get(tipo.numero)
+    if isinstance(numero, str):
+        numero = _texto_numerico(numero, tipo.numero, coma_decimal)
+    try:
+        numero = float(numero)
+    except (TypeError, ValueError):
+        raise ValueError(f'"{tipo.numero}" no es un número')
+    if numero != numero or numero in (float('inf'), float('-inf')) or numero < 0:
+        raise ValueError(f'"{tipo.numero}" debe ser un número no negativo')
+    valores.append(numero)
+    return valores
+
+
+# ==================== ALTAS, CAMBIOS Y BAJAS ====================
+
+def listar(conn, proyecto_id, nombre_tipo):
+    tipo = tipo_partida(nombre_tipo)
+    return conn.execute(f'SELECT * FROM {tipo.tabla} WHERE proyecto_id = ? ORDER BY id',
+                        (proyecto_id,)).fetchall()
+
+
+def obtener(conn, proyecto_id, nombre_tipo, partida_id):
+    tipo = tipo_partida(nombre_tipo)
+    return conn.execute(f'SELECT * FROM {tipo.tabla} WHERE id = ? AND proyecto_id = ?',
+                        (partida_id, proyecto_id)).fetchone()
+
+
+def insertar(conn, proyecto_id, nombre_tipo, fila):
+    """Valida e inserta una partida; devuelve su id (sin commit)."""
+    tipo = tipo_partida(nombre_tipo)
+    valores = validar_fila(tipo, fila)
+    cursor = conn.execute(f'INSERT INTO {tipo.tabla} (proyecto_id, {", ".join(tipo.columnas)}) '
+                          f'VALUES (?, {", ".join("?" for _ in tipo.columnas)})',
+                          [proyecto_id] + valores)
+    return cursor.lastrowid
+
+
+def actualizar(conn, proyecto_id, nombre_tipo, partida_id, fila):
+    """Valida y actualiza una partida del proyecto; devuelve False si no existe (sin commit)."""
+    tipo = tipo_partida(nombre_tipo)
+    valores = validar_fila(tipo, fila)
+    asignaciones = ', '.join(f'{columna} = ?' for columna in tipo.columnas)
+    cursor = conn.execute(f'UPDATE {tipo.tabla} SET {asignaciones} WHERE id = ? AND proyecto_id = ?',
+                          valores + [partida_id, proyecto_id])
+    return cursor.rowcount > 0
+
+
+def eliminar(conn, proyecto_id, nombre_tipo, partida_id):
+    """Borra una partida del proyecto; devuelve False si no existe (sin commit)."""
+    tipo = tipo_partida(nombre_tipo)
+    cursor = conn.execute(f'DELETE FROM {tipo.tabla} WHERE id = ? AND proyecto_id = ?',
+                          (partida_id, proyecto_id))
+    return cursor.rowcount > 0
+
+
+# ==================== OPERACIONES EN LOTE ====================
+
+OPERACIONES = ('insertar', 'actualizar', 'eliminar')
+
+
+class ErrorOperacion(ValueError):
+    """Operación no válida dentro de un lote; `indice` es su posición."""
+
+    def __init__(self, indice, mensaje, estado=400):
+        super().__init__(f'Operación {indice}: {mensaje}')
+        self.indice = indice
+        self.estado = estado
+
+
+def _aplicar(conn, proyecto_id, operacion):
+    if not isinstance(operacion, dict):
+        raise ValueError('debe ser un objeto')
+    accion = operacion.get('op')
+    if accion not in OPERACIONES:
+        raise ValueError(f'"op" debe ser uno de: {", ".join(OPERACIONES)}')
+    tipo = operacion.get('tipo')
+    tipo_partida(tipo)
+    datos = operacion.get('datos') or {}
+    if not isinstance(datos, dict):
+        raise ValueError('"datos" debe ser un objeto')
+
+    if accion == 'insertar':
+        return {'op': accion, 'tipo': tipo, 'id': insertar(conn, proyecto_id, tipo, datos)}
+
+    partida_id = operacion.get('id')
+    # bool es subclase de int: true/false de JSON no son ids
+    if not isinstance(partida_id, int) or isinstance(partida_id, bool):
+        raise ValueError('"id" debe ser un entero')
+    if accion == 'eliminar':
+        encontrada = eliminar(conn, proyecto_id, tipo, partida_id)
+    else:
+        actual = obtener(conn, proyecto_id, tipo, partida_id)
+        # Los campos que no vienen en "datos" conservan su valor
+        encontrada = actual is not None and actualizar(conn, proyecto_id, tipo, partida_id,
+                                                       {**dict(actual), **datos})
+    if not encontrada:
+        raise LookupError(f'{tipo} {partida_id} no existe en el proyecto')
+    return {'op': accion, 'tipo': tipo, 'id': partida_id}
+
+
+def aplicar_lote(conn, proyecto_id, operaciones):
+    """Aplica altas, cambios y bajas de partidas en una sola transacción.
+
+    Si una operación falla se deshacen todas y se lanza ErrorOperacion.
+    Devuelve la lista de operaciones aplicadas con el id de cada partida.
+    """
+    aplicadas = []
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        for indice, operacion in enumerate(operaciones):
+            try:
+                aplicadas.append(_aplicar(conn, proyecto_id, operacion))
+            except LookupError as e:
+                raise ErrorOperacion(indice, str(e), 404)
+            except ValueError as e:
+                raise ErrorOperacion(indice, str(e))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return aplicadas
+
+
+# ==================== LECTURA DE ARCHIVOS ====================
+
+# Codificaciones que se prueban, en orden, en cada línea de un CSV: Excel en
+# español guarda "CSV" en cp1252 (ANSI) y no en UTF-8
+CODIFICACIONES_CSV = ('utf-8', 'cp1252')
+
+
+def _lineas_texto(archivo):
+    """Líneas de un CSV binario decodificadas en UTF-8, o en cp1252 si no lo son.
+
+    Se decodifica línea a línea para no tener que releer el archivo: en cuanto
+    una línea no es UTF-8 válido se usa cp1252 para el resto.
+    """
+    codificaciones = list(CODIFICACIONES_CSV)
+    for numero, linea in enumerate(archivo, start=1):
+        while True:
+            try:
+                texto = linea.decode(codificaciones[0])
+                break
+            except UnicodeDecodeError:
+                if len(codificaciones) == 1:
+                    raise ErrorImportacion(f'Línea {numero}: el archivo no está en UTF-8 ni en '
+                                           f'{CODIFICACIONES_CSV[-1]}; guárdalo como "CSV UTF-8"')
+                codificaciones.pop(0)
+        if numero == 1:
+            texto = texto.lstrip('\ufeff')
+        yield texto
+
+
+class FilasArchivo:
+    """Filas (diccionarios) de un archivo a importar.
+
+    coma_decimal indica que los números usan coma decimal: CSV separado por
+    ';', como lo guarda Excel en español.
+    """
+
+    def __init__(self, filas, coma_decimal=False):
+        self.filas = filas
+        self.coma_decimal = coma_decimal
+
+    def __iter__(self):
+        return iter(self.filas)
+
+
+def _filas_csv(archivo):
+    """Filas de un CSV (binario o texto) sin cargarlo entero; la cabecera se lee ya."""
+    lineas = iter(archivo) if isinstance(archivo, io.TextIOBase) else _lineas_texto(archivo)
+    muestra = next(lineas, '')
+    delimitador = ';' if muestra.count(';') > muestra.count(',') else ','
+    return FilasArchivo(_recorrer_csv(lineas, muestra, delimitador), coma_decimal=delimitador == ';')
+
+
+def _recorrer_csv(lineas, muestra, delimitador):
+    lector = csv.reader(lineas, delimiter=delimitador)
+    try:
+        cabecera = [c.strip().lower() for c in next(csv.reader([muestra], delimiter=delimitador), [])]
+        for valores in lector:
+            if any(v.strip() for v in valores):
+                yield dict(zip(cabecera, valores))
+    except csv.Error as e:
+        raise ErrorImportacion(f'CSV no válido cerca de la línea {lector.line_num + 1}: {e}')
+
+
+def _filas_xlsx(archivo):
+    """Filas de la primera hoja de un XLSX en modo de solo lectura (streaming)."""
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ErrorImportacion('Para importar archivos XLSX instala openpyxl')
+    # Archivo que no es un XLSX (zip) válido o con partes que faltan o están dañadas
+    errores_formato = (zipfile.BadZipFile, InvalidFileException, KeyError, OSError, ParseError)
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except errores_formato as e:
+        raise ErrorImportacion(f'El archivo no es un XLSX válido: {e}')
+    try:
+        if not libro.worksheets:
+            raise ErrorImportacion('El archivo XLSX no tiene hojas')
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        cabecera = [str(c).strip().lower() if c is not None else '' for c in next(filas, ())]
+        for valores in filas:
+            if any(v is not None and str(v).strip() for v in valores):
+                yield dict(zip(cabecera, valores))
+    except errores_formato as e:
+        raise ErrorImportacion(f'El archivo no es un XLSX válido: {e}')
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre_archivo):
+    """Generador de filas según la extensión del archivo (.csv o .xlsx)."""
+    extension = os.path.splitext(nombre_archivo or '')[1].lower()
+    if extension == '.csv':
+        return _filas_csv(archivo)
+    if extension == '.xlsx':
+        return _filas_xlsx(archivo)
+    raise ErrorImportacion('Formato no soportado: usa un archivo .csv o .xlsx')
+
+
+# ==================== IMPORTACIÓN ====================
+
+def importar(conn, proyecto_id, nombre_tipo, filas, tamano_lote=TAMANO_LOTE):
+    """Valida e inserta las filas en una sola transacción.
+
+    Si alguna fila no es válida no se inserta ninguna y se lanza
+    ErrorImportacion con los primeros errores. Devuelve un resumen con
+    filas insertadas, segundos y filas por segundo. Con un FilasArchivo
+    (leer_filas) los números se leen según su coma_decimal.
+    """
+    tipo = tipo_partida(nombre_tipo)
+    coma_decimal = getattr(filas, 'coma_decimal', False)
+    sql = (f'INSERT INTO {tipo.tabla} (proyecto_id, {", ".join(tipo.columnas)}) '
+           f'VALUES (?, {", ".join("?" for _ in tipo.columnas)})')
+
+    inicio = time.perf_counter()
+    insertadas = 0
+    errores = []
+    lote = []
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        # La fila 1 del archivo es la cabecera
+        for numero, fila in enumerate(filas, start=2):
+            try:
+                valores = validar_fila(tipo, fila, coma_decimal)
+            except ValueError as e:
+                errores.append({'fila': numero, 'error': str(e)})
+                if len(errores) >= MAX_ERRORES:
+                    break
+                continue
+            # Con errores ya no se inserta nada: solo se sigue validando
+            if errores:
+                continue
+            lote.append([proyecto_id] + valores)
+            if len(lote) >= tamano_lote:
+                conn.executemany(sql, lote)
+                insertadas += len(lote)
+                lote.clear()
+
+        if errores:
+            cantidad = f'Al menos {MAX_ERRORES}' if len(errores) >= MAX_ERRORES else str(len(errores))
+            raise ErrorImportacion(f'{cantidad} filas no válidas; no se importó ninguna', errores)
+        if lote:
+            conn.executemany(sql, lote)
+            insertadas += len(lote)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'tipo': nombre_tipo,
+        'proyecto_id': proyecto_id,
+        'filas': insertadas,
+        'segundos': segundos,
+        'filas_por_segundo': insertadas / segundos if segundos > 0 else None,
+    }
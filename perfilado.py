@@ -0,0 +1,204 @@
+"""Perfilado de peticiones bajo demanda (Config.PERFILADO).
+
+Una petición se perfila si trae la cabecera PERFILADO_CABECERA (con el
+valor PERFILADO_CLAVE, si está configurada) o si sale elegida en el
+muestreo aleatorio PERFILADO_MUESTREO (fracción del tráfico). Por cada
+petición perfilada se escriben en PERFILADO_DIRECTORIO:
+
+- <nombre>.pstats: cProfile, para `python -m pstats` o snakeviz;
+- <nombre>.folded: pilas muestreadas cada PERFILADO_INTERVALO segundos en
+  formato "a;b;c n", para flamegraph.pl o speedscope;
+- <nombre>.json: metadatos (endpoint, proyecto, versión, filas de cada
+  tabla, duración y estado de la respuesta).
+
+Solo se perfila una petición a la vez por proceso; si ya hay otra en curso
+la nueva se atiende sin perfilar. La respuesta lleva la cabecera X-Perfil
+con el nombre de los archivos.
+"""
+import cProfile
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from flask import current_app, g, request
+
+import consultas
+from database import get_db_connection
+
+_en_curso = threading.Lock()
+_contador = itertools.count(1)
+
+
+# ==================== MUESTREO DE PILAS ====================
+
+class Muestreador(threading.Thread):
+    """Hilo que cuenta las pilas de otro hilo cada `intervalo` segundos."""
+
+    def __init__(self, hilo_id, intervalo):
+        super().__init__(name='perfilado', daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = {}
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo_id)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f'{os.path.basename(codigo.co_filename)}:{codigo.co_name}')
+                marco = marco.f_back
+            if pila:
+                clave = ';'.join(reversed(pila))
+                self.pilas[clave] = self.pilas.get(clave, 0) + 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def folded(self):
+        return ''.join(f'{pila} {n}\n' for pila, n in sorted(self.pilas.items()))
+
+
+class Perfil:
+    """cProfile y muestreo de pilas de la petición en curso."""
+
+    def __init__(self, motivo, intervalo):
+        self.motivo = motivo
+        self.inicio = time.perf_counter()
+        self.perfil = cProfile.Profile()
+        self.muestreador = Muestreador(threading.get_ident(), intervalo)
+
+    def empezar(self):
+        self.muestreador.start()
+        self.perfil.enable()
+
+    def terminar(self):
+        self.perfil.disable()
+        self.muestreador.parar()
+        return time.perf_counter() - self.inicio
+
+
+# ==================== DECISIÓN Y ESCRITURA ====================
+
+def _motivo(config):
+    """'cabecera', 'muestreo' o None si la petición no se perfila."""
+    valor = request.headers.get(config['PERFILADO_CABECERA'])
+    if valor is not None:
+        clave = config.get('PERFILADO_CLAVE')
+        if not clave or valor == clave:
+            return 'cabecera'
+    muestreo = config.get('PERFILADO_MUESTREO', 0.0)
+    if muestreo > 0 and random.random() < muestreo:
+        return 'muestreo'
+    return None
+
+
+def directorio(config):
+    ruta = config.get('PERFILADO_DIRECTORIO') or \
+        os.path.join(os.path.dirname(os.path.abspath(config['DATABASE_PATH'])), 'perfiles')
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+
+def _recortar(ruta, maximo):
+    """Borra los perfiles más antiguos si hay más de `maximo`."""
+    metadatos = sorted((f for f in os.listdir(ruta) if f.endswith('.json')),
+                       key=lambda f: os.path.getmtime(os.path.join(ruta, f)))
+    for archivo in metadatos[:max(0, len(metadatos) - maximo)]:
+        base = archivo[:-len('.json')]
+        for extension in ('.json', '.pstats', '.folded'):
+            try:
+                os.remove(os.path.join(ruta, base + extension))
+            except FileNotFoundError:
+                pass
+
+
+def _metadatos(perfil, segundos, respuesta):
+    datos = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'motivo': perfil.motivo,
+        'endpoint': request.endpoint,
+        'metodo': request.method,
+        'ruta': request.full_path.rstrip('?'),
+        'estado': respuesta.status_code,
+        'segundos': segundos,
+        'muestras': sum(perfil.muestreador.pilas.values()),
+        'intervalo': perfil.muestreador.intervalo,
+        'pid': os.getpid(),
+        'proyecto_id': g.get('proyecto_id'),
+        'version': None,
+        'filas': None,
+    }
+    if datos['proyecto_id'] is not None:
+        conn = get_db_connection()
+        version = g.get('version_proyecto') or consultas.version_proyecto(conn, datos['proyecto_id'])
+        datos['version'] = version.version if version else None
+        datos['filas'] = consultas.contar_filas(conn, datos['proyecto_id'])
+        conn.close()
+    return datos
+
+
+def guardar(perfil, segundos, respuesta, config):
+    """Escribe .pstats, .folded y .json; devuelve el nombre base de los archivos."""
+    ruta = directorio(config)
+    datos = _metadatos(perfil, segundos, respuesta)
+    nombre = '_'.join(str(parte) for parte in (
+        time.strftime('%Y%m%d-%H%M%S'), request.endpoint or 'sin_ruta',
+        datos['proyecto_id'] or 0, os.getpid(), next(_contador)))
+    base = os.path.join(ruta, nombre)
+
+    perfil.perfil.dump_stats(base + '.pstats')
+    with open(base + '.folded', 'w', encoding='utf-8') as archivo:
+        archivo.write(perfil.muestreador.folded())
+    with open(base + '.json', 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+
+    _recortar(ruta, config.get('PERFILADO_MAX_PERFILES', 200))
+    return nombre
+
+
+# ==================== HOOKS DE FLASK ====================
+
+def _iniciar():
+    config = current_app.config
+    motivo = _motivo(config)
+    if motivo is None or not _en_curso.acquire(blocking=False):
+        return
+    perfil = Perfil(motivo, config.get('PERFILADO_INTERVALO', 0.005))
+    g._perfil = perfil
+    perfil.empezar()
+
+
+def _terminar(respuesta):
+    perfil = g.pop('_perfil', None)
+    if perfil is None:
+        return respuesta
+    try:
+        segundos = perfil.terminar()
+        respuesta.headers['X-Perfil'] = guardar(perfil, segundos, respuesta, current_app.config)
+    finally:
+        _en_curso.release()
+    return respuesta
+
+
+def _liberar(excepcion=None):
+    # Si la petición acabó sin pasar por after_request, se suelta el perfil
+    perfil = g.pop('_perfil', None)
+    if perfil is not None:
+        perfil.terminar()
+        _en_curso.release()
+
+
+def init_app(app):
+    """Registra el perfilado si Config.PERFILADO está activo (antes de los demás hooks)."""
+    if not app.config.get('PERFILADO'):
+        return
+    app.before_request(_iniciar)
+    app.after_request(_terminar)
+    app.teardown_request(_liberar)
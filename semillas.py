@@ -0,0 +1,116 @@
+"""Datos sintéticos para pruebas de carga y para dimensionar el despliegue.
+
+Genera proyectos con partidas y ventas de valores plausibles (nombres de
+listas fijas, montos con distribución lognormal y ventas con crecimiento)
+y los inserta con executemany por lotes dentro de una única transacción,
+igual que la importación de partidas. Con la misma semilla se generan
+los mismos datos.
+"""
+import random
+import time
+
+from consultas import PERIODOS_VENTAS
+from partidas import PARTIDAS, TAMANO_LOTE
+
+NOMBRES = {
+    'costos': ('Alquiler', 'Licencias', 'Seguros', 'Transporte', 'Mantenimiento', 'Publicidad'),
+    'gastos': ('Papelería', 'Limpieza', 'Internet', 'Electricidad', 'Agua', 'Viáticos'),
+    'personal': ('Ana', 'Luis', 'María', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Diego'),
+    'materiales': ('Computador', 'Impresora', 'Escritorio', 'Servidor', 'Herramientas', 'Vehículo'),
+}
+PERFILES = ('Técnico', 'Administrativo', 'Ventas', 'Gerencia', 'Operario')
+ACTIVIDADES = ('Comercio', 'Servicios', 'Manufactura', 'Infraestructura', 'Tecnología')
+PRODUCTOS = ('Software', 'Consultoría', 'Mueble', 'Alimento', 'Equipo', 'Curso')
+
+# Mediana del monto de cada tipo de partida y de las unidades vendidas por periodo
+MONTOS = {'costos': 1500, 'gastos': 300, 'personal': 1200, 'materiales': 2500}
+UNIDADES = {'anos': 5000, 'meses': 400, 'semanas': 100, 'dias': 15}
+
+# Cantidades por defecto de cada proyecto
+PARTIDAS_POR_PROYECTO = {'costos': 20, 'gastos': 10, 'personal': 5, 'materiales': 10}
+PERIODOS_POR_PROYECTO = {granularidad: len(nombres) for granularidad, nombres in PERIODOS_VENTAS.items()}
+
+
+def _monto(rng, mediana):
+    return round(rng.lognormvariate(0, 0.6) * mediana, 2)
+
+
+def _proyecto(rng, numero):
+    return (f'Proyecto sintético {numero}', rng.choice(ACTIVIDADES), 1,
+            round(rng.lognormvariate(0, 0.8) * 50000, 2), round(rng.uniform(0.05, 0.2), 3),
+            rng.choice(PRODUCTOS), round(rng.lognormvariate(0, 0.5) * 20, 2))
+
+
+def _partida(rng, tipo, proyecto_id, indice):
+    nombre = f'{rng.choice(NOMBRES[tipo.tabla])} {indice}'
+    textos = (nombre, rng.choice(PERFILES)) if tipo.tabla == 'personal' else (nombre,)
+    return (proyecto_id,) + textos + (_monto(rng, MONTOS[tipo.tabla]),)
+
+
+def _ventas(rng, proyecto_id, granularidad, periodos):
+    unidades = rng.lognormvariate(0, 0.5) * UNIDADES[granularidad]
+    crecimiento = rng.uniform(-0.02, 0.1)
+    for periodo in range(1, periodos + 1):
+        yield proyecto_id, granularidad, periodo, max(0, round(unidades * (1 + crecimiento) ** (periodo - 1)))
+
+
+def sembrar(conn, proyectos, partidas_por_tipo=None, periodos_ventas=None, semilla=None,
+            tamano_lote=TAMANO_LOTE):
+    """Crea `proyectos` proyectos con sus partidas y ventas en una sola transacción.
+
+    partidas_por_tipo: {'costos': n, ...} partidas de cada tipo por proyecto.
+    periodos_ventas: {'anos': n, ...} periodos de ventas de cada granularidad.
+    Devuelve un resumen con los ids creados, filas insertadas y segundos.
+    """
+    partidas_por_tipo = {**PARTIDAS_POR_PROYECTO, **(partidas_por_tipo or {})}
+    periodos_ventas = {**PERIODOS_POR_PROYECTO, **(periodos_ventas or {})}
+    rng = random.Random(semilla)
+
+    sentencias = {nombre: f'INSERT INTO {tipo.tabla} (proyecto_id, {", ".join(tipo.columnas)}) '
+                          f'VALUES (?, {", ".join("?" for _ in tipo.columnas)})'
+                  for nombre, tipo in PARTIDAS.items()}
+    sentencias['ventas'] = ('INSERT INTO ventas (proyecto_id, granularidad, periodo, unidades) '
+                            'VALUES (?, ?, ?, ?)')
+    lotes = {nombre: [] for nombre in sentencias}
+    filas = dict.fromkeys(sentencias, 0)
+
+    def vaciar(nombre):
+        conn.executemany(sentencias[nombre], lotes[nombre])
+        filas[nombre] += len(lotes[nombre])
+        lotes[nombre].clear()
+
+    inicio = time.perf_counter()
+    ids = []
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        for numero in range(1, proyectos + 1):
+            cursor = conn.execute('INSERT INTO proyectos (nombre, tipo_actividad, tiene_inversion, '
+                                  'valor_inversion, tasa_descuento, nombre_producto, precio_producto) '
+                                  'VALUES (?, ?, ?, ?, ?, ?, ?)', _proyecto(rng, numero))
+            proyecto_id = cursor.lastrowid
+            ids.append(proyecto_id)
+
+            for nombre, tipo in PARTIDAS.items():
+                lotes[nombre].extend(_partida(rng, tipo, proyecto_id, i)
+                                     for i in range(1, partidas_por_tipo[nombre] + 1))
+            for granularidad, periodos in periodos_ventas.items():
+                lotes['ventas'].extend(_ventas(rng, proyecto_id, granularidad, periodos))
+
+            for nombre, lote in lotes.items():
+                if len(lote) >= tamano_lote:
+                    vaciar(nombre)
+        for nombre in lotes:
+            vaciar(nombre)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    segundos = time.perf_counter() - inicio
+    total = len(ids) + sum(filas.values())
+    return {
+        'proyectos': ids,
+        'filas': filas,
+        'segundos': segundos,
+        'filas_por_segundo': total / segundos if segundos > 0 else None,
+    }
@@ -0,0 +1,85 @@
+"""Análisis de sensibilidad del VAN calculado de una sola vez con NumPy.
+
+La malla evalúa el VAN para todas las combinaciones tasa de descuento ×
+factor sobre una variable (precio o volumen de ventas) en una única
+operación sobre la matriz de flujos, en lugar de llamar a calcular_van
+desde la plantilla por cada tasa.
+"""
+import numpy as np
+
+from finanzas import calcular_van, construir_flujos
+
+# Tasas de la tabla "Variación del VAN con la Tasa de Descuento"
+TASAS = (0.05, 0.10, 0.15, 0.20)
+# Factores aplicados a la variable de la malla (±20 %)
+FACTORES = (0.8, 0.9, 1.0, 1.1, 1.2)
+
+# Variables de la malla: nombre -> clave de construir_flujos()
+VARIABLES = {
+    'precio': 'precio',
+    'ventas': 'ventas_anos',
+}
+# Variables del tornado: nombre -> clave de construir_flujos()
+VARIABLES_TORNADO = {
+    'precio': 'precio',
+    'ventas': 'ventas_anos',
+    'costos': 'costos',
+    'gastos': 'gastos',
+    'salarios': 'salarios',
+    'inversion': 'inversion',
+}
+
+
+def _flujos_con_factores(base, clave, factores):
+    """Matriz de flujos (una fila por factor) escalando `clave` de los parámetros base."""
+    parametros = dict(base)
+    if parametros['ventas_anos'] is None:
+        parametros['ventas_anos'] = np.zeros(parametros['anos'])
+        parametros['con_ventas'] = False
+    factores = np.asarray(factores, dtype=float)
+    valor = np.asarray(parametros[clave], dtype=float)
+    parametros[clave] = valor * (factores[:, None] if clave == 'ventas_anos' else factores)
+    return construir_flujos(**parametros)
+
+
+def tabla_tasas(flujos, tasas=TASAS):
+    """VAN de los flujos actuales para cada tasa: [{'tasa', 'van'}, ...]."""
+    vanes = calcular_van(np.asarray(tasas, dtype=float), flujos)
+    return [{'tasa': float(t), 'van': float(v)} for t, v in zip(tasas, np.atleast_1d(vanes))]
+
+
+def malla(base, variable='precio', tasas=TASAS, factores=FACTORES):
+    """VAN para cada tasa (filas) × factor sobre la variable (columnas)."""
+    if variable not in VARIABLES:
+        raise ValueError(f'Variable no válida: {variable}')
+    flujos = _flujos_con_factores(base, VARIABLES[variable], factores)
+    vanes = calcular_van(np.asarray(tasas, dtype=float)[:, None], flujos)
+    return {
+        'variable': variable,
+        'tasas': [float(t) for t in tasas],
+        'factores': [float(f) for f in factores],
+        'van': np.asarray(vanes).tolist(),
+    }
+
+
+def tornado(base, tasa, variacion=0.1):
+    """VAN con cada variable a -variacion y +variacion, ordenado por impacto."""
+    filas = []
+    for nombre, clave in VARIABLES_TORNADO.items():
+        flujos = _flujos_con_factores(base, clave, (1 - variacion, 1 + variacion))
+        bajo, alto = calcular_van(tasa, flujos)
+        filas.append({'variable': nombre, 'van_bajo': float(bajo), 'van_alto': float(alto),
+                      'impacto': float(abs(alto - bajo))})
+    return sorted(filas, key=lambda fila: fila['impacto'], reverse=True)
+
+
+def analizar(resumen, flujos):
+    """Todo el análisis de sensibilidad que muestra la página de resultados."""
+    base = resumen.parametros_flujo()
+    tasa = resumen.proyecto['tasa_descuento']
+    return {
+        'tabla': tabla_tasas(flujos),
+        'malla_precio': malla(base, 'precio'),
+        'malla_ventas': malla(base, 'ventas'),
+        'tornado': tornado(base, tasa),
+    }
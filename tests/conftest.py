@@ -0,0 +1,33 @@
+import pytest
+
+import database
+from app import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicación con una base nueva en un directorio temporal."""
+    return create_app({'TESTING': True, 'DATABASE_PATH': str(tmp_path / 'pep.db')})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def conn(app):
+    """Conexión propia a la base de la aplicación (fuera del pool)."""
+    with app.app_context():
+        conexion = database.abrir_conexion()
+    yield conexion
+    conexion.close()
+
+
+@pytest.fixture
+def proyecto(conn):
+    """Id de un proyecto con inversión, precio y tasa de descuento."""
+    cursor = conn.execute('INSERT INTO proyectos (nombre, tiene_inversion, valor_inversion, '
+                          'tasa_descuento, precio_producto) VALUES (?, 1, 10000, 0.1, 5)', ('Prueba',))
+    conn.commit()
+    return cursor.lastrowid
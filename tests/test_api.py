@@ -0,0 +1,72 @@
+import pytest
+
+
+def test_crud_de_proyecto(client):
+    respuesta = client.post('/api/proyectos', json={'nombre': 'Panadería', 'precio_producto': 2.5})
+    assert respuesta.status_code == 201
+    proyecto = respuesta.get_json()['proyecto']
+    assert proyecto['tasa_descuento'] == 0.001
+    ruta = f"/api/proyectos/{proyecto['id']}"
+
+    assert client.get(ruta).get_json()['proyecto']['nombre'] == 'Panadería'
+    cambiado = client.patch(ruta, json={'tasa_descuento': 0.12}).get_json()['proyecto']
+    assert cambiado['tasa_descuento'] == 0.12
+    assert cambiado['precio_producto'] == 2.5
+
+    assert client.post('/api/proyectos', json={'precio_producto': 1}).status_code == 400
+    assert client.patch(ruta, json={'precio_producto': 'caro'}).status_code == 400
+
+    assert client.delete(ruta).status_code == 204
+    assert client.get(ruta).status_code == 404
+
+
+def test_crud_de_partidas_con_totales(client, proyecto):
+    base = f'/api/proyectos/{proyecto}/costos'
+    respuesta = client.post(base, json={'nombre': 'Horno', 'valor': 500})
+    assert respuesta.status_code == 201
+    partida = respuesta.get_json()['partida']
+    assert respuesta.get_json()['totales']['costos'] == 500
+
+    respuesta = client.patch(f"{base}/{partida['id']}", json={'valor': 650})
+    assert respuesta.get_json()['partida']['nombre'] == 'Horno'
+    assert respuesta.get_json()['totales']['costos'] == 650
+    assert [p['valor'] for p in client.get(base).get_json()['costos']] == [650]
+
+    assert client.post(base, json={'nombre': 'Mesa', 'valor': -1}).status_code == 400
+    assert client.get(f'/api/proyectos/{proyecto}/equipos').status_code == 404
+
+    respuesta = client.delete(f"{base}/{partida['id']}")
+    assert respuesta.get_json()['totales']['costos'] == 0
+    assert client.get(f"{base}/{partida['id']}").status_code == 404
+    assert client.delete(f"{base}/{partida['id']}").status_code == 404
+
+
+def test_listado_paginado_por_clave(client):
+    ids = [client.post('/api/proyectos', json={'nombre': f'P{i}'}).get_json()['proyecto']['id']
+           for i in range(5)]
+    vistos, antes = [], None
+    while True:
+        consulta = '?limite=2' + (f'&antes={antes}' if antes is not None else '')
+        pagina = client.get('/api/proyectos' + consulta).get_json()
+        assert len(pagina['proyectos']) <= 2
+        vistos += [p['id'] for p in pagina['proyectos']]
+        antes = pagina['siguiente']
+        if antes is None:
+            break
+    assert vistos == ids[::-1]
+
+
+@pytest.mark.parametrize('consulta', ['limite=-3', 'limite=0', 'limite=x', 'limite=1.5', 'antes=x',
+                                      f'antes={2 ** 70}'])
+def test_listado_parametros_no_validos(client, proyecto, consulta):
+    respuesta = client.get(f'/api/proyectos?{consulta}')
+    assert respuesta.status_code == 400
+    assert 'error' in respuesta.get_json()
+
+
+def test_listado_limite_maximo(client, conn):
+    conn.executemany('INSERT INTO proyectos (nombre) VALUES (?)', [(f'P{i}',) for i in range(1005)])
+    conn.commit()
+    pagina = client.get('/api/proyectos?limite=5000').get_json()
+    assert len(pagina['proyectos']) == 1000
+    assert pagina['siguiente'] is not None
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cache
+import database
+from app import create_app
+
+
+def test_aplicaciones_independientes(tmp_path):
+    a = create_app({'TESTING': True, 'DATABASE_PATH': str(tmp_path / 'a.db'), 'METRICAS': True})
+    b = create_app({'TESTING': True, 'DATABASE_PATH': str(tmp_path / 'b.db')})
+
+    respuesta = a.test_client().post('/api/proyectos', json={'nombre': 'Solo en A'})
+    assert respuesta.status_code == 201
+    assert len(a.test_client().get('/api/proyectos').get_json()['proyectos']) == 1
+    assert b.test_client().get('/api/proyectos').get_json()['proyectos'] == []
+
+    with a.app_context():
+        pool_a, cache_a = database.get_pool(), cache.get_cache()
+    with b.app_context():
+        pool_b, cache_b = database.get_pool(), cache.get_cache()
+    assert pool_a is not pool_b
+    assert cache_a is not cache_b
+
+    # Métricas solo en la aplicación que las activó
+    assert a.test_client().get('/metrics').status_code == 200
+    assert b.test_client().get('/metrics').status_code == 404
+
+
+def test_resultados_del_proyecto(client, proyecto):
+    respuesta = client.get(f'/api/proyectos/{proyecto}/resultados')
+    assert respuesta.status_code == 200
+    assert 'van' in respuesta.get_json()['calculos']
+
+
+@pytest.mark.parametrize('proyecto_id', [None, 'x', True, [1], 1.5])
+def test_escenarios_exige_proyecto_id_entero(client, proyecto, proyecto_id):
+    cuerpo = {'escenarios': [{'precio_producto': 1.1}]}
+    if proyecto_id is not None:
+        cuerpo['proyecto_id'] = proyecto_id
+    assert client.post('/api/escenarios', json=cuerpo).status_code == 400
+
+
+def test_escenarios_por_ruta_del_proyecto(client, proyecto):
+    cuerpo = {'escenarios': [{'precio_producto': 1.1}]}
+    assert client.post(f'/api/proyectos/{proyecto}/escenarios', json=cuerpo).status_code == 200
+    assert client.post(f'/api/escenarios', json={**cuerpo, 'proyecto_id': proyecto}).status_code == 200
+    assert client.post(f'/api/proyectos/{proyecto + 1}/escenarios', json=cuerpo).status_code == 404
+    assert client.get(f'/api/proyectos/{proyecto}/sensibilidad').status_code == 200
+    assert client.get(f'/api/proyectos/{proyecto + 1}/sensibilidad').status_code == 404
+
+
+def test_montecarlo_rechaza_lognormal_con_media_cero(client, proyecto):
+    cuerpo = {'simulaciones': 100, 'distribuciones': {'precio_producto': {'tipo': 'lognormal', 'media': 0}}}
+    respuesta = client.post(f'/api/proyectos/{proyecto}/montecarlo', json=cuerpo)
+    assert respuesta.status_code == 400
+
+
+CODIGO_ARRANQUE = '''
+import sys
+import app
+aplicacion = app.create_app({'DATABASE_PATH': sys.argv[1]})
+print('numpy' in sys.modules)
+cliente = aplicacion.test_client()
+proyecto = cliente.post('/api/proyectos', json={'nombre': 'p', 'precio_producto': 1}).get_json()['proyecto']
+print('numpy' in sys.modules)
+cliente.get(f"/api/proyectos/{proyecto['id']}/resultados")
+print('numpy' in sys.modules)
+'''
+
+
+def test_arranque_no_carga_numpy(tmp_path):
+    # Proceso nuevo: NumPy llega con el primer cálculo, no con import app + create_app()
+    salida = subprocess.run([sys.executable, '-c', CODIGO_ARRANQUE, str(tmp_path / 'pep.db')],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            check=True, capture_output=True, text=True)
+    assert salida.stdout.split() == ['False', 'False', 'True']
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from calculos import MAX_PASOS_INCREMENTALES, calcular_estado
+from exportacion import _indicadores_lote
+
+PARAMETROS = {
+    'inversion': 10000.0,
+    'precio': 5.0,
+    'ventas_anos': np.array([1000, 1100, 1200, 1300, 1400, 1500, 1600], dtype=float),
+    'costos': 700.0,
+    'gastos': 350.0,
+    'salarios': 100.0,
+    'anos': 7,
+}
+
+
+def _comparar(estado, completo):
+    np.testing.assert_allclose(estado.flujos, completo.flujos)
+    assert estado.van == pytest.approx(completo.van)
+    assert estado.tir.tasa == pytest.approx(completo.tir.tasa)
+
+
+def test_recalculo_incremental_igual_al_completo():
+    estado = calcular_estado(PARAMETROS, 0.1)
+    for i, (clave, valor) in enumerate([('costos', 900.0), ('salarios', 250.0), ('gastos', 0.0),
+                                        ('costos', 0.0), ('salarios', 80.5)], start=1):
+        parametros = {**estado.parametros, clave: valor}
+        estado = calcular_estado(parametros, 0.1, estado)
+        assert estado.pasos == i
+        _comparar(estado, calcular_estado(parametros, 0.1))
+
+
+def test_recalculo_completo_si_cambian_ventas_o_tasa():
+    anterior = calcular_estado(PARAMETROS, 0.1)
+    parametros = {**PARAMETROS, 'ventas_anos': PARAMETROS['ventas_anos'] * 2}
+    assert calcular_estado(parametros, 0.1, anterior).pasos == 0
+    assert calcular_estado(PARAMETROS, 0.2, anterior).pasos == 0
+
+
+def test_recalculo_completo_tras_max_pasos():
+    estado = calcular_estado(PARAMETROS, 0.1)
+    for i in range(MAX_PASOS_INCREMENTALES + 1):
+        estado = calcular_estado({**estado.parametros, 'costos': 700.0 + i + 1}, 0.1, estado)
+    assert estado.pasos == 0
+
+
+class _Resumen:
+    def __init__(self, parametros, tasa):
+        self._parametros = parametros
+        self.proyecto = {'tasa_descuento': tasa}
+
+    def parametros_flujo(self):
+        return self._parametros
+
+
+def test_tir_exportada_igual_a_la_de_la_pagina():
+    # Flujos -100, 230, -132 (dos TIR) y un proyecto sin inversión (sin TIR),
+    # con horizontes distintos: la exportación completa con ceros hasta 7 años
+    dos_raices = {**PARAMETROS, 'inversion': 100.0, 'precio': 1.0, 'anos': 2,
+                  'ventas_anos': np.array([362.0, 0.0]), 'costos': 0.0, 'gastos': 0.0, 'salarios': 11.0}
+    sin_tir = {**PARAMETROS, 'inversion': 0.0}
+    resumenes = [_Resumen(p, 0.1) for p in (PARAMETROS, dos_raices, sin_tir)]
+    tir = _indicadores_lote(resumenes)[3]
+    for i, resumen in enumerate(resumenes):
+        pagina = calcular_estado(resumen.parametros_flujo(), 0.1).tir.tasa
+        if pagina is None:
+            assert np.isnan(tir[i])
+        else:
+            assert tir[i] == pytest.approx(pagina * 100)
@@ -0,0 +1,47 @@
+import partidas
+
+
+def test_etag_y_304(client, proyecto):
+    ruta = f'/proyectos/{proyecto}/viabilidad-tecnica'
+    respuesta = client.get(ruta)
+    assert respuesta.status_code == 200
+    etag = respuesta.headers['ETag']
+    assert etag.startswith('W/')
+    assert respuesta.last_modified is not None
+    assert 'no-cache' in respuesta.headers['Cache-Control']
+
+    repetida = client.get(ruta, headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b''
+    assert repetida.headers['ETag'] == etag
+
+    # Cada página tiene su ETag aunque la versión de datos sea la misma
+    otra = client.get(f'/proyectos/{proyecto}/viabilidad-operativa')
+    assert otra.headers['ETag'] != etag
+
+
+def test_escritura_invalida_el_etag(client, conn, proyecto):
+    ruta = f'/proyectos/{proyecto}/resultados/calculos-financieros'
+    etag = client.get(ruta).headers['ETag']
+    partidas.insertar(conn, proyecto, 'costos', {'nombre': 'Horno', 'valor': 500})
+    conn.commit()
+
+    respuesta = client.get(ruta, headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers['ETag'] != etag
+
+
+def test_if_modified_since(client, proyecto):
+    ruta = f'/proyectos/{proyecto}/flujos-caja'
+    modificado = client.get(ruta).headers['Last-Modified']
+    assert client.get(ruta, headers={'If-Modified-Since': modificado}).status_code == 304
+    # If-None-Match manda sobre If-Modified-Since
+    respuesta = client.get(ruta, headers={'If-Modified-Since': modificado, 'If-None-Match': 'W/"otro"'})
+    assert respuesta.status_code == 200
+
+
+def test_con_mensajes_flash_no_hay_etag(client, proyecto):
+    client.post(f'/proyectos/{proyecto}/agregar-costo', data={'nombre_costo': 'Horno', 'valor_costo': '500'})
+    respuesta = client.get(f'/proyectos/{proyecto}/viabilidad-tecnica')
+    assert respuesta.status_code == 200
+    assert 'ETag' not in respuesta.headers
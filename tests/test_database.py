@@ -0,0 +1,48 @@
+import pytest
+
+import database
+from app import create_app
+
+
+def test_conexion_reutilizada_entre_peticiones(app, client, proyecto):
+    for _ in range(5):
+        assert client.get(f'/api/proyectos/{proyecto}').status_code == 200
+    with app.app_context():
+        estadisticas = database.get_pool().estadisticas()
+    assert estadisticas['creadas'] == 1
+    assert estadisticas['en_uso'] == 0
+    assert estadisticas['aciertos'] >= 4
+
+
+def test_misma_conexion_dentro_del_contexto(app):
+    with app.app_context():
+        conn = database.get_db_connection()
+        assert database.get_db_connection() is conn
+        conn.close()
+        # Cerrada vuelve al pool y la siguiente la reutiliza
+        assert database.get_db_connection() is conn
+
+
+def test_liberar_deshace_la_transaccion_abierta(app, proyecto):
+    with app.app_context():
+        conn = database.get_db_connection()
+        conn.execute("UPDATE proyectos SET nombre = 'sin commit' WHERE id = ?", (proyecto,))
+        assert conn.in_transaction
+        conn.close()
+        conn = database.get_db_connection()
+        assert not conn.in_transaction
+        nombre = conn.execute('SELECT nombre FROM proyectos WHERE id = ?', (proyecto,)).fetchone()[0]
+        assert nombre == 'Prueba'
+
+
+def test_pool_agotado(tmp_path):
+    app = create_app({'TESTING': True, 'DATABASE_PATH': str(tmp_path / 'pep.db'),
+                      'DB_POOL_TAMANO': 1, 'DB_POOL_ESPERA': 0.01})
+    with app.app_context():
+        pool = database.get_pool()
+        ocupada = pool.obtener()
+        with pytest.raises(RuntimeError):
+            pool.obtener()
+        assert pool.estadisticas()['agotado'] == 1
+        pool.liberar(ocupada)
+        assert pool.obtener() is ocupada
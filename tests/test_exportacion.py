@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+
+import pytest
+
+import database
+import exportacion
+import partidas
+
+
+def _leer_csv(texto):
+    return list(csv.DictReader(io.StringIO(texto)))
+
+
+@pytest.fixture
+def costos(conn, proyecto):
+    for i in range(5):
+        partidas.insertar(conn, proyecto, 'costos', {'nombre': f'c{i}', 'valor': 10 * (i + 1)})
+    conn.commit()
+
+
+def test_exportar_tabla_csv(client, proyecto, costos):
+    respuesta = client.get('/api/exportar/costos.csv')
+    assert respuesta.status_code == 200
+    assert respuesta.is_streamed
+    assert respuesta.headers['Content-Disposition'] == 'attachment; filename=costos.csv'
+    filas = _leer_csv(respuesta.get_data(as_text=True))
+    assert [(f['nombre'], float(f['valor'])) for f in filas] == [(f'c{i}', 10.0 * (i + 1)) for i in range(5)]
+
+
+def test_exportar_tabla_jsonl_de_un_proyecto(client, conn, proyecto, costos):
+    otro = conn.execute("INSERT INTO proyectos (nombre) VALUES ('otro')").lastrowid
+    partidas.insertar(conn, otro, 'costos', {'nombre': 'ajeno', 'valor': 1})
+    conn.commit()
+    texto = client.get(f'/api/exportar/costos.jsonl?proyecto_id={proyecto}').get_data(as_text=True)
+    filas = [json.loads(linea) for linea in texto.splitlines()]
+    assert len(filas) == 5
+    assert {f['proyecto_id'] for f in filas} == {proyecto}
+
+
+def test_exportar_por_bloques_en_una_foto_consistente(app, conn, proyecto, costos, monkeypatch):
+    monkeypatch.setattr(exportacion, 'FILAS_POR_LECTURA', 2)
+    with app.app_context():
+        bloques = exportacion.exportar_tabla(database.abrir_conexion(), 'costos', 'csv')
+        texto = next(bloques) + next(bloques)
+        # Lo que se escribe después de empezar no entra en la exportación
+        partidas.insertar(conn, proyecto, 'costos', {'nombre': 'tarde', 'valor': 1})
+        conn.commit()
+        restantes = list(bloques)
+    assert len(restantes) == 2  # filas 3-4 y fila 5
+    filas = _leer_csv(texto + ''.join(restantes))
+    assert [f['nombre'] for f in filas] == [f'c{i}' for i in range(5)]
+
+
+def test_exportar_indicadores(client, conn, proyecto, costos):
+    conn.execute("INSERT INTO proyectos (nombre, tasa_descuento, horizonte) VALUES ('corto', 0.1, 3)")
+    conn.commit()
+    filas = _leer_csv(client.get('/api/exportar/indicadores.csv').get_data(as_text=True))
+    assert [f['nombre'] for f in filas] == ['Prueba', 'corto']
+    # Columnas flujo_0..flujo_7; las que pasan del horizonte quedan vacías
+    assert filas[1]['flujo_3'] != '' and filas[1]['flujo_4'] == ''
+
+    resultados = client.get(f'/api/proyectos/{proyecto}/resultados').get_json()['calculos']
+    assert float(filas[0]['van']) == pytest.approx(resultados['van'])
+
+
+@pytest.mark.parametrize('ruta, estado', [
+    ('/api/exportar/costos.xml', 400),
+    ('/api/exportar/usuarios.csv', 404),
+    ('/api/exportar/costos.csv?proyecto_id=x', 400),
+])
+def test_exportar_parametros_no_validos(client, ruta, estado):
+    assert client.get(ruta).status_code == estado
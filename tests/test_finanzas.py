@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from finanzas import calcular_van, resolver_tir, tir_lote, ventas_anuales
+
+
+def test_tir_flujos_convencionales():
+    flujos = [-1000, 300, 400, 500]
+    resultado = resolver_tir(flujos)
+    assert resultado.convergio
+    assert resultado.cambios_signo == 1
+    assert not resultado.multiple
+    assert calcular_van(resultado.tasa, flujos) == pytest.approx(0, abs=1e-8)
+
+
+def test_tir_sin_cambio_de_signo():
+    resultado = resolver_tir([100, 200, 300])
+    assert resultado.tasa is None
+    assert not resultado.convergio
+    assert resultado.cambios_signo == 0
+
+
+def test_tir_multiples_raices():
+    # -100 + 230 / (1 + r) - 132 / (1 + r)^2 = 0 en r = 10 % y r = 20 %
+    resultado = resolver_tir([-100, 230, -132])
+    assert resultado.multiple
+    assert resultado.cambios_signo == 2
+    assert resultado.tasas == pytest.approx((0.1, 0.2))
+    assert min(abs(resultado.tasa - tasa) for tasa in resultado.tasas) < 1e-9
+
+
+def test_tir_recurre_a_brent_si_newton_no_converge():
+    # Desde una semilla lejana Newton se sale del intervalo válido
+    flujos = [-1000, 0, 0, 0, 0, 0, 0, 0, 0, 0, 5000]
+    resultado = resolver_tir(flujos, semilla=9.5)
+    assert resultado.convergio
+    assert calcular_van(resultado.tasa, flujos) == pytest.approx(0, abs=1e-6)
+
+
+def test_tir_lote_coincide_con_resolver_tir():
+    flujos = np.array([[-1000, 300, 400, 500], [-500, 100, 100, 600], [100, 200, 300, 400]], dtype=float)
+    tasas = tir_lote(flujos)
+    assert tasas[0] == pytest.approx(resolver_tir(flujos[0]).tasa)
+    assert tasas[1] == pytest.approx(resolver_tir(flujos[1]).tasa)
+    assert np.isnan(tasas[2])
+
+
+@pytest.mark.parametrize('granularidad, serie, por_ano', [
+    ('dias', [10] * 7, 3650),                  # la semana, 365 días
+    ('dias', [700, 0, 0, 0, 0, 0, 0], 53 * 700),
+    ('semanas', [20, 14, 15, 12], 13 * 61),
+    ('meses', [100] * 12, 1200),
+    ('meses', [100] * 7, 700),                 # enero..julio: los demás meses valen 0
+])
+def test_ventas_anuales_repite_el_patron_en_el_horizonte(granularidad, serie, por_ano):
+    assert ventas_anuales(serie, granularidad, 5).tolist() == [por_ano] * 5
+    matriz = ventas_anuales([serie, [2 * v for v in serie]], granularidad, 3)
+    assert matriz.tolist() == [[por_ano] * 3, [2 * por_ano] * 3]
+
+
+def test_ventas_anuales_consecutivas():
+    assert ventas_anuales([1, 2, 3], 'anos', 5).tolist() == [1, 2, 3, 0, 0]
+    assert ventas_anuales([1, 2, 3], 'anos', 2).tolist() == [1, 2]
+    # Más de un año de meses: periodos consecutivos, el último año incompleto
+    assert ventas_anuales([1] * 18, 'meses', 3).tolist() == [12, 6, 0]
@@ -0,0 +1,61 @@
+import pytest
+
+import montecarlo
+from consultas import ResumenProyecto
+from montecarlo import validar_distribuciones
+
+RESUMEN = ResumenProyecto(
+    proyecto={'tiene_inversion': 1, 'valor_inversion': 10000, 'precio_producto': 5, 'tasa_descuento': 0.1},
+    costos=700, gastos=350, salarios=100, ventas={'anos': (1000, 1100, 1200, 1300, 1400, 1500, 1600)})
+
+DISTRIBUCIONES = {
+    'precio_producto': {'tipo': 'normal', 'media': 1.0, 'desviacion': 0.1},
+    'ventas_anos': {'tipo': 'triangular', 'min': 0.7, 'moda': 1.0, 'max': 1.2},
+}
+
+
+def test_distribuciones_validas():
+    normalizadas = validar_distribuciones({
+        'precio_producto': {'tipo': 'lognormal', 'media': 1.0, 'desviacion': 0.2},
+        'costos': {'tipo': 'triangular', 'min': 0.9, 'moda': 1.0, 'max': 1.3},
+    })
+    assert set(normalizadas) == {'precio_producto', 'costos'}
+
+
+@pytest.mark.parametrize('media', [0, -1.5, float('nan')])
+def test_lognormal_con_media_no_positiva(media):
+    with pytest.raises(ValueError, match='mayor que 0'):
+        validar_distribuciones({'precio_producto': {'tipo': 'lognormal', 'media': media}})
+
+
+def test_normal_admite_media_negativa():
+    validar_distribuciones({'precio_producto': {'tipo': 'normal', 'media': -1.0}})
+
+
+@pytest.mark.parametrize('spec', [
+    {'tipo': 'normal', 'desviacion': -1},
+    {'tipo': 'uniforme', 'min': 2, 'max': 1},
+    {'tipo': 'triangular', 'min': 1, 'moda': 1, 'max': 1},
+    {'tipo': 'beta'},
+])
+def test_parametros_no_validos(spec):
+    with pytest.raises(ValueError):
+        validar_distribuciones({'precio_producto': spec})
+
+
+def _sin_tiempos(resultado):
+    return {clave: valor for clave, valor in resultado.items()
+            if clave not in ('segundos', 'simulaciones_por_segundo')}
+
+
+def test_semilla_fija_reproducible_con_varios_procesos(monkeypatch):
+    # Bloques pequeños para que haya varios que repartir entre procesos
+    monkeypatch.setattr(montecarlo, 'TAMANO_BLOQUE', 500)
+    un_proceso = montecarlo.simular(RESUMEN, DISTRIBUCIONES, simulaciones=2000, semilla=42)
+    dos_procesos = montecarlo.simular(RESUMEN, DISTRIBUCIONES, simulaciones=2000, semilla=42, procesos=2)
+    assert _sin_tiempos(un_proceso) == _sin_tiempos(dos_procesos)
+    assert _sin_tiempos(montecarlo.simular(RESUMEN, DISTRIBUCIONES, simulaciones=2000, semilla=42)) \
+        == _sin_tiempos(un_proceso)
+
+    otra_semilla = montecarlo.simular(RESUMEN, DISTRIBUCIONES, simulaciones=2000, semilla=43)
+    assert otra_semilla['van'] != un_proceso['van']
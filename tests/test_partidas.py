@@ -0,0 +1,148 @@
+import io
+
+import pytest
+
+import consultas
+import partidas
+
+
+def _costos(conn, proyecto):
+    return [(fila['nombre'], fila['valor']) for fila in partidas.listar(conn, proyecto, 'costos')]
+
+
+# ==================== OPERACIONES EN LOTE ====================
+
+def test_aplicar_lote(conn, proyecto):
+    partida = partidas.insertar(conn, proyecto, 'costos', {'nombre': 'Horno', 'valor': 500})
+    conn.commit()
+    aplicadas = partidas.aplicar_lote(conn, proyecto, [
+        {'op': 'insertar', 'tipo': 'costos', 'datos': {'nombre': 'Mesa', 'valor': 120}},
+        {'op': 'actualizar', 'tipo': 'costos', 'id': partida, 'datos': {'valor': 450}},
+        {'op': 'insertar', 'tipo': 'gastos', 'datos': {'nombre': 'Luz', 'valor': 30}},
+    ])
+    assert [a['op'] for a in aplicadas] == ['insertar', 'actualizar', 'insertar']
+    assert sorted(_costos(conn, proyecto)) == [('Horno', 450), ('Mesa', 120)]
+    assert consultas.leer_totales(conn, proyecto)['costos'] == 570
+
+
+def test_aplicar_lote_deshace_todo_si_una_operacion_falla(conn, proyecto):
+    partida = partidas.insertar(conn, proyecto, 'costos', {'nombre': 'Horno', 'valor': 500})
+    conn.commit()
+    totales = consultas.leer_totales(conn, proyecto)
+
+    with pytest.raises(partidas.ErrorOperacion) as error:
+        partidas.aplicar_lote(conn, proyecto, [
+            {'op': 'insertar', 'tipo': 'costos', 'datos': {'nombre': 'Mesa', 'valor': 120}},
+            {'op': 'eliminar', 'tipo': 'costos', 'id': partida},
+            {'op': 'eliminar', 'tipo': 'costos', 'id': partida + 100},
+        ])
+    assert error.value.indice == 2
+    assert error.value.estado == 404
+    assert _costos(conn, proyecto) == [('Horno', 500)]
+    assert consultas.leer_totales(conn, proyecto) == totales
+
+    with pytest.raises(partidas.ErrorOperacion) as error:
+        partidas.aplicar_lote(conn, proyecto, [{'op': 'insertar', 'tipo': 'costos', 'datos': {'valor': 'x'}}])
+    assert error.value.estado == 400
+
+
+@pytest.mark.parametrize('partida_id', [True, False, '1', 1.0, None])
+def test_aplicar_lote_id_no_entero(conn, proyecto, partida_id):
+    partidas.insertar(conn, proyecto, 'costos', {'nombre': 'Horno', 'valor': 500})
+    conn.commit()
+    with pytest.raises(partidas.ErrorOperacion, match='entero') as error:
+        partidas.aplicar_lote(conn, proyecto, [{'op': 'eliminar', 'tipo': 'costos', 'id': partida_id}])
+    assert error.value.estado == 400
+    assert _costos(conn, proyecto) == [('Horno', 500)]
+
+
+def test_lote_por_api(client, proyecto):
+    ruta = f'/api/proyectos/{proyecto}/partidas/lote'
+    respuesta = client.post(ruta, json={'operaciones': [
+        {'op': 'insertar', 'tipo': 'costos', 'datos': {'nombre': 'Horno', 'valor': 500}},
+        {'op': 'eliminar', 'tipo': 'costos', 'id': True},
+    ]})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['indice'] == 1
+    assert client.get(f'/api/proyectos/{proyecto}/costos').get_json()['costos'] == []
+    assert client.post(ruta, json={'operaciones': []}).status_code == 400
+
+
+# ==================== IMPORTACIÓN ====================
+
+def test_importar_csv_utf8(conn, proyecto):
+    archivo = io.BytesIO('\ufeffnombre,valor\nHorno,500\nMesa,"120.5"\n'.encode('utf-8'))
+    resultado = partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(archivo, 'costos.csv'))
+    assert resultado['filas'] == 2
+    assert _costos(conn, proyecto) == [('Horno', 500), ('Mesa', 120.5)]
+    assert consultas.leer_totales(conn, proyecto)['costos'] == 620.5
+
+
+def test_importar_csv_cp1252(conn, proyecto):
+    archivo = io.BytesIO('nombre,valor\nCafé,10\nAzúcar,5\n'.encode('cp1252'))
+    partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(archivo, 'costos.csv'))
+    assert _costos(conn, proyecto) == [('Café', 10), ('Azúcar', 5)]
+
+
+def test_importar_filas_no_validas_no_inserta_nada(conn, proyecto):
+    archivo = io.BytesIO(b'nombre,valor\nHorno,500\nMesa,abc\n')
+    with pytest.raises(partidas.ErrorImportacion) as error:
+        partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(archivo, 'costos.csv'))
+    assert error.value.errores[0]['fila'] == 3
+    assert _costos(conn, proyecto) == []
+
+
+def test_importar_csv_punto_y_coma_con_coma_decimal(conn, proyecto):
+    archivo = io.BytesIO('nombre;valor\nHorno;1500,75\nMesa;2.5\n'.encode('cp1252'))
+    partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(archivo, 'costos.csv'))
+    assert _costos(conn, proyecto) == [('Horno', 1500.75), ('Mesa', 2.5)]
+
+
+@pytest.mark.parametrize('contenido', [
+    b'nombre,valor\nHorno,"1,000"\n',      # coma en un CSV separado por comas
+    b'nombre;valor\nHorno;1.000\n',        # punto de miles con coma decimal
+    b'nombre;valor\nHorno;1.234,5\n',      # miles y decimales
+])
+def test_importar_numero_ambiguo_es_error_de_fila(conn, proyecto, contenido):
+    with pytest.raises(partidas.ErrorImportacion) as error:
+        partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(io.BytesIO(contenido), 'costos.csv'))
+    assert error.value.errores[0]['fila'] == 2
+    assert 'ambiguo' in error.value.errores[0]['error']
+    assert _costos(conn, proyecto) == []
+
+
+def test_importar_xlsx(conn, proyecto):
+    openpyxl = pytest.importorskip('openpyxl')
+    libro = openpyxl.Workbook()
+    libro.active.append(['Nombre', 'Valor'])
+    libro.active.append(['Horno', 500])
+    archivo = io.BytesIO()
+    libro.save(archivo)
+    archivo.seek(0)
+    partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(archivo, 'costos.xlsx'))
+    assert _costos(conn, proyecto) == [('Horno', 500)]
+
+
+@pytest.mark.parametrize('contenido', [b'no es un zip', b'PK\x03\x04truncado'])
+def test_importar_xlsx_danado(conn, proyecto, contenido):
+    pytest.importorskip('openpyxl')
+    with pytest.raises(partidas.ErrorImportacion):
+        partidas.importar(conn, proyecto, 'costos', partidas.leer_filas(io.BytesIO(contenido), 'costos.xlsx'))
+
+
+def test_importar_api_responde_400(client, proyecto):
+    respuesta = client.post(f'/api/proyectos/{proyecto}/importar/costos',
+                            data={'archivo': (io.BytesIO(b'no es un zip'), 'costos.xlsx')})
+    assert respuesta.status_code == 400
+    respuesta = client.post(f'/api/proyectos/{proyecto}/importar/costos',
+                            data={'archivo': (io.BytesIO('nombre,valor\nCafé,10\n'.encode('cp1252')),
+                                              'costos.csv')})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['filas'] == 1
+
+
+def test_importar_api_tipo_desconocido_404(client, proyecto):
+    respuesta = client.post(f'/api/proyectos/{proyecto}/importar/equipos',
+                            data={'archivo': (io.BytesIO(b'nombre,valor\nx,1\n'), 'equipos.csv')})
+    assert respuesta.status_code == 404
+    assert respuesta.status_code == client.get(f'/api/proyectos/{proyecto}/equipos').status_code
@@ -0,0 +1,74 @@
+import consultas
+
+
+def _crear(conn, nombre):
+    cursor = conn.execute('INSERT INTO proyectos (nombre, tasa_descuento, precio_producto) '
+                          'VALUES (?, 0.1, 5)', (nombre,))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def test_partidas_aisladas_por_proyecto(client, conn):
+    a, b = _crear(conn, 'A'), _crear(conn, 'B')
+    client.post(f'/proyectos/{a}/agregar-costo', data={'nombre_costo': 'Horno de A', 'valor_costo': '500'})
+    costo = conn.execute('SELECT id, proyecto_id FROM costos').fetchone()
+    assert costo['proyecto_id'] == a
+
+    assert 'Horno de A' in client.get(f'/proyectos/{a}/viabilidad-tecnica').get_data(as_text=True)
+    assert 'Horno de A' not in client.get(f'/proyectos/{b}/viabilidad-tecnica').get_data(as_text=True)
+
+    # Una partida de A no se edita ni se borra desde la URL de B
+    client.post(f'/proyectos/{b}/editar-costo/{costo["id"]}', data={'nombre_costo': 'x', 'valor_costo': '1'})
+    client.get(f'/proyectos/{b}/eliminar-costo/{costo["id"]}')
+    assert tuple(conn.execute('SELECT nombre, valor FROM costos').fetchone()) == ('Horno de A', 500)
+    assert consultas.leer_totales(conn, a)['costos'] == 500
+    assert consultas.leer_totales(conn, b)['costos'] == 0
+
+
+def test_proyecto_inexistente_404(client, proyecto):
+    assert client.get(f'/proyectos/{proyecto + 1}/viabilidad-tecnica').status_code == 404
+    assert client.post(f'/proyectos/{proyecto + 1}/agregar-costo',
+                       data={'nombre_costo': 'x', 'valor_costo': '1'}).status_code == 404
+
+
+def test_rutas_anteriores_redirigen_al_ultimo_proyecto(client, conn):
+    _crear(conn, 'viejo')
+    ultimo = _crear(conn, 'nuevo')
+
+    respuesta = client.get('/proyecto/viabilidad-tecnica?x=1')
+    assert respuesta.status_code == 308
+    assert respuesta.location.endswith(f'/proyectos/{ultimo}/viabilidad-tecnica?x=1')
+
+    respuesta = client.get('/resultados/calculos-financieros')
+    assert respuesta.status_code == 308
+    assert respuesta.location.endswith(f'/proyectos/{ultimo}/resultados/calculos-financieros')
+
+    # 308 conserva el método y el cuerpo del formulario
+    respuesta = client.post('/proyecto/agregar-costo', data={'nombre_costo': 'c', 'valor_costo': '7'},
+                            follow_redirects=True)
+    assert respuesta.status_code == 200
+    assert tuple(conn.execute('SELECT proyecto_id, valor FROM costos').fetchone()) == (ultimo, 7)
+
+
+def test_rutas_anteriores_sin_proyectos(client):
+    respuesta = client.get('/proyecto/datos-iniciales')
+    assert respuesta.status_code == 308
+    assert respuesta.location.endswith('/proyectos/nuevo')
+    assert client.get('/proyecto/viabilidad-tecnica').status_code == 302
+
+
+def test_listado_paginado_por_clave(app, client, conn):
+    ids = [_crear(conn, f'Proyecto {i:02d}') for i in range(5)]
+    app.config['PROYECTOS_POR_PAGINA'] = 2
+
+    filas, siguiente = consultas.listar_proyectos(conn, None, 2)
+    assert [f['id'] for f in filas] == ids[:-3:-1]
+    assert siguiente == ids[3]
+    filas, siguiente = consultas.listar_proyectos(conn, siguiente, 2)
+    assert [f['id'] for f in filas] == [ids[2], ids[1]]
+    filas, siguiente = consultas.listar_proyectos(conn, siguiente, 2)
+    assert [f['id'] for f in filas] == [ids[0]]
+    assert siguiente is None
+
+    pagina = client.get(f'/?antes={ids[3]}').get_data(as_text=True)
+    assert 'Proyecto 02' in pagina and 'Proyecto 04' not in pagina
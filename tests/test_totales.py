@@ -0,0 +1,92 @@
+import sqlite3
+
+import consultas
+import migraciones
+import partidas
+
+
+def _sumas(conn, proyecto_id):
+    return {clave: conn.execute(f'SELECT COALESCE(SUM({columna}), 0) FROM {tabla} WHERE proyecto_id = ?',
+                                (proyecto_id,)).fetchone()[0]
+            for clave, (tabla, columna) in consultas.COLUMNAS_TOTALES.items()}
+
+
+def test_triggers_mantienen_totales_y_version(conn, proyecto):
+    version = consultas.leer_totales(conn, proyecto)['version']
+    ids = [partidas.insertar(conn, proyecto, 'costos', {'nombre': f'c{i}', 'valor': 10.25 * i})
+           for i in range(1, 6)]
+    partidas.insertar(conn, proyecto, 'personal', {'nombre': 'Ana', 'salario_mensual': 1200})
+    partidas.insertar(conn, proyecto, 'materiales', {'nombre': 'Harina', 'valor': 3.3})
+    partidas.actualizar(conn, proyecto, 'costos', ids[0], {'nombre': 'c1', 'valor': 99.9})
+    partidas.eliminar(conn, proyecto, 'costos', ids[1])
+    conn.commit()
+
+    totales = consultas.leer_totales(conn, proyecto)
+    assert totales['version'] > version
+    assert {clave: totales[clave] for clave in consultas.COLUMNAS_TOTALES} == _sumas(conn, proyecto)
+    assert consultas.verificar_totales(conn) == []
+
+
+def test_cambio_de_nombre_cambia_la_version(conn, proyecto):
+    partida = partidas.insertar(conn, proyecto, 'gastos', {'nombre': 'Luz', 'valor': 50})
+    conn.commit()
+    version = consultas.leer_totales(conn, proyecto)['version']
+    partidas.actualizar(conn, proyecto, 'gastos', partida, {'nombre': 'Agua', 'valor': 50})
+    conn.commit()
+    totales = consultas.leer_totales(conn, proyecto)
+    assert totales['version'] > version
+    assert totales['gastos'] == 50
+
+
+def test_verificar_totales_repara_la_deriva(app, conn, proyecto):
+    partidas.insertar(conn, proyecto, 'costos', {'nombre': 'c', 'valor': 100})
+    conn.execute('UPDATE proyecto_totales SET costos = costos + 1e-9 WHERE proyecto_id = ?', (proyecto,))
+    conn.commit()
+    # Por debajo de la tolerancia no es una diferencia, pero sí deriva
+    assert consultas.verificar_totales(conn) == []
+    assert consultas.verificar_totales(conn, tolerancia=0)
+
+    runner = app.test_cli_runner()
+    resultado = runner.invoke(args=['verificar-totales', '--solo-verificar'])
+    assert 'sin reparar' in resultado.output
+    resultado = runner.invoke(args=['verificar-totales'])
+    assert 'reparados en 1 proyectos' in resultado.output
+    assert consultas.verificar_totales(conn, tolerancia=0) == []
+    assert consultas.leer_totales(conn, proyecto)['costos'] == 100
+
+
+def test_triggers_solo_en_migracion(app, conn):
+    assert migraciones.version_esquema(conn) == len(migraciones.MIGRACIONES)
+    conn.execute('DROP TRIGGER trg_costos_totales_insert')
+    conn.commit()
+    # init-db con el esquema al día no vuelve a crear los triggers
+    app.test_cli_runner().invoke(args=['init-db'])
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'trg_costos_totales_insert'").fetchone() is None
+
+
+def test_migraciones_desde_tablas_de_ventas_anteriores(conn, proyecto):
+    columnas = ', '.join(f'{c} INTEGER' for c in migraciones.COLUMNAS_VENTAS_ANTERIORES['anos'])
+    conn.execute(f'CREATE TABLE ventas_anos (id INTEGER PRIMARY KEY, proyecto_id INTEGER, {columnas})')
+    conn.execute('INSERT INTO ventas_anos (proyecto_id, año1, año2) VALUES (?, 5, 6)', (proyecto,))
+    conn.execute('PRAGMA user_version = 0')
+    conn.commit()
+
+    assert migraciones.aplicar_migraciones(conn) == [version for version, _ in migraciones.MIGRACIONES]
+    nombres = {fila[0] for fila in conn.execute('SELECT name FROM sqlite_master')}
+    assert 'ventas_anos' not in nombres and 'idx_ventas_anos_proyecto' not in nombres
+    unidades = conn.execute("SELECT unidades FROM ventas WHERE proyecto_id = ? AND granularidad = 'anos' "
+                            'ORDER BY periodo', (proyecto,)).fetchall()
+    assert [fila[0] for fila in unidades][:3] == [5, 6, 0]
+
+
+def test_reconstruir_muchos_proyectos_por_lotes(conn, monkeypatch):
+    conn.executemany('INSERT INTO proyectos (nombre) VALUES (?)', [(f'p{i}',) for i in range(30)])
+    conn.execute('UPDATE proyecto_totales SET costos = 1')
+    conn.commit()
+    # Menos parámetros por sentencia que proyectos a reparar
+    conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 8)
+    monkeypatch.setattr(consultas, 'LOTE_IDS', 8)
+    ids = [fila[0] for fila in conn.execute('SELECT id FROM proyectos')]
+    consultas.reconstruir_totales(conn, ids)
+    conn.commit()
+    assert consultas.verificar_totales(conn, tolerancia=0) == []
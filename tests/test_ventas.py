@@ -0,0 +1,92 @@
+import pytest
+
+import consultas
+import migraciones
+
+
+def _ventas(conn, proyecto, granularidad):
+    return [tuple(fila) for fila in conn.execute(
+        'SELECT periodo, unidades FROM ventas WHERE proyecto_id = ? AND granularidad = ? ORDER BY periodo',
+        (proyecto, granularidad))]
+
+
+def _version(conn, proyecto):
+    return consultas.leer_totales(conn, proyecto)['version']
+
+
+def test_upsert_sin_cambios_no_sube_la_version(conn, proyecto):
+    consultas.guardar_ventas(conn, proyecto, 'anos', [100, 200, 300])
+    conn.commit()
+    version = _version(conn, proyecto)
+
+    consultas.guardar_ventas(conn, proyecto, 'anos', [100, 200, 300])
+    conn.commit()
+    assert _version(conn, proyecto) == version
+
+    consultas.guardar_ventas(conn, proyecto, 'anos', [100, 250])
+    conn.commit()
+    assert _version(conn, proyecto) > version
+    # Sin reemplazar, los periodos siguientes se conservan
+    assert _ventas(conn, proyecto, 'anos') == [(1, 100), (2, 250), (3, 300)]
+
+
+def test_reemplazar_borra_los_periodos_posteriores(conn, proyecto):
+    consultas.guardar_ventas(conn, proyecto, 'meses', list(range(1, 13)))
+    consultas.guardar_ventas(conn, proyecto, 'meses', [5, 6], reemplazar=True)
+    conn.commit()
+    assert _ventas(conn, proyecto, 'meses') == [(1, 5), (2, 6)]
+
+
+def test_ventas_por_api(client, proyecto):
+    ruta = f'/api/proyectos/{proyecto}/ventas/semanas'
+    assert client.get(ruta).get_json()['unidades'] is None
+
+    datos = client.put(ruta, json={'unidades': [10, 20, 30, 40, 50]}).get_json()
+    assert datos['unidades'] == [10, 20, 30, 40, 50]
+    assert datos['ventas']['semana1'] == 10 and datos['ventas']['periodo5'] == 50
+
+    # Por nombres, como el formulario: los ausentes valen 0 y los periodos siguientes no se tocan
+    datos = client.put(ruta, json={'semana2': 7}).get_json()
+    assert datos['unidades'][:2] == [0, 7] and datos['unidades'][-1] == 50
+
+    assert client.put(ruta, json={'unidades': [1, -1]}).status_code == 400
+    assert client.put(ruta, json={'unidades': ['x']}).status_code == 400
+    assert client.get(f'/api/proyectos/{proyecto}/ventas/horas').status_code == 404
+
+
+def test_ventas_por_formulario(client, conn, proyecto):
+    respuesta = client.post(f'/proyectos/{proyecto}/guardar-ventas-dias',
+                            data={'lunes': '10', 'martes': '20'})
+    assert respuesta.status_code == 302
+    assert _ventas(conn, proyecto, 'dias')[:3] == [(1, 10), (2, 20), (3, 0)]
+    assert 'Ventas por día guardadas' in client.get(f'/proyectos/{proyecto}/flujos-caja').get_data(as_text=True)
+
+
+@pytest.mark.parametrize('granularidad, por_ano', [
+    ('dias', 3650), ('semanas', 520), ('meses', 120), ('anos', None)])
+def test_flujo_con_ventas_del_formulario_cubre_el_horizonte(client, conn, proyecto, granularidad, por_ano):
+    conn.execute('UPDATE proyectos SET granularidad_ventas = ?, horizonte = 10 WHERE id = ?',
+                 (granularidad, proyecto))
+    conn.commit()
+    campos = consultas.PERIODOS_VENTAS[granularidad]
+    client.post(f'/proyectos/{proyecto}/guardar-ventas-{granularidad}', data={campo: '10' for campo in campos})
+
+    ingresos = client.get(f'/api/proyectos/{proyecto}/resultados').get_json()['calculos']['ingresos']
+    # Precio 5: los años son el patrón repetido; los 7 años del formulario, seguidos de ceros
+    esperados = [5 * por_ano] * 10 if por_ano else [50] * 7 + [0] * 3
+    assert ingresos == esperados
+
+
+def test_migracion_normaliza_tablas_anteriores(conn, proyecto):
+    conn.execute('CREATE TABLE ventas_semanas (id INTEGER PRIMARY KEY, proyecto_id INTEGER, '
+                 'semana1 INTEGER, semana2 INTEGER, semana3 INTEGER, semana4 INTEGER)')
+    # Con varias filas por proyecto se conserva la primera, que era la que se leía
+    conn.executemany('INSERT INTO ventas_semanas (proyecto_id, semana1, semana2, semana3, semana4) '
+                     'VALUES (?, ?, ?, ?, ?)', [(proyecto, 1, 2, None, 4), (proyecto, 9, 9, 9, 9)])
+    conn.execute('PRAGMA user_version = 3')
+    conn.commit()
+
+    assert migraciones.aplicar_migraciones(conn) == [4, 5, 6]
+    assert _ventas(conn, proyecto, 'semanas') == [(1, 1), (2, 2), (3, 0), (4, 4)]
+    tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'ventas_semanas' not in tablas